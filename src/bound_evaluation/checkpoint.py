@@ -0,0 +1,103 @@
+"""Persist the parameter array and finished chunks of result rows, such that
+an interrupted Monte Carlo run can be resumed."""
+
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from utils.exceptions import IllegalArgumentError
+
+PARAM_FILE = "param_array.npy"
+
+
+def run_directory(checkpoint_dir: str, filename: str, mc_dist: MonteCarloDist,
+                  **run_param) -> str:
+    """
+    :param checkpoint_dir: parent directory of all runs
+    :param filename: name of the run, e.g. of its csv file
+    :param mc_dist: distribution of the parameters
+    :param run_param: further parameters defining the drawn or the result
+                      rows, e.g. number_servers or the comparator
+    :return: directory of the run, it differs for every parameter that
+             changes the drawn or the result rows
+    """
+    key = f"{filename}_{mc_dist.param_to_string()}"
+
+    if mc_dist.seed is not None:
+        key += f"_qmc_seed_{mc_dist.seed}"
+
+    for name, value in run_param.items():
+        key += f"_{name}_{value}"
+
+    return os.path.join(checkpoint_dir, key)
+
+
+class Checkpoint(object):
+    """
+    Directory with one .npy file for the parameter array and one per
+    finished chunk of result rows. Files are written to a temporary name
+    and renamed afterwards, i.e., a crash never leaves a truncated file.
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _save(self, filename: str, array: np.ndarray) -> None:
+        path = os.path.join(self.directory, filename)
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "wb") as npy_file:
+            np.save(npy_file, array)
+            npy_file.flush()
+            os.fsync(npy_file.fileno())
+
+        os.replace(tmp_path, path)
+
+    def _load(self, filename: str) -> Optional[np.ndarray]:
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            return None
+
+        return np.load(path)
+
+    def param_array(self, draw: Callable[[], np.ndarray],
+                    shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        :param draw: draws a new parameter array
+        :param shape: expected shape, checked before finished chunks are
+                      reused
+        :return: stored parameter array, drawn and stored on the first call
+        """
+        param_array = self._load(PARAM_FILE)
+
+        if param_array is not None and shape is not None and param_array.shape != tuple(shape):
+            raise IllegalArgumentError(f"stored parameter array in {self.directory} has shape {param_array.shape}, "
+                                       f"expected {tuple(shape)}")
+
+        if param_array is None:
+            param_array = draw()
+            self._save(PARAM_FILE, param_array)
+
+        return param_array
+
+    @staticmethod
+    def _chunk_file(start: int, stop: int) -> str:
+        return f"rows_{start}_{stop}.npy"
+
+    def load_chunk(self, start: int, stop: int) -> Optional[np.ndarray]:
+        """
+        :param start: first row
+        :param stop: last row + 1
+        :return: result rows, None if the chunk is not finished
+        """
+        return self._load(self._chunk_file(start, stop))
+
+    def save_chunk(self, start: int, res_chunk: np.ndarray) -> None:
+        """
+        :param start: first row
+        :param res_chunk: result rows
+        """
+        self._save(self._chunk_file(start, start + res_chunk.shape[0]),
+                   res_chunk)
@@ -0,0 +1,40 @@
+"""Condition Monte Carlo parameters on the utilization."""
+
+from typing import Optional
+
+import numpy as np
+
+
+def rescale_server_rates(param_array: np.ndarray, util: np.ndarray,
+                         target_util: float,
+                         number_servers: int,
+                         rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Multiplying all server rates of a row by a factor divides the
+    utilization of every server by it. Hence, the rates are rescaled such
+    that the utilization of each row is uniform in [target_util, 1), i.e.,
+    no row is discarded by the utilization filter. Rows with a utilization
+    that is not finite and positive are left unchanged.
+
+    :param param_array: output of mc_enum_to_dist, the servers' rates are
+                        the last number_servers columns
+    :param util: approximate utilization of every row
+    :param target_util: minimum utilization
+    :param number_servers: number of servers
+    :param rng: random number generator, the global np.random state is used
+                if None
+    :return: parameter array with rescaled server rates
+    """
+    random = np.random if rng is None else rng
+
+    new_util = random.uniform(low=target_util,
+                              high=1.0,
+                              size=param_array.shape[0])
+
+    with np.errstate(all="ignore"):
+        factor = np.where(np.isfinite(util) & (util > 0.0), util / new_util, 1.0)
+
+    res_array = param_array.copy()
+    res_array[:, -number_servers:] *= factor[:, np.newaxis]
+
+    return res_array
@@ -9,3 +9,27 @@ def remove_nan_rows(full_array: np.array) -> np.array:
 
 def remove_full_nan_rows(full_array: np.array) -> np.array:
     return full_array[~np.isnan(full_array).all(axis=1)]
+
+
+def utilization_mask(util: np.ndarray, target_util: float,
+                     report=True) -> np.ndarray:
+    """
+    Vectorized counterpart of discarding a row if util < target_util or
+    util > 1.
+
+    :param util: approximate utilization of every row
+    :param target_util: minimum utilization
+    :param report: if True, the ratio of discarded rows is printed
+    :return: boolean mask of the rows to be evaluated
+    """
+    row_mask = (util >= target_util) & (util <= 1.0)
+
+    if not report:
+        return row_mask
+
+    number_discarded = util.shape[0] - int(np.count_nonzero(row_mask))
+
+    print(f"utilization filter discards {number_discarded} of {util.shape[0]} rows "
+          f"({number_discarded / max(util.shape[0], 1):.1%})")
+
+    return row_mask
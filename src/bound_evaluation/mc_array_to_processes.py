@@ -0,0 +1,119 @@
+"""Takes the output of mc_enum_to_dist and returns arrivals and servers"""
+
+from typing import List
+
+import numpy as np
+
+from nc_arrivals.arrival_distribution import ArrivalDistribution
+from nc_arrivals.arrival_enum import ArrivalEnum
+from nc_arrivals.batch_arrivals import (DetermTokenBucketBatch,
+                                        DGamma1Batch, DM1Batch,
+                                        DWeibull1Batch,
+                                        LeakyBucketMassoulieBatch, MD1Batch,
+                                        MMOOContBatch, MMOODiscBatch)
+from nc_arrivals.iid import DM1, MD1, DGamma1, DWeibull1
+from nc_arrivals.markov_modulated import MMOOCont, MMOODisc
+from nc_arrivals.regulated_arrivals import (DetermTokenBucket,
+                                            LeakyBucketMassoulie)
+from nc_server.constant_rate_server import (ConstantRateServer,
+                                            ConstantRateServerBatch)
+
+
+def arrivals_from_array(arrival_enum: ArrivalEnum, param_array: np.ndarray,
+                        number_flows: int) -> List[ArrivalDistribution]:
+    """
+    The column j * number_flows + i holds the j-th parameter of flow i.
+
+    :param arrival_enum: arrival process
+    :param param_array: one parameter row, or all rows (then every flow is a
+                        batch with one entry per row)
+    :param number_flows: number of flows
+    :return: list of arrivals, one per flow
+    """
+    batch = param_array.ndim == 2
+
+    def column(j: int):
+        return param_array[:, j] if batch else param_array[j]
+
+    if arrival_enum == ArrivalEnum.DM1:
+        arrival_class = DM1Batch if batch else DM1
+        return [arrival_class(lamb=column(i)) for i in range(number_flows)]
+
+    elif arrival_enum == ArrivalEnum.DGamma1:
+        arrival_class = DGamma1Batch if batch else DGamma1
+        return [
+            arrival_class(alpha_shape=column(i),
+                          beta_rate=column(number_flows + i))
+            for i in range(number_flows)
+        ]
+
+    elif arrival_enum == ArrivalEnum.DWeibull1:
+        arrival_class = DWeibull1Batch if batch else DWeibull1
+        return [arrival_class(lamb=column(i)) for i in range(number_flows)]
+
+    elif arrival_enum == ArrivalEnum.MD1:
+        arrival_class = MD1Batch if batch else MD1
+        return [
+            arrival_class(lamb=column(i), mu=np.ones_like(column(i)) if batch else 1.0)
+            for i in range(number_flows)
+        ]
+
+    elif arrival_enum == ArrivalEnum.MMOODisc:
+        arrival_class = MMOODiscBatch if batch else MMOODisc
+        return [
+            arrival_class(stay_on=column(i),
+                          stay_off=column(number_flows + i),
+                          peak_rate=column(2 * number_flows + i))
+            for i in range(number_flows)
+        ]
+
+    elif arrival_enum == ArrivalEnum.MMOOFluid:
+        arrival_class = MMOOContBatch if batch else MMOOCont
+        return [
+            arrival_class(mu=column(i),
+                          lamb=column(number_flows + i),
+                          peak_rate=column(2 * number_flows + i))
+            for i in range(number_flows)
+        ]
+
+    elif arrival_enum == ArrivalEnum.Massoulie:
+        # NOTE: n is fixed
+        arrival_class = LeakyBucketMassoulieBatch if batch else LeakyBucketMassoulie
+        return [
+            arrival_class(sigma_single=column(i),
+                          rho_single=column(number_flows + i),
+                          m=20) for i in range(number_flows)
+        ]
+
+    elif arrival_enum == ArrivalEnum.TBConst:
+        arrival_class = DetermTokenBucketBatch if batch else DetermTokenBucket
+        return [
+            arrival_class(sigma_single=column(i),
+                          rho_single=column(number_flows + i),
+                          m=1) for i in range(number_flows)
+        ]
+
+    else:
+        raise NotImplementedError(f"Arrival parameter {arrival_enum.name} "
+                                  f"is infeasible")
+
+
+def servers_from_array(arrival_enum: ArrivalEnum, param_array: np.ndarray,
+                       number_flows: int,
+                       number_servers: int) -> List[ConstantRateServer]:
+    """
+    The servers' rates are the last number_servers columns.
+
+    :param arrival_enum: arrival process
+    :param param_array: one parameter row, or all rows (then every server is
+                        a batch with one entry per row)
+    :param number_flows: number of flows
+    :param number_servers: number of servers
+    :return: list of constant rate servers
+    """
+    first_column = arrival_enum.number_parameters() * number_flows
+
+    if param_array.ndim == 2:
+        return [ConstantRateServerBatch(rate=param_array[:, first_column + j]) for j in range(number_servers)]
+
+    return [ConstantRateServer(rate=param_array[first_column + j]) for j in range(number_servers)]
@@ -1,30 +1,75 @@
 """Takes the Monte Carlo Enum and returns the random vector"""
 
+from typing import Optional, Tuple
+
 import numpy as np
+from scipy.stats import qmc
 
 from bound_evaluation.mc_enum import MCEnum
 from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import CHUNK_SIZE
 from nc_arrivals.arrival_enum import ArrivalEnum
 
 
+def param_array_shape(arrival_enum: ArrivalEnum, number_flows: int,
+                      number_servers: int, total_iterations: int) -> Tuple[int, int]:
+    """
+    :return: shape of the parameter array, one row per iteration
+    """
+    # servers have only 1 parameter
+    return (total_iterations,
+            arrival_enum.number_parameters() * number_flows + number_servers)
+
+
 def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
                     number_flows: int, number_servers: int,
-                    total_iterations: int) -> np.ndarray:
-    size_array = [
-        total_iterations,
-        arrival_enum.number_parameters() * number_flows + number_servers
-        # servers have only 1 parameter
-    ]
+                    total_iterations: int,
+                    rng: Optional[np.random.Generator] = None,
+                    first_row=0,
+                    qmc_seed: Optional[int] = None) -> np.ndarray:
+    """
+    :param rng: random number generator, the global np.random state is used
+                if None
+    :param first_row: index of the first drawn row in the whole sweep, used
+                      to continue the Sobol sequence
+    :param qmc_seed: seed of the Sobol scrambling, defaults to mc_dist.seed
+                     and then to rng
+    :return: parameter array, one row per iteration
+    """
+    random = np.random if rng is None else rng
+
+    size_array = list(param_array_shape(arrival_enum=arrival_enum,
+                                        number_flows=number_flows,
+                                        number_servers=number_servers,
+                                        total_iterations=total_iterations))
+
+    if mc_dist.qmc:
+        # one Sobol dimension per column, transformed by the inverse CDF
+        if qmc_seed is None:
+            qmc_seed = mc_dist.seed if mc_dist.seed is not None else rng
+        sobol = qmc.Sobol(d=size_array[1], scramble=True, seed=qmc_seed)
+        if first_row > 0:
+            sobol.fast_forward(first_row)
+        uniform = sobol.random(n=total_iterations)
+
+        if arrival_enum == ArrivalEnum.MMOODisc:
+            # the first 2 * number_flows columns are probabilities
+            return np.concatenate(
+                (uniform[:, :2 * number_flows],
+                 mc_dist.ppf(uniform[:, 2 * number_flows:])),
+                axis=1)
+
+        return mc_dist.ppf(uniform)
 
     if arrival_enum == ArrivalEnum.MMOODisc:
-        probabilities = np.random.uniform(
+        probabilities = random.uniform(
             low=0.0, high=1.0, size=[total_iterations, 2 * number_flows])
 
         match mc_dist.mc_enum:
             case MCEnum.UNIFORM:
                 return np.concatenate(
                     (probabilities,
-                     np.random.uniform(
+                     random.uniform(
                          low=0.0,
                          high=mc_dist.param_list[0],
                          size=[total_iterations,
@@ -34,7 +79,7 @@ def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
                 # watch out: scale is the expectation 1 / lambda
                 return np.concatenate(
                     (probabilities,
-                     np.random.exponential(
+                     random.exponential(
                          scale=1 / mc_dist.param_list[0],
                          size=[total_iterations,
                                number_flows + number_servers])),
@@ -42,7 +87,7 @@ def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
             case MCEnum.PARETO:
                 return np.concatenate(
                     (probabilities,
-                     np.random.pareto(
+                     random.pareto(
                          a=mc_dist.param_list[0],
                          size=[total_iterations,
                                number_flows + number_servers])),
@@ -50,7 +95,7 @@ def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
             case MCEnum.LOG_NORMAL:
                 return np.concatenate(
                     (probabilities,
-                     np.random.lognormal(
+                     random.lognormal(
                          mean=mc_dist.param_list[0],
                          sigma=mc_dist.param_list[1],
                          size=[total_iterations,
@@ -59,7 +104,7 @@ def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
             case MCEnum.CHI_SQUARED:
                 return np.concatenate(
                     (probabilities,
-                     np.random.chisquare(
+                     random.chisquare(
                          df=mc_dist.param_list[0],
                          size=[total_iterations,
                                number_flows + number_servers])),
@@ -70,22 +115,83 @@ def mc_enum_to_dist(arrival_enum: ArrivalEnum, mc_dist: MonteCarloDist,
 
     else:
         if mc_dist.mc_enum == MCEnum.UNIFORM:
-            return np.random.uniform(low=0.0,
-                                     high=mc_dist.param_list[0],
-                                     size=size_array)
+            return random.uniform(low=0.0,
+                                  high=mc_dist.param_list[0],
+                                  size=size_array)
         elif mc_dist.mc_enum == MCEnum.EXPONENTIAL:
-            return np.random.exponential(scale=1 / mc_dist.param_list[0],
-                                         size=size_array)
+            return random.exponential(scale=1 / mc_dist.param_list[0],
+                                      size=size_array)
         # watch out: scale is the expectation 1 / lambda
         elif mc_dist.mc_enum == MCEnum.PARETO:
-            return np.random.pareto(a=mc_dist.param_list[0], size=size_array)
+            return random.pareto(a=mc_dist.param_list[0], size=size_array)
         elif mc_dist.mc_enum == MCEnum.LOG_NORMAL:
-            return np.random.lognormal(mean=mc_dist.param_list[0],
-                                       sigma=mc_dist.param_list[1],
-                                       size=size_array)
+            return random.lognormal(mean=mc_dist.param_list[0],
+                                    sigma=mc_dist.param_list[1],
+                                    size=size_array)
         elif mc_dist.mc_enum == MCEnum.CHI_SQUARED:
-            return np.random.chisquare(df=mc_dist.param_list[0],
-                                       size=size_array)
+            return random.chisquare(df=mc_dist.param_list[0],
+                                    size=size_array)
         else:
             raise NameError(
                 f"Distribution parameter {mc_dist.mc_enum} is infeasible")
+
+
+def chunk_rng(seed_sequence: np.random.SeedSequence,
+              chunk_index: int) -> np.random.Generator:
+    """
+    :param seed_sequence: seed of the whole sweep
+    :param chunk_index: index of the chunk
+    :return: generator of the chunk_index-th child of seed_sequence, i.e.,
+             the same as seed_sequence.spawn(n)[chunk_index] for any n
+    """
+    return np.random.default_rng(
+        np.random.SeedSequence(entropy=seed_sequence.entropy,
+                               spawn_key=seed_sequence.spawn_key +
+                               (chunk_index, ),
+                               pool_size=seed_sequence.pool_size))
+
+
+def mc_enum_to_dist_chunks(arrival_enum: ArrivalEnum,
+                           mc_dist: MonteCarloDist,
+                           number_flows: int,
+                           number_servers: int,
+                           total_iterations: int,
+                           seed_sequence: np.random.SeedSequence,
+                           chunk_size=CHUNK_SIZE,
+                           chunk_indices: Optional[range] = None) -> np.ndarray:
+    """
+    Every chunk of rows is drawn from its own reproducible stream. Hence, a
+    shard (range of chunks) drawn by another process gives the same rows as
+    drawing all chunks at once. For QMC, all chunks are parts of one Sobol
+    sequence whose scrambling is derived from seed_sequence (mc_dist.seed
+    is not used).
+
+    :param seed_sequence: seed of the whole sweep, e.g.,
+                          np.random.SeedSequence(1234)
+    :param chunk_size: number of rows per chunk
+    :param chunk_indices: chunks to be drawn, all chunks if None
+    :return: rows of the drawn chunks
+    """
+    if chunk_indices is None:
+        chunk_indices = range(-(-total_iterations // chunk_size))
+
+    # the state of seed_sequence itself differs from that of its children
+    qmc_seed = int(seed_sequence.generate_state(1)[0])
+
+    chunks = []
+    for chunk_index in chunk_indices:
+        start = chunk_index * chunk_size
+        stop = min(start + chunk_size, total_iterations)
+
+        chunks.append(
+            mc_enum_to_dist(arrival_enum=arrival_enum,
+                            mc_dist=mc_dist,
+                            number_flows=number_flows,
+                            number_servers=number_servers,
+                            total_iterations=stop - start,
+                            rng=chunk_rng(seed_sequence=seed_sequence,
+                                          chunk_index=chunk_index),
+                            first_row=start,
+                            qmc_seed=qmc_seed))
+
+    return np.concatenate(chunks, axis=0)
@@ -1,7 +1,11 @@
 """Gather all distributions and parameter of the Monte Carlo simulation
 in one class"""
 
-from typing import List
+from math import exp
+from typing import List, Optional
+
+import numpy as np
+from scipy import stats
 
 from bound_evaluation.mc_enum import MCEnum
 
@@ -9,11 +13,27 @@ from bound_evaluation.mc_enum import MCEnum
 class MonteCarloDist(object):
     """Monte Carlo distribution class"""
 
-    def __init__(self, mc_enum: MCEnum, param_list: List[float]) -> None:
+    def __init__(self,
+                 mc_enum: MCEnum,
+                 param_list: List[float],
+                 qmc=False,
+                 seed: Optional[int] = None) -> None:
+        """
+        :param mc_enum: distribution of the parameters
+        :param param_list: parameters of the distribution
+        :param qmc: if True, parameters are drawn from a scrambled Sobol
+                    sequence instead of independent random numbers
+        :param seed: seed of the scrambling (reproducible QMC draws)
+        """
         self.mc_enum = mc_enum
         self.param_list = param_list
+        self.qmc = qmc
+        self.seed = seed
 
     def to_name(self) -> str:
+        if self.qmc:
+            return self.mc_enum.name + "_QMC"
+
         return self.mc_enum.name
 
     def param_to_string(self) -> str:
@@ -23,3 +43,29 @@ class MonteCarloDist(object):
             res += "parameter" + str(i + 1) + "_" + str(self.param_list[i])
 
         return res
+
+    def ppf(self, uniform: np.ndarray) -> np.ndarray:
+        """
+        Inverse CDF, i.e., maps uniform numbers in [0, 1) to the
+        distribution of the same parametrization as the np.random draws.
+
+        :param uniform: uniformly distributed numbers
+        :return: transformed numbers
+        """
+        if self.mc_enum == MCEnum.UNIFORM:
+            return self.param_list[0] * uniform
+        elif self.mc_enum == MCEnum.EXPONENTIAL:
+            # watch out: scale is the expectation 1 / lambda
+            return stats.expon.ppf(uniform, scale=1 / self.param_list[0])
+        elif self.mc_enum == MCEnum.PARETO:
+            # np.random.pareto is the Lomax distribution (Pareto II)
+            return stats.lomax.ppf(uniform, c=self.param_list[0])
+        elif self.mc_enum == MCEnum.LOG_NORMAL:
+            return stats.lognorm.ppf(uniform,
+                                     s=self.param_list[1],
+                                     scale=exp(self.param_list[0]))
+        elif self.mc_enum == MCEnum.CHI_SQUARED:
+            return stats.chi2.ppf(uniform, df=self.param_list[0])
+        else:
+            raise NameError(
+                f"Distribution parameter {self.mc_enum} is infeasible")
@@ -0,0 +1,112 @@
+"""Evaluate the rows of a Monte Carlo parameter array, optionally in a
+process pool."""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from tqdm import tqdm
+
+from bound_evaluation.checkpoint import Checkpoint
+
+CHUNK_SIZE = 100
+
+
+def evaluate_chunk(row_function: Callable[[np.ndarray], np.ndarray],
+                   rows: np.ndarray, number_columns: int) -> np.ndarray:
+    """
+    :param row_function: maps one parameter row to one result row
+    :param rows: consecutive rows of the parameter array
+    :param number_columns: number of result columns
+    :return: result rows
+    """
+    res_chunk = np.empty([rows.shape[0], number_columns])
+
+    for i in range(rows.shape[0]):
+        res_chunk[i, ] = row_function(rows[i])
+
+    return res_chunk
+
+
+def evaluate_rows(row_function: Callable[[np.ndarray], np.ndarray],
+                  param_array: np.ndarray,
+                  number_columns: int,
+                  number_processes=1,
+                  chunk_size=CHUNK_SIZE,
+                  checkpoint: Optional[Checkpoint] = None,
+                  row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Applies row_function to every row of param_array. Rows are sent in
+    chunks to number_processes worker processes and the results are merged
+    in the original order, i.e., the result does not depend on the number
+    of processes as long as row_function is deterministic.
+
+    :param row_function: picklable function (e.g. functools.partial of a
+                         module level function)
+    :param param_array: Monte Carlo parameters, one row per iteration
+    :param number_columns: number of result columns
+    :param number_processes: number of worker processes, 1 means serial
+    :param chunk_size: number of rows per task
+    :param checkpoint: if given, finished chunks are stored and chunks
+                       stored by a previous run are not evaluated again
+    :param row_mask: if given, only the rows where it is True are evaluated,
+                     the others are nan (e.g. from utilization_mask)
+    :return: result array
+    """
+    if row_mask is not None:
+        res_array = np.full([param_array.shape[0], number_columns], np.nan)
+        res_array[row_mask] = evaluate_rows(row_function=row_function,
+                                            param_array=param_array[row_mask],
+                                            number_columns=number_columns,
+                                            number_processes=number_processes,
+                                            chunk_size=chunk_size,
+                                            checkpoint=checkpoint)
+        return res_array
+
+    total_iterations = param_array.shape[0]
+
+    if number_processes == 1 and checkpoint is None:
+        res_array = np.empty([total_iterations, number_columns])
+
+        for i in tqdm(range(total_iterations), total=total_iterations):
+            res_array[i, ] = row_function(param_array[i])
+
+        return res_array
+
+    res_chunks: Dict[int, np.ndarray] = {}
+    missing_starts = []
+
+    for start in range(0, total_iterations, chunk_size):
+        stop = min(start + chunk_size, total_iterations)
+        res_chunk = None if checkpoint is None else checkpoint.load_chunk(start, stop)
+
+        if res_chunk is None:
+            missing_starts.append(start)
+        else:
+            res_chunks[start] = res_chunk
+
+    def finish(start: int, res_chunk: np.ndarray) -> None:
+        res_chunks[start] = res_chunk
+        if checkpoint is not None:
+            checkpoint.save_chunk(start, res_chunk)
+
+    if number_processes == 1:
+        for start in tqdm(missing_starts):
+            finish(start, evaluate_chunk(row_function, param_array[start:start + chunk_size], number_columns))
+
+    else:
+        with ProcessPoolExecutor(max_workers=number_processes) as executor:
+            futures = {
+                executor.submit(evaluate_chunk, row_function, param_array[start:start + chunk_size],
+                                number_columns): start
+                for start in missing_starts
+            }
+
+            # chunks are stored as soon as they are finished
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                finish(futures[future], future.result())
+
+    if not res_chunks:
+        return np.empty([0, number_columns])
+
+    return np.concatenate([res_chunks[start] for start in sorted(res_chunks)], axis=0)
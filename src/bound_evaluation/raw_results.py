@@ -0,0 +1,39 @@
+"""Store the raw arrays of a Monte Carlo run, such that they can be
+summarized again (e.g. with another ChangeEnum) without recomputation."""
+
+import json
+from typing import Dict, Tuple
+
+import numpy as np
+
+RAW_SUFFIX = "_raw.npz"
+
+
+def save_raw_results(filename: str, param_array: np.ndarray,
+                     res_array: np.ndarray, **metadata) -> str:
+    """
+    :param filename: name of the run, RAW_SUFFIX is appended
+    :param param_array: Monte Carlo parameters, one row per iteration
+    :param res_array: results, one row per iteration (nan if discarded)
+    :param metadata: JSON serializable values needed for the summary,
+                     e.g., arrival_enum=arrival_enum.name
+    :return: path of the compressed NPZ file
+    """
+    path = filename + RAW_SUFFIX
+
+    np.savez_compressed(path,
+                        param_array=param_array,
+                        res_array=res_array,
+                        metadata=np.array(json.dumps(metadata)))
+
+    return path
+
+
+def load_raw_results(path: str) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """
+    :param path: file written by save_raw_results
+    :return: param_array, res_array and metadata
+    """
+    with np.load(path) as npz_file:
+        return (npz_file["param_array"], npz_file["res_array"],
+                json.loads(str(npz_file["metadata"])))
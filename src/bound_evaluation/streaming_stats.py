@@ -0,0 +1,153 @@
+"""Summary statistics of Monte Carlo results that are updated chunk by
+chunk, i.e., the memory does not grow with the number of iterations."""
+
+from math import copysign, nan
+from typing import List, Optional
+
+import numpy as np
+
+from bound_evaluation.change_enum import ChangeEnum
+
+
+class P2Median(object):
+    """
+    P-square algorithm of Jain and Chlamtac (1985) for the median. Only five
+    markers are stored, the estimate is exact for up to five observations.
+    """
+    def __init__(self) -> None:
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.increments = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+    def add(self, value: float) -> None:
+        """
+        :param value: new observation
+        """
+        if len(self.heights) < 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+
+        if value < self.heights[0]:
+            self.heights[0] = value
+            cell = 0
+        elif value >= self.heights[4]:
+            self.heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if self.heights[i] <= value < self.heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # adjust the heights of the three middle markers
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+
+            if ((offset >= 1 and self.positions[i + 1] - self.positions[i] > 1)
+                    or (offset <= -1 and self.positions[i - 1] - self.positions[i] < -1)):
+                step = int(copysign(1, offset))
+                height = self._parabolic(i, step)
+
+                if not self.heights[i - 1] < height < self.heights[i + 1]:
+                    height = self._linear(i, step)
+
+                self.heights[i] = height
+                self.positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        n_prev, n_i, n_next = self.positions[i - 1], self.positions[i], self.positions[i + 1]
+
+        return self.heights[i] + step / (n_next - n_prev) * (
+            (n_i - n_prev + step) * (self.heights[i + 1] - self.heights[i]) / (n_next - n_i) +
+            (n_next - n_i - step) * (self.heights[i] - self.heights[i - 1]) / (n_i - n_prev))
+
+    def _linear(self, i: int, step: int) -> float:
+        return self.heights[i] + step * (self.heights[i + step] - self.heights[i]) / (self.positions[i + step] -
+                                                                                      self.positions[i])
+
+    def median(self) -> float:
+        """
+        :return: estimated median, nan if there is no observation
+        """
+        if len(self.heights) < 5:
+            if not self.heights:
+                return nan
+
+            return float(np.median(self.heights))
+
+        return self.heights[2]
+
+
+class StreamingImprovement(object):
+    """
+    Streaming counterpart of the statistics of two_col_array_to_results:
+    maximum improvement (with its parameter and result row), mean, median
+    (P-square estimate), number of improved and valid iterations.
+    """
+    def __init__(self, compare_metric: ChangeEnum = ChangeEnum.RATIO_REF_NEW) -> None:
+        self.compare_metric = compare_metric
+
+        self.iterations = 0
+        self.valid_iterations = 0
+        self.number_improved = 0
+
+        self.improvement_count = 0
+        self.improvement_sum = 0.0
+        self.median_estimate = P2Median()
+
+        self.opt_improvement = -np.inf
+        self.opt_param_row: Optional[np.ndarray] = None
+        self.opt_res_row: Optional[np.ndarray] = None
+
+    def update(self, param_chunk: np.ndarray, res_chunk: np.ndarray) -> None:
+        """
+        :param param_chunk: parameter rows of the chunk
+        :param res_chunk: result rows (standard, new) of the chunk
+        """
+        self.iterations += res_chunk.shape[0]
+        self.valid_iterations += int(np.count_nonzero(~np.isnan(res_chunk).all(axis=1)))
+        self.number_improved += int(np.count_nonzero(res_chunk[:, 0] > res_chunk[:, 1]))
+
+        with np.errstate(all="ignore"):
+            if self.compare_metric == ChangeEnum.RATIO_REF_NEW:
+                improvement_vec = np.divide(res_chunk[:, 0], res_chunk[:, 1])
+            elif self.compare_metric == ChangeEnum.DIFF_REF_NEW:
+                improvement_vec = np.subtract(res_chunk[:, 0], res_chunk[:, 1])
+            else:
+                raise NotImplementedError(f"Metric={self.compare_metric.name} is not implemented")
+
+        not_nan = ~np.isnan(improvement_vec)
+        if not np.any(not_nan):
+            return
+
+        self.improvement_count += int(np.count_nonzero(not_nan))
+        self.improvement_sum += float(np.sum(improvement_vec[not_nan]))
+
+        for improvement in improvement_vec[not_nan]:
+            self.median_estimate.add(float(improvement))
+
+        row_max = int(np.nanargmax(improvement_vec))
+        # strict comparison: the first maximum is kept as in np.nanargmax
+        if self.opt_param_row is None or improvement_vec[row_max] > self.opt_improvement:
+            self.opt_improvement = improvement_vec[row_max]
+            self.opt_param_row = param_chunk[row_max].copy()
+            self.opt_res_row = res_chunk[row_max].copy()
+
+    def mean_improvement(self) -> float:
+        """
+        :return: mean of the non-nan improvements
+        """
+        if self.improvement_count == 0:
+            return nan
+
+        return self.improvement_sum / self.improvement_count
+
+    def median_improvement(self) -> float:
+        """
+        :return: estimated median of the non-nan improvements
+        """
+        return self.median_estimate.median()
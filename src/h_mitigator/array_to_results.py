@@ -5,8 +5,10 @@ from warnings import warn
 import numpy as np
 from bound_evaluation.change_enum import ChangeEnum
 from bound_evaluation.manipulate_data import remove_full_nan_rows
+from bound_evaluation.raw_results import load_raw_results
+from bound_evaluation.streaming_stats import StreamingImprovement
 from nc_arrivals.arrival_enum import ArrivalEnum
-from utils.exceptions import IllegalArgumentError
+from utils.exceptions import IllegalArgumentError, NotEnoughResults
 
 
 def two_col_array_to_results(
@@ -44,61 +46,102 @@ def two_col_array_to_results(
 
     number_improved = np.sum(res_array[:, 0] > res_array[:, 1])
 
+    return improvement_to_results(arrival_enum=arrival_enum,
+                                  opt_param_row=param_array[row_max],
+                                  number_servers=number_servers,
+                                  opt_standard_bound=opt_standard_bound,
+                                  opt_h_mit_bound=opt_h_mit_bound,
+                                  opt_improvement=opt_improvement,
+                                  mean_improvement=mean_improvement,
+                                  median_improvement=median_improvement,
+                                  number_improved=number_improved,
+                                  valid_iterations=valid_iterations)
+
+
+def two_col_raw_to_results(
+        path: str,
+        compare_metric: ChangeEnum = ChangeEnum.RATIO_REF_NEW) -> dict:
+    """
+    Summarizes a stored run again without recomputing the bounds.
+
+    :param path: file written by save_raw_results, the metadata has to
+                 contain arrival_enum and number_servers
+    :param compare_metric: metric of the summary
+    :return: same dictionary as two_col_array_to_results
+    """
+    param_array, res_array, metadata = load_raw_results(path=path)
+
+    return two_col_array_to_results(
+        arrival_enum=ArrivalEnum[metadata["arrival_enum"]],
+        param_array=param_array,
+        res_array=res_array,
+        number_servers=metadata["number_servers"],
+        compare_metric=compare_metric)
+
+
+def improvement_to_results(arrival_enum: ArrivalEnum, opt_param_row: np.array,
+                           number_servers: int, opt_standard_bound: float,
+                           opt_h_mit_bound: float, opt_improvement: float,
+                           mean_improvement: float, median_improvement: float,
+                           number_improved: int,
+                           valid_iterations: int) -> dict:
+    """Writes the statistics and the parameters of the optimum into a
+    dictionary"""
     res_dict = {"Name": "Value", "arrival_distribution": arrival_enum.name}
 
     for j in range(number_servers):
         if arrival_enum == ArrivalEnum.DM1:
-            res_dict[f"lamb{j + 1}"] = format(param_array[row_max, j], '.3f')
+            res_dict[f"lamb{j + 1}"] = format(opt_param_row[j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.DGamma1:
-            res_dict[f"alpha_shape{j + 1}"] = format(param_array[row_max, j],
+            res_dict[f"alpha_shape{j + 1}"] = format(opt_param_row[j],
                                                      '.3f')
             res_dict[f"beta_rate{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, 2 * number_servers + j], '.3f')
+                opt_param_row[2 * number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.DWeibull1:
-            res_dict[f"lamb{j + 1}"] = format(param_array[row_max, j], '.3f')
+            res_dict[f"lamb{j + 1}"] = format(opt_param_row[j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.MD1:
-            res_dict[f"lamb{j + 1}"] = format(param_array[row_max, j], '.3f')
+            res_dict[f"lamb{j + 1}"] = format(opt_param_row[j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
             res_dict[f"packet_size{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.MMOODisc:
-            res_dict[f"stay_on{j + 1}"] = format(param_array[row_max, j],
+            res_dict[f"stay_on{j + 1}"] = format(opt_param_row[j],
                                                  '.3f')
             res_dict[f"stay_off{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
             res_dict[f"peak_rate{j + 1}"] = format(
-                param_array[row_max, 2 * number_servers + j], '.3f')
+                opt_param_row[2 * number_servers + j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, 3 * number_servers + j], '.3f')
+                opt_param_row[3 * number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.MMOOFluid:
-            res_dict[f"mu{j + 1}"] = format(param_array[row_max, j], '.3f')
+            res_dict[f"mu{j + 1}"] = format(opt_param_row[j], '.3f')
             res_dict[f"lamb{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
             res_dict[f"peak_rate{j + 1}"] = format(
-                param_array[row_max, 2 * number_servers + j], '.3f')
+                opt_param_row[2 * number_servers + j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, 3 * number_servers + j], '.3f')
+                opt_param_row[3 * number_servers + j], '.3f')
 
         elif arrival_enum == ArrivalEnum.EBB:
-            res_dict[f"M{j + 1}"] = format(param_array[row_max, j], '.3f')
+            res_dict[f"M{j + 1}"] = format(opt_param_row[j], '.3f')
             res_dict[f"b{j + 1}"] = format(
-                param_array[row_max, number_servers + j], '.3f')
+                opt_param_row[number_servers + j], '.3f')
             res_dict[f"rho{j + 1}"] = format(
-                param_array[row_max, 2 * number_servers + j], '.3f')
+                opt_param_row[2 * number_servers + j], '.3f')
             res_dict[f"rate{j + 1}"] = format(
-                param_array[row_max, 3 * number_servers + j], '.3f')
+                opt_param_row[3 * number_servers + j], '.3f')
 
         else:
             raise NotImplementedError(
@@ -118,6 +161,28 @@ def two_col_array_to_results(
     return res_dict
 
 
+def two_col_stream_to_results(arrival_enum: ArrivalEnum,
+                              stats: StreamingImprovement,
+                              number_servers: int) -> dict:
+    """
+    Same dictionary as two_col_array_to_results, but from statistics that
+    were updated chunk by chunk (the median is an estimate).
+    """
+    if stats.opt_param_row is None:
+        raise NotEnoughResults("no valid iteration")
+
+    return improvement_to_results(arrival_enum=arrival_enum,
+                                  opt_param_row=stats.opt_param_row,
+                                  number_servers=number_servers,
+                                  opt_standard_bound=stats.opt_res_row[0],
+                                  opt_h_mit_bound=stats.opt_res_row[1],
+                                  opt_improvement=stats.opt_improvement,
+                                  mean_improvement=stats.mean_improvement(),
+                                  median_improvement=stats.median_improvement(),
+                                  number_improved=stats.number_improved,
+                                  valid_iterations=stats.valid_iterations)
+
+
 def three_col_array_to_results(
         arrival_enum: ArrivalEnum,
         res_array: np.array,
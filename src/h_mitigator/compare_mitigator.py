@@ -2,35 +2,67 @@
 
 from math import nan
 from timeit import default_timer as timer
-from typing import Tuple
+from typing import Optional, Tuple
+
+import numpy as np
 
 from nc_operations.perform_enum import PerformEnum
 from optimization.initial_simplex import InitialSimplex
+from optimization.batch_optimize import BatchOptimize
 from optimization.opt_method import OptMethod
 from optimization.optimize import Optimize
+from optimization.result_cache import ResultCache
 
-from h_mitigator.optimize_mitigator import OptimizeMitigator
+from h_mitigator.optimize_mitigator import (BatchOptimizeMitigator,
+                                           OptimizeMitigator)
 from h_mitigator.setting_mitigator import SettingMitigator
 
 
 def compare_mitigator(setting: SettingMitigator,
                       opt_method: OptMethod,
-                      number_l=1) -> Tuple[float, float]:
-    """Compare standard_bound with the new Lyapunov standard_bound."""
+                      number_l=1,
+                      cache: Optional[ResultCache] = None) -> Tuple[float, float]:
+    """Compare standard_bound with the new Lyapunov standard_bound.
+
+    :param cache: optional persistent cache of the optimization results
+    """
+    standard_optimize = Optimize(setting=setting, number_param=1)
+    h_mit_optimize = OptimizeMitigator(setting_h_mit=setting,
+                                       number_param=number_l + 1)
 
     if opt_method == OptMethod.GRID_SEARCH:
         delta_val = 0.1
         theta_bounds = [(delta_val, 4.0)]
 
-        standard_bound = Optimize(setting=setting, number_param=1).grid_search(
-            grid_bounds=theta_bounds, delta=delta_val)
+        standard_bound = standard_optimize.cached(cache,
+                                                  "grid_search",
+                                                  grid_bounds=theta_bounds,
+                                                  delta=delta_val)
+
+        bound_array = theta_bounds[:]
+        for _i in range(1, number_l + 1):
+            bound_array.append((1.0 + delta_val, 4.0))
+
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "grid_search",
+                                            grid_bounds=bound_array,
+                                            delta=delta_val)
+
+    elif opt_method == OptMethod.MULTI_GRID_SEARCH:
+        delta_val = 0.1
+        theta_bounds = [(delta_val, 4.0)]
+
+        standard_bound = standard_optimize.cached(cache,
+                                                  "multi_grid_search",
+                                                  grid_bounds=theta_bounds,
+                                                  delta=delta_val)
 
         bound_array = theta_bounds[:]
         for _i in range(1, number_l + 1):
             bound_array.append((1.0 + delta_val, 4.0))
 
-        h_mit_bound = OptimizeMitigator(setting_h_mit=setting,
-                                        number_param=number_l + 1).grid_search(
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "multi_grid_search",
                                             grid_bounds=bound_array,
                                             delta=delta_val)
 
@@ -39,17 +71,16 @@ def compare_mitigator(setting: SettingMitigator,
 
         start_list = [theta_start]
 
-        standard_bound = Optimize(setting=setting,
-                                  number_param=1).pattern_search(
-                                      start_list=start_list,
-                                      delta=3.0,
-                                      delta_min=0.01)
+        standard_bound = standard_optimize.cached(cache,
+                                                  "pattern_search",
+                                                  start_list=start_list,
+                                                  delta=3.0,
+                                                  delta_min=0.01)
 
         start_list_new = [theta_start] + [1.0] * number_l
 
-        h_mit_bound = OptimizeMitigator(setting_h_mit=setting,
-                                        number_param=number_l +
-                                        1).pattern_search(
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "pattern_search",
                                             start_list=start_list_new,
                                             delta=3.0,
                                             delta_min=0.01)
@@ -65,16 +96,18 @@ def compare_mitigator(setting: SettingMitigator,
         start_simplex = InitialSimplex(parameters_to_optimize=1).gao_han(
             start_list=start_list)
 
-        standard_bound = Optimize(setting=setting, number_param=1).nelder_mead(
-            simplex=start_simplex, sd_min=10**(-2))
+        standard_bound = standard_optimize.cached(cache,
+                                                  "nelder_mead",
+                                                  simplex=start_simplex,
+                                                  sd_min=10**(-2))
 
         start_list_new = [theta_start] + [1.0] * number_l
         start_simplex_new = InitialSimplex(parameters_to_optimize=number_l +
                                            1).gao_han(
                                                start_list=start_list_new)
 
-        h_mit_bound = OptimizeMitigator(setting_h_mit=setting,
-                                        number_param=number_l + 1).nelder_mead(
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "nelder_mead",
                                             simplex=start_simplex_new,
                                             sd_min=10**(-2))
 
@@ -87,15 +120,15 @@ def compare_mitigator(setting: SettingMitigator,
 
         start_list = [theta_start]
 
-        standard_bound = Optimize(
-            setting=setting,
-            number_param=1).basin_hopping(start_list=start_list)
+        standard_bound = standard_optimize.cached(cache,
+                                                  "basin_hopping",
+                                                  start_list=start_list)
 
         start_list_new = [theta_start] + [1.0] * number_l
 
-        h_mit_bound = OptimizeMitigator(
-            setting_h_mit=setting,
-            number_param=number_l + 1).basin_hopping(start_list=start_list_new)
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "basin_hopping",
+                                            start_list=start_list_new)
 
         # This part is there to overcome opt_method issues
         if h_mit_bound > standard_bound:
@@ -104,17 +137,17 @@ def compare_mitigator(setting: SettingMitigator,
     elif opt_method == OptMethod.DUAL_ANNEALING:
         theta_bounds = [(0.1, 4.0)]
 
-        standard_bound = Optimize(
-            setting=setting,
-            number_param=1).dual_annealing(bound_list=theta_bounds)
+        standard_bound = standard_optimize.cached(cache,
+                                                  "dual_annealing",
+                                                  bound_list=theta_bounds)
 
         bound_array = theta_bounds[:]
         for _i in range(1, number_l + 1):
             bound_array.append((0.9, 4.0))
 
-        h_mit_bound = OptimizeMitigator(
-            setting_h_mit=setting,
-            number_param=number_l + 1).dual_annealing(bound_list=bound_array)
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "dual_annealing",
+                                            bound_list=bound_array)
 
         # This part is there to overcome opt_method issues
         if h_mit_bound > standard_bound:
@@ -123,22 +156,25 @@ def compare_mitigator(setting: SettingMitigator,
     elif opt_method == OptMethod.DIFFERENTIAL_EVOLUTION:
         theta_bounds = [(0.1, 8.0)]
 
-        standard_bound = Optimize(
-            setting=setting,
-            number_param=1).diff_evolution(bound_list=theta_bounds)
+        standard_bound = standard_optimize.cached(cache,
+                                                  "diff_evolution",
+                                                  bound_list=theta_bounds)
 
         bound_array = theta_bounds[:]
         for _i in range(1, number_l + 1):
             bound_array.append((0.9, 8.0))
 
-        h_mit_bound = OptimizeMitigator(
-            setting_h_mit=setting,
-            number_param=number_l + 1).diff_evolution(bound_list=bound_array)
+        h_mit_bound = h_mit_optimize.cached(cache,
+                                            "diff_evolution",
+                                            bound_list=bound_array)
 
     else:
         raise NameError(
             f"Optimization parameter {opt_method.name} is infeasible")
 
+    standard_bound = standard_bound.obj_value
+    h_mit_bound = h_mit_bound.obj_value
+
     # This part is there to overcome opt_method issues
     if h_mit_bound > standard_bound:
         h_mit_bound = standard_bound
@@ -150,6 +186,53 @@ def compare_mitigator(setting: SettingMitigator,
     return standard_bound, h_mit_bound
 
 
+def compare_mitigator_batch(setting: SettingMitigator,
+                            opt_method: OptMethod,
+                            number_l=1) -> Tuple[np.ndarray, np.ndarray]:
+    """Same as compare_mitigator for all rows of a batched setting, the
+    optimizations run in lock step.
+
+    :return: standard_bound and h_mit_bound of every row
+    """
+    standard_optimize = BatchOptimize(setting=setting, number_param=1)
+    h_mit_optimize = BatchOptimizeMitigator(setting_h_mit=setting,
+                                            number_param=number_l + 1)
+    theta_start = 0.5
+    start_list = [theta_start]
+    start_list_new = [theta_start] + [1.0] * number_l
+
+    if opt_method == OptMethod.PATTERN_SEARCH:
+        standard_bound = standard_optimize.pattern_search(
+            start_list=start_list, delta=3.0, delta_min=0.01)
+        h_mit_bound = h_mit_optimize.pattern_search(start_list=start_list_new,
+                                                    delta=3.0,
+                                                    delta_min=0.01)
+
+    elif opt_method == OptMethod.NELDER_MEAD:
+        standard_bound = standard_optimize.nelder_mead(
+            simplex=InitialSimplex(parameters_to_optimize=1).gao_han(
+                start_list=start_list),
+            sd_min=10**(-2))
+        h_mit_bound = h_mit_optimize.nelder_mead(
+            simplex=InitialSimplex(parameters_to_optimize=number_l +
+                                   1).gao_han(start_list=start_list_new),
+            sd_min=10**(-2))
+
+    else:
+        raise NameError(
+            f"Optimization parameter {opt_method.name} cannot be batched")
+
+    standard_bound = standard_bound.obj_value
+    # This part is there to overcome opt_method issues
+    h_mit_bound = np.minimum(h_mit_bound.obj_value, standard_bound)
+
+    zero = (standard_bound == 0) | (h_mit_bound == 0)
+    standard_bound[zero] = nan
+    h_mit_bound[zero] = nan
+
+    return standard_bound, h_mit_bound
+
+
 def compare_time(setting: SettingMitigator,
                  opt_method: OptMethod,
                  number_l=1) -> tuple:
@@ -174,6 +257,26 @@ def compare_time(setting: SettingMitigator,
         stop = timer()
         time_lyapunov = stop - start
 
+    elif opt_method == OptMethod.MULTI_GRID_SEARCH:
+        bound_array = [(0.1, 4.0)]
+
+        start = timer()
+        Optimize(setting=setting,
+                 number_param=1).multi_grid_search(grid_bounds=bound_array,
+                                                   delta=0.1)
+        stop = timer()
+        time_standard = stop - start
+
+        for _ in range(1, number_l + 1):
+            bound_array.append((0.9, 4.0))
+
+        start = timer()
+        OptimizeMitigator(setting_h_mit=setting,
+                          number_param=number_l + 1).multi_grid_search(
+                              grid_bounds=bound_array, delta=0.1)
+        stop = timer()
+        time_lyapunov = stop - start
+
     elif opt_method == OptMethod.PATTERN_SEARCH:
         start_list = [0.5]
 
@@ -34,6 +34,16 @@ def compare_optimization(setting: SettingMitigator,
                 bound = optim_mit.grid_search(grid_bounds=bound_list,
                                               delta=0.1).obj_value
 
+            case OptMethod.MULTI_GRID_SEARCH:
+                theta_bounds = [(0.1, 4.0)]
+
+                bound_list = theta_bounds[:]
+                for _i in range(number_l):
+                    bound_list.append((0.9, 4.0))
+
+                bound = optim_mit.multi_grid_search(grid_bounds=bound_list,
+                                                    delta=0.1).obj_value
+
             case OptMethod.PATTERN_SEARCH:
                 theta_start = 0.5
 
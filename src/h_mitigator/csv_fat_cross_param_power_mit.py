@@ -1,143 +1,269 @@
 """Compute optimal and average improvement for different parameters."""
 
 import csv
+from functools import partial
+from typing import Optional
 from warnings import warn
 
 import numpy as np
 from bound_evaluation.change_enum import ChangeEnum
-from bound_evaluation.manipulate_data import remove_full_nan_rows
+from bound_evaluation.checkpoint import Checkpoint, run_directory
+from bound_evaluation.condition_util import rescale_server_rates
+from bound_evaluation.manipulate_data import (remove_full_nan_rows,
+                                              utilization_mask)
+from bound_evaluation.mc_array_to_processes import (arrivals_from_array,
+                                                    servers_from_array)
 from bound_evaluation.mc_enum import MCEnum
-from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist
+from bound_evaluation.mc_enum_to_dist import (chunk_rng, mc_enum_to_dist,
+                                               mc_enum_to_dist_chunks,
+                                               param_array_shape)
 from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import CHUNK_SIZE, evaluate_rows
+from bound_evaluation.raw_results import save_raw_results
+from bound_evaluation.streaming_stats import StreamingImprovement
 from nc_arrivals.arrival_enum import ArrivalEnum
-from nc_arrivals.iid import DM1, MD1, DGamma1, DWeibull1
-from nc_arrivals.markov_modulated import MMOODisc, MMOOCont
-from nc_arrivals.regulated_arrivals import (DetermTokenBucket,
-                                            LeakyBucketMassoulie)
 from nc_operations.perform_enum import PerformEnum
-from nc_server.constant_rate_server import ConstantRateServer
 from optimization.opt_method import OptMethod
-from tqdm import tqdm
+from optimization.result_cache import ResultCache
 from utils.exceptions import NotEnoughResults
 from utils.perform_parameter import PerformParameter
 
-from h_mitigator.array_to_results import two_col_array_to_results
-from h_mitigator.compare_mitigator import compare_mitigator
+from h_mitigator.array_to_results import (two_col_array_to_results,
+                                          two_col_stream_to_results)
+from h_mitigator.compare_mitigator import (compare_mitigator,
+                                          compare_mitigator_batch)
 from h_mitigator.fat_cross_perform import FatCrossPerform
 
 
+def fat_cross_from_array(param_array: np.ndarray, arrival_enum: ArrivalEnum,
+                         number_flows: int, number_servers: int,
+                         perform_param: PerformParameter) -> FatCrossPerform:
+    """
+    :param param_array: one parameter row, or all rows (batched setting)
+    :return: fat cross setting
+    """
+    arr_list = arrivals_from_array(arrival_enum=arrival_enum,
+                                   param_array=param_array,
+                                   number_flows=number_flows)
+    ser_list = servers_from_array(arrival_enum=arrival_enum,
+                                  param_array=param_array,
+                                  number_flows=number_flows,
+                                  number_servers=number_servers)
+
+    return FatCrossPerform(arr_list=arr_list,
+                           ser_list=ser_list,
+                           perform_param=perform_param)
+
+
+def fat_cross_param_row(param_row: np.ndarray, arrival_enum: ArrivalEnum,
+                        number_flows: int, number_servers: int,
+                        perform_param: PerformParameter,
+                        opt_method: OptMethod,
+                        target_util: float,
+                        cache: Optional[ResultCache] = None) -> np.ndarray:
+    """Computes standard_bound and h_mit_bound for one parameter row."""
+    res_row = np.empty(2)
+
+    fat_cross_setting = fat_cross_from_array(param_array=param_row,
+                                             arrival_enum=arrival_enum,
+                                             number_flows=number_flows,
+                                             number_servers=number_servers,
+                                             perform_param=perform_param)
+
+    computation_necessary = True
+
+    if target_util > 0.0:
+        util = fat_cross_setting.approximate_utilization()
+        if util < target_util or util > 1:
+            res_row[:] = np.nan
+            computation_necessary = False
+
+    if computation_necessary:
+        # standard_bound, h_mit_bound = compare_mitigator()
+        res_row[0], res_row[1] = compare_mitigator(
+            setting=fat_cross_setting,
+            opt_method=opt_method,
+            number_l=number_servers - 1,
+            cache=cache)
+
+        if (perform_param.perform_metric == PerformEnum.DELAY_PROB
+                and res_row[1] > 1.0):
+            # write as nan if second (in particular both) value(s) are > 1.0
+            res_row[:] = np.nan
+
+    if np.isnan(res_row[0]) or np.isnan(res_row[1]):
+        res_row[:] = np.nan
+
+    return res_row
+
+
+def fat_cross_param_batch(param_array: np.ndarray, arrival_enum: ArrivalEnum,
+                          number_flows: int, number_servers: int,
+                          perform_param: PerformParameter,
+                          opt_method: OptMethod,
+                          row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Same as fat_cross_param_row for all rows, the optimizations of the
+    rows run in lock step (see BatchOptimize).
+
+    :param row_mask: if given, rows where it is False are nan
+    """
+    res_array = np.full([param_array.shape[0], 2], np.nan)
+    rows = np.arange(param_array.shape[0])
+    if row_mask is not None:
+        rows = rows[row_mask]
+
+    if rows.shape[0] == 0:
+        return res_array
+
+    fat_cross_setting = fat_cross_from_array(param_array=param_array[rows],
+                                             arrival_enum=arrival_enum,
+                                             number_flows=number_flows,
+                                             number_servers=number_servers,
+                                             perform_param=perform_param)
+
+    res_array[rows, 0], res_array[rows, 1] = compare_mitigator_batch(
+        setting=fat_cross_setting,
+        opt_method=opt_method,
+        number_l=number_servers - 1)
+
+    if perform_param.perform_metric == PerformEnum.DELAY_PROB:
+        # write as nan if second (in particular both) value(s) are > 1.0
+        res_array[res_array[:, 1] > 1.0] = np.nan
+
+    res_array[np.isnan(res_array).any(axis=1)] = np.nan
+
+    return res_array
+
+
 def csv_fat_cross_param_power(name: str, arrival_enum: ArrivalEnum,
                               number_flows: int, number_servers: int,
                               perform_param: PerformParameter,
                               opt_method: OptMethod, mc_dist: MonteCarloDist,
                               compare_metric: ChangeEnum,
                               total_iterations: int,
-                              target_util: float) -> dict:
-    """Chooses parameters by Monte Carlo type random choice."""
-    param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
-                                  mc_dist=mc_dist,
-                                  number_flows=number_flows,
-                                  number_servers=number_servers,
-                                  total_iterations=total_iterations)
-
-    res_array = np.empty([total_iterations, 2])
-
-    # print(res_array)
-
-    for i in tqdm(range(total_iterations), total=total_iterations):
-        if arrival_enum == ArrivalEnum.DM1:
-            arr_list = [
-                DM1(lamb=param_array[i, j]) for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.DGamma1:
-            arr_list = [
-                DGamma1(alpha_shape=param_array[i, j],
-                        beta_rate=param_array[i, number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.DWeibull1:
-            arr_list = [
-                DWeibull1(lamb=param_array[i, j]) for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MD1:
-            arr_list = [
-                MD1(lamb=param_array[i, j], mu=1.0)
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOODisc:
-            arr_list = [
-                MMOODisc(stay_on=param_array[i, j],
-                         stay_off=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOOFluid:
-            arr_list = [
-                MMOOCont(mu=param_array[i, j],
-                         lamb=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.Massoulie:
-            arr_list = [
-                LeakyBucketMassoulie(sigma_single=param_array[i, j],
-                                     rho_single=param_array[i,
-                                                            number_flows + j],
-                                     m=20) for j in range(number_flows)
-            ]
-            # NOTE: n is fixed
-
-        elif arrival_enum == ArrivalEnum.TBConst:
-            arr_list = [
-                DetermTokenBucket(sigma_single=param_array[i, j],
-                                  rho_single=param_array[i, number_flows + j],
-                                  m=1) for j in range(number_flows)
-            ]
-
-        else:
-            raise NotImplementedError(f"Arrival parameter {arrival_enum.name} "
-                                      f"is infeasible")
-
-        ser_list = [
-            ConstantRateServer(
-                rate=param_array[i,
-                                 arrival_enum.number_parameters() *
-                                 number_flows + j])
-            for j in range(number_servers)
-        ]
+                              target_util: float,
+                              number_processes=1,
+                              checkpoint_dir: Optional[str] = None,
+                              cache_path: Optional[str] = None,
+                              condition_util=False,
+                              seed: Optional[int] = None,
+                              batch_optimize=False) -> dict:
+    """
+    Chooses parameters by Monte Carlo type random choice.
+
+    :param number_processes: number of worker processes for the rows
+    :param checkpoint_dir:   if given, the parameters and finished rows are
+                             stored there and a rerun resumes from them
+    :param cache_path:       if given, optimization results are stored in
+                             this database and reused by later runs
+    :param condition_util:   if True, the server rates are rescaled such that
+                             the utilization is uniform in [target_util, 1)
+    :param seed:             if given, the parameters are drawn from
+                             reproducible per-chunk streams of this seed
+    :param batch_optimize:   if True, all rows are optimized in lock step
+                             (pattern search or Nelder-Mead only, the
+                             checkpoint and the cache are not used)
+    """
+    filename = name
+    filename += f"_results_{perform_param.to_name()}_{arrival_enum.name}_" \
+                f"MC{mc_dist.to_name()}_{opt_method.name}_" \
+                f"{compare_metric.name}_util_{target_util}"
 
-        fat_cross_setting = FatCrossPerform(arr_list=arr_list,
-                                            ser_list=ser_list,
-                                            perform_param=perform_param)
+    if condition_util:
+        filename += "_condition_util"
 
-        computation_necessary = True
+    if seed is not None:
+        filename += f"_seed_{seed}"
 
-        if target_util > 0.0:
-            util = fat_cross_setting.approximate_utilization()
-            if util < target_util or util > 1:
-                res_array[i, ] = np.nan
-                computation_necessary = False
-
-        if computation_necessary:
-            # standard_bound, h_mit_bound = compare_mitigator()
-            res_array[i, 0], res_array[i, 1] = compare_mitigator(
-                setting=fat_cross_setting,
-                opt_method=opt_method,
-                number_l=number_servers - 1)
-
-            if (perform_param.perform_metric == PerformEnum.DELAY_PROB
-                    and res_array[i, 1] > 1.0):
-                # write as nan if second (in particular both) value(s) are > 1.0
-                res_array[i, ] = np.nan
-
-        if np.isnan(res_array[i, 0]) or np.isnan(res_array[i, 1]):
-            res_array[i, ] = np.nan
+    def draw() -> np.ndarray:
+        if seed is None:
+            condition_rng = None
+            param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
+                                          mc_dist=mc_dist,
+                                          number_flows=number_flows,
+                                          number_servers=number_servers,
+                                          total_iterations=total_iterations)
+        else:
+            draw_seed, condition_seed = np.random.SeedSequence(seed).spawn(2)
+            condition_rng = np.random.default_rng(condition_seed)
+            param_array = mc_enum_to_dist_chunks(
+                arrival_enum=arrival_enum,
+                mc_dist=mc_dist,
+                number_flows=number_flows,
+                number_servers=number_servers,
+                total_iterations=total_iterations,
+                seed_sequence=draw_seed)
+
+        if condition_util:
+            batch_setting = fat_cross_from_array(param_array=param_array,
+                                                 arrival_enum=arrival_enum,
+                                                 number_flows=number_flows,
+                                                 number_servers=number_servers,
+                                                 perform_param=perform_param)
+            param_array = rescale_server_rates(
+                param_array=param_array,
+                util=batch_setting.approximate_utilization(),
+                target_util=target_util,
+                number_servers=number_servers,
+                rng=condition_rng)
+
+        return param_array
+
+    if checkpoint_dir is None:
+        checkpoint = None
+        param_array = draw()
+    else:
+        checkpoint = Checkpoint(directory=run_directory(
+            checkpoint_dir=checkpoint_dir,
+            filename=filename,
+            mc_dist=mc_dist,
+            flows=number_flows,
+            servers=number_servers,
+            iter=total_iterations))
+        param_array = checkpoint.param_array(
+            draw=draw,
+            shape=param_array_shape(arrival_enum=arrival_enum,
+                                    number_flows=number_flows,
+                                    number_servers=number_servers,
+                                    total_iterations=total_iterations))
+
+    if target_util > 0.0:
+        # discard rows of the wrong utilization before the loop
+        batch_setting = fat_cross_from_array(param_array=param_array,
+                                             arrival_enum=arrival_enum,
+                                             number_flows=number_flows,
+                                             number_servers=number_servers,
+                                             perform_param=perform_param)
+        row_mask = utilization_mask(
+            util=batch_setting.approximate_utilization(),
+            target_util=target_util)
+    else:
+        row_mask = None
+
+    row_function = partial(fat_cross_param_row,
+                           arrival_enum=arrival_enum,
+                           number_flows=number_flows,
+                           number_servers=number_servers,
+                           perform_param=perform_param,
+                           opt_method=opt_method,
+                           target_util=0.0,
+                           cache=None if cache_path is None else ResultCache(path=cache_path))
+
+    if batch_optimize:
+        res_array = fat_cross_param_batch(param_array=param_array,
+                                          arrival_enum=arrival_enum,
+                                          number_flows=number_flows,
+                                          number_servers=number_servers,
+                                          perform_param=perform_param,
+                                          opt_method=opt_method,
+                                          row_mask=row_mask)
+    else:
+        res_array = evaluate_rows(row_function=row_function,
+                                  param_array=param_array,
+                                  number_columns=2,
+                                  number_processes=number_processes,
+                                  checkpoint=checkpoint,
+                                  row_mask=row_mask)
 
     res_array_no_full_nan = remove_full_nan_rows(full_array=res_array)
     valid_iterations = res_array_no_full_nan.shape[0]
@@ -149,6 +275,13 @@ def csv_fat_cross_param_power(name: str, arrival_enum: ArrivalEnum,
         if valid_iterations < 100:
             raise NotEnoughResults("result is useless")
 
+    # raw results allow another summary without recomputation
+    save_raw_results(filename=filename,
+                     param_array=param_array,
+                     res_array=res_array,
+                     arrival_enum=arrival_enum.name,
+                     number_servers=number_servers)
+
     res_dict = two_col_array_to_results(arrival_enum=arrival_enum,
                                         param_array=param_array,
                                         res_array=res_array,
@@ -162,13 +295,147 @@ def csv_fat_cross_param_power(name: str, arrival_enum: ArrivalEnum,
         "compare_metric": compare_metric.name,
         "MCDistribution": mc_dist.to_name(),
         "MCParam": mc_dist.param_to_string(),
-        "number_servers": number_servers
+        "number_servers": number_servers,
+        "condition_util": condition_util
     })
 
+    with open(filename + ".csv", 'w') as csv_file:
+        writer = csv.writer(csv_file)
+        for key, value in res_dict.items():
+            writer.writerow([key, value])
+
+    return res_dict
+
+
+def csv_fat_cross_param_power_stream(name: str, arrival_enum: ArrivalEnum,
+                                     number_flows: int, number_servers: int,
+                                     perform_param: PerformParameter,
+                                     opt_method: OptMethod,
+                                     mc_dist: MonteCarloDist,
+                                     compare_metric: ChangeEnum,
+                                     total_iterations: int,
+                                     target_util: float,
+                                     number_processes=1,
+                                     cache_path: Optional[str] = None,
+                                     condition_util=False,
+                                     seed: Optional[int] = None,
+                                     chunks_per_step=100,
+                                     batch_optimize=False) -> dict:
+    """
+    Same as csv_fat_cross_param_power, but parameters are drawn and
+    evaluated step by step and only the summary statistics are kept
+    (the median is a P-square estimate). Hence, the memory does not grow
+    with total_iterations. Without conditioning, the rows are the same as
+    in csv_fat_cross_param_power with the same seed.
+
+    :param chunks_per_step: number of chunks (of CHUNK_SIZE rows) per step
+    :param batch_optimize: if True, the rows of a step are optimized in lock
+                           step (see csv_fat_cross_param_power)
+    """
     filename = name
     filename += f"_results_{perform_param.to_name()}_{arrival_enum.name}_" \
                 f"MC{mc_dist.to_name()}_{opt_method.name}_" \
-                f"{compare_metric.name}_util_{target_util}"
+                f"{compare_metric.name}_util_{target_util}_stream"
+
+    if condition_util:
+        filename += "_condition_util"
+
+    if seed is not None:
+        filename += f"_seed_{seed}"
+
+    draw_seed, condition_seed = np.random.SeedSequence(seed).spawn(2)
+
+    row_function = partial(fat_cross_param_row,
+                           arrival_enum=arrival_enum,
+                           number_flows=number_flows,
+                           number_servers=number_servers,
+                           perform_param=perform_param,
+                           opt_method=opt_method,
+                           target_util=0.0,
+                           cache=None if cache_path is None else ResultCache(path=cache_path))
+
+    stats = StreamingImprovement(compare_metric=compare_metric)
+    number_chunks = -(-total_iterations // CHUNK_SIZE)
+
+    for first_chunk in range(0, number_chunks, chunks_per_step):
+        param_chunk = mc_enum_to_dist_chunks(
+            arrival_enum=arrival_enum,
+            mc_dist=mc_dist,
+            number_flows=number_flows,
+            number_servers=number_servers,
+            total_iterations=total_iterations,
+            seed_sequence=draw_seed,
+            chunk_indices=range(first_chunk,
+                                min(first_chunk + chunks_per_step,
+                                    number_chunks)))
+
+        if target_util > 0.0:
+            batch_setting = fat_cross_from_array(param_array=param_chunk,
+                                                 arrival_enum=arrival_enum,
+                                                 number_flows=number_flows,
+                                                 number_servers=number_servers,
+                                                 perform_param=perform_param)
+
+            if condition_util:
+                param_chunk = rescale_server_rates(
+                    param_array=param_chunk,
+                    util=batch_setting.approximate_utilization(),
+                    target_util=target_util,
+                    number_servers=number_servers,
+                    rng=chunk_rng(seed_sequence=condition_seed,
+                                  chunk_index=first_chunk))
+                batch_setting = fat_cross_from_array(
+                    param_array=param_chunk,
+                    arrival_enum=arrival_enum,
+                    number_flows=number_flows,
+                    number_servers=number_servers,
+                    perform_param=perform_param)
+
+            row_mask = utilization_mask(
+                util=batch_setting.approximate_utilization(),
+                target_util=target_util,
+                report=False)
+        else:
+            row_mask = None
+
+        if batch_optimize:
+            res_chunk = fat_cross_param_batch(param_array=param_chunk,
+                                              arrival_enum=arrival_enum,
+                                              number_flows=number_flows,
+                                              number_servers=number_servers,
+                                              perform_param=perform_param,
+                                              opt_method=opt_method,
+                                              row_mask=row_mask)
+        else:
+            res_chunk = evaluate_rows(row_function=row_function,
+                                      param_array=param_chunk,
+                                      number_columns=2,
+                                      number_processes=number_processes,
+                                      row_mask=row_mask)
+
+        stats.update(param_chunk=param_chunk, res_chunk=res_chunk)
+
+    if stats.valid_iterations < total_iterations * 0.2:
+        warn(f"Many nan's: {total_iterations - stats.valid_iterations} nans "
+             f"out of {total_iterations}!")
+
+        if stats.valid_iterations < 100:
+            raise NotEnoughResults("result is useless")
+
+    res_dict = two_col_stream_to_results(arrival_enum=arrival_enum,
+                                         stats=stats,
+                                         number_servers=number_servers)
+
+    res_dict.update({
+        "iterations": total_iterations,
+        "PerformParamValue": perform_param.value,
+        "optimization": opt_method.name,
+        "compare_metric": compare_metric.name,
+        "MCDistribution": mc_dist.to_name(),
+        "MCParam": mc_dist.param_to_string(),
+        "number_servers": number_servers,
+        "condition_util": condition_util
+    })
 
     with open(filename + ".csv", 'w') as csv_file:
         writer = csv.writer(csv_file)
@@ -1,19 +1,20 @@
 """Compute average computation time for different parameters."""
 
 import csv
-from typing import List
+from functools import partial
+from typing import List, Optional
 
 import numpy as np
+from bound_evaluation.checkpoint import Checkpoint, run_directory
+from bound_evaluation.mc_array_to_processes import (arrivals_from_array,
+                                                    servers_from_array)
 from bound_evaluation.mc_enum import MCEnum
-from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist
+from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist, param_array_shape
 from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import evaluate_rows
 from nc_arrivals.arrival_enum import ArrivalEnum
-from nc_arrivals.iid import DM1
-from nc_arrivals.markov_modulated import MMOOCont
 from nc_operations.perform_enum import PerformEnum
-from nc_server.constant_rate_server import ConstantRateServer
 from optimization.opt_method import OptMethod
-from tqdm import tqdm  # Progressbar in for loop
 from utils.perform_parameter import PerformParameter
 
 from h_mitigator.array_to_results import time_array_to_results
@@ -25,71 +26,100 @@ from h_mitigator.fat_cross_perform import FatCrossPerform
 ########################################################################
 
 
+def fat_cross_time_row(param_row: np.ndarray, arrival_enum: ArrivalEnum,
+                       number_servers: int, perform_param: PerformParameter,
+                       opt_method: OptMethod,
+                       target_util: float) -> np.ndarray:
+    """Measures the computation times for one parameter row."""
+    time_row = np.empty(2)
+
+    arrive_list = arrivals_from_array(arrival_enum=arrival_enum,
+                                      param_array=param_row,
+                                      number_flows=number_servers)
+    service_list = servers_from_array(arrival_enum=arrival_enum,
+                                      param_array=param_row,
+                                      number_flows=number_servers,
+                                      number_servers=number_servers)
+
+    fat_cross_setting = FatCrossPerform(arr_list=arrive_list,
+                                        ser_list=service_list,
+                                        perform_param=perform_param)
+
+    if target_util > 0.0:
+        util = fat_cross_setting.approximate_utilization()
+        if util < target_util or util > 1:
+            time_row[:] = np.nan
+            return time_row
+
+    # time_standard, time_lyapunov = compare_time()
+    time_row[0], time_row[1] = compare_time(setting=fat_cross_setting,
+                                            opt_method=opt_method,
+                                            number_l=number_servers - 1)
+
+    return time_row
+
+
 def csv_fat_cross_time(arrival_enum: ArrivalEnum,
                        list_number_servers: List[int],
-                       perform_param: PerformParameter, opt_method: OptMethod,
-                       mc_dist: MonteCarloDist, target_util: float) -> dict:
-    """Chooses parameters by Monte Carlo type random choice."""
+                       perform_param: PerformParameter,
+                       opt_method: OptMethod,
+                       mc_dist: MonteCarloDist,
+                       target_util: float,
+                       checkpoint_dir: Optional[str] = None) -> dict:
+    """
+    Chooses parameters by Monte Carlo type random choice.
+
+    :param checkpoint_dir: if given, the parameters and finished rows are
+                           stored there and a rerun resumes from them
+    """
     total_iterations = 10**5
 
+    filename = (f"time_{perform_param.to_name()}_{arrival_enum.name}"
+                f"_{opt_method.name}")
+
     time_ratio = {"Number_of_servers": "Ratio"}
 
     for number_servers in list_number_servers:
         print(f"number of servers = {number_servers}")
         # 1 Parameter for service
 
-        param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
-                                      mc_dist=mc_dist,
-                                      number_flows=number_servers,
-                                      number_servers=number_servers,
-                                      total_iterations=total_iterations)
-
-        time_array = np.empty([total_iterations, 2])
-
-        for i in tqdm(range(total_iterations)):
-            if arrival_enum == ArrivalEnum.DM1:
-                arrive_list = [
-                    DM1(lamb=param_array[i, j]) for j in range(number_servers)
-                ]
-            elif arrival_enum == ArrivalEnum.MMOOFluid:
-                arrive_list = [
-                    MMOOCont(mu=param_array[i, j],
-                             lamb=param_array[i, number_servers + j],
-                             peak_rate=param_array[i, 2 * number_servers + j])
-                    for j in range(number_servers)
-                ]
-
-            else:
-                raise NotImplementedError(f"Arrival parameter "
-                                          f"{arrival_enum.name} is infeasible")
-
-            service_list = [
-                ConstantRateServer(
-                    rate=param_array[i,
-                                     arrival_enum.number_parameters() *
-                                     number_servers + j])
-                for j in range(number_servers)
-            ]
-
-            fat_cross_setting = FatCrossPerform(arr_list=arrive_list,
-                                                ser_list=service_list,
-                                                perform_param=perform_param)
-
-            computation_necessary = True
-
-            # print(res_array[i, ])
-            if target_util > 0.0:
-                util = fat_cross_setting.approximate_utilization()
-                if util < target_util or util > 1:
-                    time_array[i, ] = np.nan
-                    computation_necessary = False
-
-            if computation_necessary:
-                # time_standard, time_lyapunov = compare_time()
-                time_array[i, 0], time_array[i, 1] = compare_time(
-                    setting=fat_cross_setting,
-                    opt_method=opt_method,
-                    number_l=number_servers - 1)
+        draw = partial(mc_enum_to_dist,
+                       arrival_enum=arrival_enum,
+                       mc_dist=mc_dist,
+                       number_flows=number_servers,
+                       number_servers=number_servers,
+                       total_iterations=total_iterations)
+
+        if checkpoint_dir is None:
+            checkpoint = None
+            param_array = draw()
+        else:
+            checkpoint = Checkpoint(directory=run_directory(
+                checkpoint_dir=checkpoint_dir,
+                filename=f"{filename}_MC{mc_dist.to_name()}_util_{target_util}",
+                mc_dist=mc_dist,
+                flows=number_servers,
+                servers=number_servers,
+                iter=total_iterations))
+            param_array = checkpoint.param_array(
+                draw=draw,
+                shape=param_array_shape(arrival_enum=arrival_enum,
+                                        number_flows=number_servers,
+                                        number_servers=number_servers,
+                                        total_iterations=total_iterations))
+
+        row_function = partial(fat_cross_time_row,
+                               arrival_enum=arrival_enum,
+                               number_servers=number_servers,
+                               perform_param=perform_param,
+                               opt_method=opt_method,
+                               target_util=target_util)
+
+        # timings are not measured in parallel
+        time_array = evaluate_rows(row_function=row_function,
+                                   param_array=param_array,
+                                   number_columns=2,
+                                   checkpoint=checkpoint)
 
         print(
             time_array_to_results(arrival_enum=arrival_enum,
@@ -97,10 +127,7 @@ def csv_fat_cross_time(arrival_enum: ArrivalEnum,
                                   number_servers=number_servers,
                                   time_ratio=time_ratio))
 
-    filename = (f"time_{perform_param.to_name()}_{arrival_enum.name}"
-                f"_{opt_method.name}.csv")
-
-    with open(filename, 'w') as csv_file:
+    with open(filename + ".csv", 'w') as csv_file:
         writer = csv.writer(csv_file)
         for key, value in time_ratio.items():
             writer.writerow([key, value])
@@ -1,10 +1,14 @@
 """Implements new Lyapunov Deconvolution"""
 
 from math import exp, log
+from typing import Tuple
+
+import numpy as np
 
 from nc_arrivals.arrival import Arrival
 from nc_server.server import Server
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import intersect_domains, is_array, mask_infeasible, scale_domain
 
 
 class DeconvolvePowerMit(Arrival):
@@ -15,7 +19,10 @@ class DeconvolvePowerMit(Arrival):
         self.ser = ser
         self.l_power = l_power
 
-        if self.l_power < 1.0:
+        if is_array(self.l_power):
+            # one l per Monte Carlo row (see BatchOptimize)
+            self.l_power = np.maximum(self.l_power, 1.0)
+        elif self.l_power < 1.0:
             self.l_power = 1.0
             # raise ParameterOutOfBounds("l must be >= 1")
 
@@ -23,6 +30,17 @@ class DeconvolvePowerMit(Arrival):
         # here, theta can simply be replaced by l * theta
         l_theta = self.l_power * theta
 
+        if is_array(l_theta):
+            arr_rho_l = self.arr.rho(l_theta)
+            ser_rho_l = self.ser.rho(l_theta)
+            with np.errstate(all="ignore"):
+                k_sig = -np.log(1 - np.exp(l_theta * (arr_rho_l - ser_rho_l))) / l_theta
+                res = self.arr.sigma(l_theta) + self.ser.sigma(l_theta) + k_sig
+
+                if not self.arr.is_discrete():
+                    res = res + arr_rho_l
+            return mask_infeasible(res, feasible=arr_rho_l < ser_rho_l)
+
         k_sig = -log(
             1 - exp(l_theta *
                     (self.arr.rho(l_theta) - self.ser.rho(l_theta)))) / l_theta
@@ -37,6 +55,11 @@ class DeconvolvePowerMit(Arrival):
         # here, theta can simply be replaced by l * theta
         l_theta = self.l_power * theta
 
+        if is_array(l_theta):
+            arr_rho_l = self.arr.rho(l_theta)
+            ser_rho_l = self.ser.rho(l_theta)
+            return mask_infeasible(arr_rho_l, feasible=(arr_rho_l >= 0) & (ser_rho_l >= 0) & (arr_rho_l < ser_rho_l))
+
         if self.arr.rho(l_theta) < 0 or self.ser.rho(l_theta) < 0:
             raise ParameterOutOfBounds("Check rho's sign")
 
@@ -46,5 +69,29 @@ class DeconvolvePowerMit(Arrival):
 
         return self.arr.rho(l_theta)
 
+    def d_sigma(self, theta: float) -> float:
+        # chain rule with l_theta = l * theta
+        l_theta = self.l_power * theta
+        d_arr_rho_l = self.arr.d_rho(l_theta)
+
+        rho_diff = self.arr.rho(l_theta) - self.ser.rho(l_theta)
+        exp_x = np.exp(l_theta * rho_diff)
+        d_x = rho_diff + l_theta * (d_arr_rho_l - self.ser.d_rho(l_theta))
+        d_k_sig = exp_x * d_x / ((1 - exp_x) * l_theta) + np.log(1 - exp_x) / l_theta**2
+
+        res = self.arr.d_sigma(l_theta) + self.ser.d_sigma(l_theta) + d_k_sig
+
+        if not self.arr.is_discrete():
+            res = res + d_arr_rho_l
+
+        return self.l_power * res
+
+    def d_rho(self, theta: float) -> float:
+        return self.l_power * self.arr.d_rho(self.l_power * theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.arr.theta_domain(), self.l_power),
+                                  scale_domain(self.ser.theta_domain(), self.l_power)])
+
     def is_discrete(self):
         return self.arr.is_discrete()
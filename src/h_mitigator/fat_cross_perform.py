@@ -1,6 +1,6 @@
 """Fat tree topology."""
 
-from typing import List
+from typing import List, Tuple
 
 from h_mitigator.deconvolve_power_mit import DeconvolvePowerMit
 from h_mitigator.setting_mitigator import SettingMitigator
@@ -8,10 +8,11 @@ from nc_arrivals.arrival import Arrival
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_operations.aggregate import AggregateList
 from nc_operations.arb_scheduling import LeftoverARB
-from nc_operations.single_hop_bound import single_hop_bound
+from nc_operations.single_hop_bound import d_log_single_hop_bound, single_hop_bound
 from nc_operations.deconvolve import Deconvolve
 from nc_server.server import Server
 from nc_server.server_distribution import ServerDistribution
+from utils.helper_functions import intersect_domains
 from utils.perform_parameter import PerformParameter
 
 
@@ -30,9 +31,7 @@ class FatCrossPerform(SettingMitigator):
 
         self.number_servers = len(ser_list)
 
-    def standard_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
-
+    def _standard_s_e2e(self) -> Server:
         output_list: List[Arrival] = [
             Deconvolve(arr=self.arr_list[i], ser=self.ser_list[i])
             for i in range(1, self.number_servers)
@@ -42,14 +41,25 @@ class FatCrossPerform(SettingMitigator):
         aggregated_cross: Arrival = AggregateList(arr_list=output_list,
                                                   indep=True,
                                                   p_list=[])
-        s_e2e: Server = LeftoverARB(ser=self.ser_list[0],
-                                    cross_arr=aggregated_cross)
+
+        return LeftoverARB(ser=self.ser_list[0], cross_arr=aggregated_cross)
+
+    def standard_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
 
         return single_hop_bound(foi=self.arr_list[0],
-                                s_e2e=s_e2e,
+                                s_e2e=self._standard_s_e2e(),
                                 theta=theta,
                                 perform_param=self.perform_param)
 
+    def d_log_standard_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+
+        return d_log_single_hop_bound(foi=self.arr_list[0],
+                                      s_e2e=self._standard_s_e2e(),
+                                      theta=theta,
+                                      perform_param=self.perform_param)
+
     def h_mit_bound(self, param_l_list: List[float]) -> float:
         output_list: List[Arrival] = [
             DeconvolvePowerMit(arr=self.arr_list[i],
@@ -83,6 +93,9 @@ class FatCrossPerform(SettingMitigator):
 
         return sum_average_rates / self.ser_list[0].average_rate()
 
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([process.theta_domain() for process in self.arr_list + self.ser_list])
+
     def to_string(self) -> str:
         for arr in self.arr_list:
             print(arr.to_value())
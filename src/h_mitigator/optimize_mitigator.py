@@ -6,6 +6,7 @@ from typing import List
 import numpy as np
 
 from h_mitigator.setting_mitigator import SettingMitigator
+from optimization.batch_optimize import BatchOptimize
 from optimization.initial_simplex import InitialSimplex
 from optimization.nelder_mead_parameters import NelderMeadParameters
 from optimization.optimize import Optimize
@@ -33,6 +34,23 @@ class OptimizeMitigator(Optimize):
             return inf
 
 
+class BatchOptimizeMitigator(BatchOptimize):
+    """Optimize theta and all Lyapunov l's of all Monte Carlo rows at once"""
+    def __init__(self, setting_h_mit: SettingMitigator,
+                 number_param: int) -> None:
+        super().__init__(setting=setting_h_mit, number_param=number_param)
+        self.setting_h_mit = setting_h_mit
+
+    def bound(self, setting: SettingMitigator,
+              param_list: List[np.ndarray]) -> np.ndarray:
+        """
+        :param setting:    batched setting (possibly restricted to some rows)
+        :param param_list: theta parameter and Lyapunov parameters l_i
+        :return:           element-wise evaluated h_mit_bound
+        """
+        return setting.h_mit_bound(param_l_list=param_list)
+
+
 if __name__ == '__main__':
     from h_mitigator.fat_cross_perform import FatCrossPerform
     from utils.perform_parameter import PerformParameter
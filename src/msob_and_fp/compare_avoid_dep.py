@@ -21,17 +21,20 @@ def compare_avoid_dep_211(
     two_param_bounds = [(0.1, 10.0), (1.1, 10.0)]
 
     standard_bound = Optimize(setting=setting, number_param=2).grid_search(
-        grid_bounds=two_param_bounds, delta=delta_val).obj_value
+        grid_bounds=two_param_bounds, delta=delta_val,
+        vectorized=True).obj_value
 
     server_bound = OptimizeServerBound(setting_msob_fp=setting,
                                        number_param=1).grid_search(
                                            grid_bounds=one_param_bounds,
-                                           delta=delta_val).obj_value
+                                           delta=delta_val,
+                                           vectorized=True).obj_value
 
     fp_bound = OptimizeFPBound(setting_msob_fp=setting,
                                number_param=1).grid_search(
                                    grid_bounds=one_param_bounds,
-                                   delta=delta_val).obj_value
+                                   delta=delta_val,
+                                   vectorized=True).obj_value
 
     return standard_bound, server_bound, fp_bound
 
@@ -46,17 +49,20 @@ def compare_avoid_dep_212(
     two_param_bounds = [(0.1, 10.0), (1.1, 10.0)]
 
     standard_bound = Optimize(setting=setting, number_param=2).grid_search(
-        grid_bounds=two_param_bounds, delta=delta_val).obj_value
+        grid_bounds=two_param_bounds, delta=delta_val,
+        vectorized=True).obj_value
 
     server_bound = OptimizeServerBound(setting_msob_fp=setting,
                                        number_param=1).grid_search(
                                            grid_bounds=one_param_bounds,
-                                           delta=delta_val).obj_value
+                                           delta=delta_val,
+                                           vectorized=True).obj_value
 
     fp_bound = OptimizeFPBound(setting_msob_fp=setting,
                                number_param=2).grid_search(
                                    grid_bounds=two_param_bounds,
-                                   delta=delta_val).obj_value
+                                   delta=delta_val,
+                                   vectorized=True).obj_value
 
     return standard_bound, server_bound, fp_bound
 
@@ -0,0 +1,82 @@
+"""We compare the runtime of a grid search with and without EvaluationPlan"""
+
+from timeit import default_timer as timer
+from typing import List, Tuple
+
+import numpy as np
+
+from nc_arrivals.iid import DM1
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.single_hop_bound import single_hop_bound
+from nc_server.constant_rate_server import ConstantRateServer
+from utils.exceptions import ParameterOutOfBounds
+from utils.perform_parameter import PerformParameter
+
+from msob_and_fp.overlapping_tandem import OverlappingTandem
+from msob_and_fp.square import Square
+
+
+def uncompiled_bound(setting, param_list: List[float]) -> float:
+    """standard_bound on trees that are built for every call"""
+    foi, *e2e_list = setting._standard_trees(param_list=param_list)
+
+    return min(
+        single_hop_bound(foi=foi, s_e2e=s_e2e, theta=param_list[0], perform_param=setting.perform_param)
+        for s_e2e in e2e_list)
+
+
+def grid_search(bound, theta_grid: np.ndarray, p_grid: np.ndarray) -> float:
+    res = np.inf
+    for theta in theta_grid:
+        for p in p_grid:
+            try:
+                res = min(res, bound([float(theta), float(p)]))
+            except (ParameterOutOfBounds, FloatingPointError, OverflowError):
+                continue
+
+    return res
+
+
+def compare_evaluation_plan(setting, repetitions=3) -> Tuple[float, float]:
+    """Measures the time of a grid search over theta and p with the
+    compiled and the uncompiled trees"""
+    theta_grid = np.arange(0.1, 3.0, 0.1)
+    p_grid = np.arange(1.1, 5.0, 0.1)
+
+    start = timer()
+    for _ in range(repetitions):
+        bound = grid_search(lambda param_list: uncompiled_bound(setting, param_list), theta_grid, p_grid)
+    time_uncompiled = (timer() - start) / repetitions
+
+    start = timer()
+    for _ in range(repetitions):
+        # includes the compilation on the first call
+        compiled_setting = type(setting)(arr_list=setting.arr_list,
+                                         ser_list=setting.ser_list,
+                                         perform_param=setting.perform_param)
+        compiled_bound = grid_search(compiled_setting.standard_bound, theta_grid, p_grid)
+    time_compiled = (timer() - start) / repetitions
+
+    if not np.isclose(compiled_bound, bound):
+        raise ArithmeticError(f"compiled bound {compiled_bound} differs from {bound}")
+
+    return time_uncompiled, time_compiled
+
+
+if __name__ == '__main__':
+    DELAY_PROB = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+
+    TANDEM = OverlappingTandem(arr_list=[DM1(lamb=4.0), DM1(lamb=4.5), DM1(lamb=5.0)],
+                               ser_list=[ConstantRateServer(2.0), ConstantRateServer(3.0), ConstantRateServer(2.5)],
+                               perform_param=DELAY_PROB)
+    SQUARE = Square(arr_list=[DM1(lamb=4.0), DM1(lamb=4.5), DM1(lamb=5.0), DM1(lamb=5.5)],
+                    ser_list=[
+                        ConstantRateServer(2.0), ConstantRateServer(3.0), ConstantRateServer(2.5),
+                        ConstantRateServer(2.8)
+                    ],
+                    perform_param=DELAY_PROB)
+
+    for SETTING in [TANDEM, SQUARE]:
+        TIMES = compare_evaluation_plan(setting=SETTING)
+        print(f"{SETTING.to_name()}: uncompiled {TIMES[0]:.4f}s, compiled {TIMES[1]:.4f}s, "
+              f"speedup {TIMES[0] / TIMES[1]:.1f}")
@@ -1,28 +1,36 @@
 """Compute optimal and average improvement for different parameters."""
 
 import csv
+from functools import partial
 from math import inf
+from typing import Optional
 from warnings import warn
 
 import numpy as np
 from bound_evaluation.change_enum import ChangeEnum
-from bound_evaluation.manipulate_data import remove_full_nan_rows
+from bound_evaluation.checkpoint import Checkpoint, run_directory
+from bound_evaluation.condition_util import rescale_server_rates
+from bound_evaluation.manipulate_data import (remove_full_nan_rows,
+                                              utilization_mask)
+from bound_evaluation.mc_array_to_processes import (arrivals_from_array,
+                                                    servers_from_array)
 from bound_evaluation.mc_enum import MCEnum
-from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist
+from bound_evaluation.mc_enum_to_dist import (mc_enum_to_dist,
+                                               mc_enum_to_dist_chunks,
+                                               param_array_shape)
 from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import evaluate_rows
+from bound_evaluation.raw_results import save_raw_results
 from nc_arrivals.arrival_enum import ArrivalEnum
-from nc_arrivals.iid import DM1, MD1, DGamma1, DWeibull1
-from nc_arrivals.markov_modulated import MMOOCont, MMOODisc
 from nc_operations.perform_enum import PerformEnum
-from nc_server.constant_rate_server import ConstantRateServer
 from optimization.opt_method import OptMethod
-from tqdm import tqdm
 from utils.exceptions import NotEnoughResults
 from utils.perform_parameter import PerformParameter
 
 from msob_and_fp.compare_avoid_dep import compare_avoid_dep_211
 from msob_and_fp.msob_fp_array_to_results import msob_fp_array_to_results
 from msob_and_fp.overlapping_tandem import OverlappingTandem
+from msob_and_fp.setting_msob_fp import SettingMSOBFP
 from msob_and_fp.square import Square
 
 ########################################################################
@@ -30,6 +38,72 @@ from msob_and_fp.square import Square
 ########################################################################
 
 
+def msob_fp_setting(param_array: np.ndarray, name: str, number_flows: int,
+                    number_servers: int, arrival_enum: ArrivalEnum,
+                    perform_param: PerformParameter) -> SettingMSOBFP:
+    """
+    :param param_array: one parameter row, or all rows (batched setting)
+    :return: topology of the given name
+    """
+    arr_list = arrivals_from_array(arrival_enum=arrival_enum,
+                                   param_array=param_array,
+                                   number_flows=number_flows)
+    ser_list = servers_from_array(arrival_enum=arrival_enum,
+                                  param_array=param_array,
+                                  number_flows=number_flows,
+                                  number_servers=number_servers)
+
+    if name == "overlapping_tandem":
+        return OverlappingTandem(arr_list=arr_list,
+                                 ser_list=ser_list,
+                                 perform_param=perform_param)
+
+    elif name == "square":
+        return Square(arr_list=arr_list,
+                      ser_list=ser_list,
+                      perform_param=perform_param)
+
+    else:
+        raise NotImplementedError("this topology is not implemented")
+
+
+def msob_fp_param_row(param_row: np.ndarray, name: str, number_flows: int,
+                      number_servers: int, arrival_enum: ArrivalEnum,
+                      perform_param: PerformParameter, comparator: callable,
+                      target_util: float,
+                      filter_standard_inf=False) -> np.ndarray:
+    """Computes the bounds of the 3 approaches for one parameter row."""
+    res_row = np.empty(3)
+
+    setting = msob_fp_setting(param_array=param_row,
+                              name=name,
+                              number_flows=number_flows,
+                              number_servers=number_servers,
+                              arrival_enum=arrival_enum,
+                              perform_param=perform_param)
+
+    if target_util > 0.0:
+        util = setting.approximate_utilization()
+        if util < target_util or util > 1:
+            res_row[:] = np.nan
+            return res_row
+
+    # standard_bound, server_bound, fp_bound = compare_avoid_dep()
+    res_row[0], res_row[1], res_row[2] = comparator(setting=setting)
+
+    if (perform_param.perform_metric == PerformEnum.DELAY_PROB
+            and np.nanmin(res_row) > 1.0):
+        # np.nanmin(res_row) is the smallest value
+        res_row[:] = np.nan
+    elif np.nanmin(res_row) == inf:
+        res_row[:] = np.nan
+
+    if filter_standard_inf and res_row[0] == inf:
+        res_row[:] = np.nan
+
+    return res_row
+
+
 def csv_msob_fp_param(name: str,
                       number_flows: int,
                       number_servers: int,
@@ -41,104 +115,121 @@ def csv_msob_fp_param(name: str,
                       compare_metric: ChangeEnum,
                       total_iterations: int,
                       target_util: float,
-                      filter_standard_inf=False) -> dict:
-    """Chooses parameters by Monte Carlo type random choice."""
-    param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
-                                  mc_dist=mc_dist,
-                                  number_flows=number_flows,
-                                  number_servers=number_servers,
-                                  total_iterations=total_iterations)
-
-    res_array = np.empty([total_iterations, 3])
-    # 3 approaches to compare
+                      filter_standard_inf=False,
+                      number_processes=1,
+                      checkpoint_dir: Optional[str] = None,
+                      condition_util=False,
+                      seed: Optional[int] = None) -> dict:
+    """
+    Chooses parameters by Monte Carlo type random choice.
+
+    :param number_processes: number of worker processes for the rows
+    :param checkpoint_dir:   if given, the parameters and finished rows are
+                             stored there and a rerun resumes from them
+    :param condition_util:   if True, the server rates are rescaled such that
+                             the utilization is uniform in [target_util, 1)
+    :param seed:             if given, the parameters are drawn from
+                             reproducible per-chunk streams of this seed
+    """
+    filename = name
+    filename += f"_results_{perform_param.to_name()}_{arrival_enum.name}_" \
+        f"MC{mc_dist.to_name()}_{opt_method.name}_" \
+                f"{compare_metric.name}_util_{target_util}"
 
-    for i in tqdm(range(total_iterations), total=total_iterations):
-        if arrival_enum == ArrivalEnum.DM1:
-            arr_list = [
-                DM1(lamb=param_array[i, j]) for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.DGamma1:
-            arr_list = [
-                DGamma1(alpha_shape=param_array[i, j],
-                        beta_rate=param_array[i, number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.DWeibull1:
-            arr_list = [
-                DWeibull1(lamb=param_array[i, j]) for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MD1:
-            arr_list = [
-                MD1(lamb=param_array[i, j], mu=1.0)
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOODisc:
-            arr_list = [
-                MMOODisc(stay_on=param_array[i, j],
-                         stay_off=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOOFluid:
-            arr_list = [
-                MMOOCont(mu=param_array[i, j],
-                         lamb=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
+    if filter_standard_inf:
+        filename += "_filter_standard_inf"
 
-        else:
-            raise NotImplementedError(f"Arrival parameter {arrival_enum.name} "
-                                      f"is infeasible")
-
-        ser_list = [
-            ConstantRateServer(
-                rate=param_array[i,
-                                 arrival_enum.number_parameters() *
-                                 number_flows + j])
-            for j in range(number_servers)
-        ]
-
-        if name == "overlapping_tandem":
-            setting = OverlappingTandem(arr_list=arr_list,
-                                        ser_list=ser_list,
-                                        perform_param=perform_param)
+    if condition_util:
+        filename += "_condition_util"
 
-        elif name == "square":
-            setting = Square(arr_list=arr_list,
-                             ser_list=ser_list,
-                             perform_param=perform_param)
+    if seed is not None:
+        filename += f"_seed_{seed}"
 
+    def draw() -> np.ndarray:
+        if seed is None:
+            condition_rng = None
+            param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
+                                          mc_dist=mc_dist,
+                                          number_flows=number_flows,
+                                          number_servers=number_servers,
+                                          total_iterations=total_iterations)
         else:
-            raise NotImplementedError("this topology is not implemented")
-
-        computation_necessary = True
-
-        if target_util > 0.0:
-            util = setting.approximate_utilization()
-            if util < target_util or util > 1:
-                res_array[i, ] = np.nan
-                computation_necessary = False
-
-        if computation_necessary:
-            # standard_bound, server_bound, fp_bound = compare_avoid_dep()
-            res_array[i, 0], res_array[i, 1], res_array[i, 2] = comparator(
-                setting=setting)
-
-            if (perform_param.perform_metric == PerformEnum.DELAY_PROB
-                    and np.nanmin(res_array[i, ]) > 1.0):
-                # np.nanmin(res_array[i, ]) is the smallest value
-                res_array[i, ] = np.nan
-            elif np.nanmin(res_array[i, ]) == inf:
-                res_array[i, ] = np.nan
+            draw_seed, condition_seed = np.random.SeedSequence(seed).spawn(2)
+            condition_rng = np.random.default_rng(condition_seed)
+            param_array = mc_enum_to_dist_chunks(
+                arrival_enum=arrival_enum,
+                mc_dist=mc_dist,
+                number_flows=number_flows,
+                number_servers=number_servers,
+                total_iterations=total_iterations,
+                seed_sequence=draw_seed)
+
+        if condition_util:
+            batch_setting = msob_fp_setting(param_array=param_array,
+                                            name=name,
+                                            number_flows=number_flows,
+                                            number_servers=number_servers,
+                                            arrival_enum=arrival_enum,
+                                            perform_param=perform_param)
+            param_array = rescale_server_rates(
+                param_array=param_array,
+                util=batch_setting.approximate_utilization(),
+                target_util=target_util,
+                number_servers=number_servers,
+                rng=condition_rng)
+
+        return param_array
+
+    if checkpoint_dir is None:
+        checkpoint = None
+        param_array = draw()
+    else:
+        checkpoint = Checkpoint(directory=run_directory(
+            checkpoint_dir=checkpoint_dir,
+            filename=filename,
+            mc_dist=mc_dist,
+            flows=number_flows,
+            servers=number_servers,
+            iter=total_iterations,
+            comparator=comparator.__name__))
+        param_array = checkpoint.param_array(
+            draw=draw,
+            shape=param_array_shape(arrival_enum=arrival_enum,
+                                    number_flows=number_flows,
+                                    number_servers=number_servers,
+                                    total_iterations=total_iterations))
+
+    if target_util > 0.0:
+        # discard rows of the wrong utilization before the loop
+        batch_setting = msob_fp_setting(param_array=param_array,
+                                        name=name,
+                                        number_flows=number_flows,
+                                        number_servers=number_servers,
+                                        arrival_enum=arrival_enum,
+                                        perform_param=perform_param)
+        row_mask = utilization_mask(
+            util=batch_setting.approximate_utilization(),
+            target_util=target_util)
+    else:
+        row_mask = None
+
+    row_function = partial(msob_fp_param_row,
+                           name=name,
+                           number_flows=number_flows,
+                           number_servers=number_servers,
+                           arrival_enum=arrival_enum,
+                           perform_param=perform_param,
+                           comparator=comparator,
+                           target_util=0.0,
+                           filter_standard_inf=filter_standard_inf)
 
-            if filter_standard_inf and res_array[i, 0] == inf:
-                res_array[i, ] = np.nan
+    # 3 approaches to compare
+    res_array = evaluate_rows(row_function=row_function,
+                              param_array=param_array,
+                              number_columns=3,
+                              number_processes=number_processes,
+                              checkpoint=checkpoint,
+                              row_mask=row_mask)
 
     res_array_no_full_nan = remove_full_nan_rows(full_array=res_array)
     valid_iterations = res_array_no_full_nan.shape[0]
@@ -159,6 +250,14 @@ def csv_msob_fp_param(name: str,
 
     np.savetxt(fname=res_name + ".csv", X=res_array_no_full_nan, delimiter=",")
 
+    # raw results allow another summary without recomputation
+    save_raw_results(filename=filename,
+                     param_array=param_array,
+                     res_array=res_array,
+                     arrival_enum=arrival_enum.name,
+                     number_flows=number_flows,
+                     number_servers=number_servers)
+
     res_dict = msob_fp_array_to_results(title=name,
                                         arrival_enum=arrival_enum,
                                         perform_param=perform_param,
@@ -177,17 +276,10 @@ def csv_msob_fp_param(name: str,
         "optimization": opt_method.name,
         "compare_metric": compare_metric.name,
         "MCDistribution": mc_dist.to_name(),
-        "MCParam": mc_dist.param_to_string()
+        "MCParam": mc_dist.param_to_string(),
+        "condition_util": condition_util
     })
 
-    filename = name
-    filename += f"_results_{perform_param.to_name()}_{arrival_enum.name}_" \
-        f"MC{mc_dist.to_name()}_{opt_method.name}_" \
-                f"{compare_metric.name}_util_{target_util}"
-
-    if filter_standard_inf:
-        filename += "_filter_standard_inf"
-
     with open(filename + ".csv", 'w') as csv_file:
         writer = csv.writer(csv_file)
         for key, value in res_dict.items():
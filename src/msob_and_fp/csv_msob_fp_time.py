@@ -1,19 +1,21 @@
 """Compute optimal and average improvement for different parameters."""
 
 import csv
+from functools import partial
+from typing import Optional
 
 import numpy as np
 from bound_evaluation.change_enum import ChangeEnum
+from bound_evaluation.checkpoint import Checkpoint, run_directory
+from bound_evaluation.mc_array_to_processes import (arrivals_from_array,
+                                                    servers_from_array)
 from bound_evaluation.mc_enum import MCEnum
-from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist
+from bound_evaluation.mc_enum_to_dist import mc_enum_to_dist, param_array_shape
 from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import evaluate_rows
 from nc_arrivals.arrival_enum import ArrivalEnum
-from nc_arrivals.iid import DM1, MD1
-from nc_arrivals.markov_modulated import MMOOCont, MMOODisc
 from nc_operations.perform_enum import PerformEnum
-from nc_server.constant_rate_server import ConstantRateServer
 from optimization.opt_method import OptMethod
-from tqdm import tqdm
 from utils.perform_parameter import PerformParameter
 
 from msob_and_fp.compare_avoid_dep import compare_time_211
@@ -26,91 +28,111 @@ from msob_and_fp.square import Square
 ########################################################################
 
 
-def csv_msob_fp_time(name: str, number_flows: int, number_servers: int,
-                     arrival_enum: ArrivalEnum,
-                     perform_param: PerformParameter, opt_method: OptMethod,
-                     mc_dist: MonteCarloDist, comparator: callable,
-                     total_iterations: int, target_util: float) -> dict:
-    """Chooses parameters by Monte Carlo type random choice."""
+def msob_fp_time_row(param_row: np.ndarray, name: str, number_flows: int,
+                     number_servers: int, arrival_enum: ArrivalEnum,
+                     perform_param: PerformParameter, comparator: callable,
+                     target_util: float) -> np.ndarray:
+    """Measures the computation times of the 3 approaches for one row."""
+    time_row = np.empty(3)
 
-    param_array = mc_enum_to_dist(arrival_enum=arrival_enum,
-                                  mc_dist=mc_dist,
+    arr_list = arrivals_from_array(arrival_enum=arrival_enum,
+                                   param_array=param_row,
+                                   number_flows=number_flows)
+    ser_list = servers_from_array(arrival_enum=arrival_enum,
+                                  param_array=param_row,
                                   number_flows=number_flows,
-                                  number_servers=number_servers,
-                                  total_iterations=total_iterations)
-
-    time_array = np.empty([total_iterations, 3])
-    # 3 approaches to compare
-
-    for i in tqdm(range(total_iterations), total=total_iterations):
-        if arrival_enum == ArrivalEnum.DM1:
-            arr_list = [
-                DM1(lamb=param_array[i, j]) for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MD1:
-            arr_list = [
-                MD1(lamb=param_array[i, j], mu=1.0)
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOODisc:
-            arr_list = [
-                MMOODisc(stay_on=param_array[i, j],
-                         stay_off=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        elif arrival_enum == ArrivalEnum.MMOOFluid:
-            arr_list = [
-                MMOOCont(mu=param_array[i, j],
-                         lamb=param_array[i, number_flows + j],
-                         peak_rate=param_array[i, 2 * number_flows + j])
-                for j in range(number_flows)
-            ]
-
-        else:
-            raise NotImplementedError(f"Arrival parameter {arrival_enum.name} "
-                                      f"is infeasible")
-
-        ser_list = [
-            ConstantRateServer(
-                rate=param_array[i,
-                                 arrival_enum.number_parameters() *
-                                 number_flows + j])
-            for j in range(number_servers)
-        ]
-
-        if name == "overlapping_tandem":
-            setting = OverlappingTandem(arr_list=arr_list,
-                                        ser_list=ser_list,
-                                        perform_param=perform_param)
-        elif name == "square":
-            setting = Square(arr_list=arr_list,
-                             ser_list=ser_list,
-                             perform_param=perform_param)
-
-        else:
-            raise NotImplementedError("this topology is not implemented")
-
-        computation_necessary = True
-
-        if target_util > 0.0:
-            util = setting.approximate_utilization()
-            if util < target_util or util > 1:
-                time_array[i, ] = np.nan
-                computation_necessary = False
-
-        if computation_necessary:
-            # standard_bound, server_bound, fp_bound = compare_avoid_dep()
-            time_array[i, 0], time_array[i, 1], time_array[i, 2] = comparator(
-                setting=setting)
-
-            if (perform_param.perform_metric == PerformEnum.DELAY_PROB
-                    and np.nanmin(time_array[i, ]) > 1.0):
-                # np.nanmin(time_array[i, ]) is the smallest value
-                time_array[i, ] = np.nan
+                                  number_servers=number_servers)
+
+    if name == "overlapping_tandem":
+        setting = OverlappingTandem(arr_list=arr_list,
+                                    ser_list=ser_list,
+                                    perform_param=perform_param)
+    elif name == "square":
+        setting = Square(arr_list=arr_list,
+                         ser_list=ser_list,
+                         perform_param=perform_param)
+
+    else:
+        raise NotImplementedError("this topology is not implemented")
+
+    if target_util > 0.0:
+        util = setting.approximate_utilization()
+        if util < target_util or util > 1:
+            time_row[:] = np.nan
+            return time_row
+
+    # standard_bound, server_bound, fp_bound = compare_avoid_dep()
+    time_row[0], time_row[1], time_row[2] = comparator(setting=setting)
+
+    if (perform_param.perform_metric == PerformEnum.DELAY_PROB
+            and np.nanmin(time_row) > 1.0):
+        # np.nanmin(time_row) is the smallest value
+        time_row[:] = np.nan
+
+    return time_row
+
+
+def csv_msob_fp_time(name: str,
+                     number_flows: int,
+                     number_servers: int,
+                     arrival_enum: ArrivalEnum,
+                     perform_param: PerformParameter,
+                     opt_method: OptMethod,
+                     mc_dist: MonteCarloDist,
+                     comparator: callable,
+                     total_iterations: int,
+                     target_util: float,
+                     checkpoint_dir: Optional[str] = None) -> dict:
+    """
+    Chooses parameters by Monte Carlo type random choice.
+
+    :param checkpoint_dir: if given, the parameters and finished rows are
+                           stored there and a rerun resumes from them
+    """
+    filename = name
+    filename += f"_time_{perform_param.to_name()}_{arrival_enum.name}" \
+        f"_MC{mc_dist.to_name()}_{opt_method.name}_util_{target_util}"
+
+    draw = partial(mc_enum_to_dist,
+                   arrival_enum=arrival_enum,
+                   mc_dist=mc_dist,
+                   number_flows=number_flows,
+                   number_servers=number_servers,
+                   total_iterations=total_iterations)
+
+    if checkpoint_dir is None:
+        checkpoint = None
+        param_array = draw()
+    else:
+        checkpoint = Checkpoint(directory=run_directory(
+            checkpoint_dir=checkpoint_dir,
+            filename=filename,
+            mc_dist=mc_dist,
+            flows=number_flows,
+            servers=number_servers,
+            iter=total_iterations,
+            comparator=comparator.__name__))
+        param_array = checkpoint.param_array(
+            draw=draw,
+            shape=param_array_shape(arrival_enum=arrival_enum,
+                                    number_flows=number_flows,
+                                    number_servers=number_servers,
+                                    total_iterations=total_iterations))
+
+    row_function = partial(msob_fp_time_row,
+                           name=name,
+                           number_flows=number_flows,
+                           number_servers=number_servers,
+                           arrival_enum=arrival_enum,
+                           perform_param=perform_param,
+                           comparator=comparator,
+                           target_util=target_util)
+
+    # 3 approaches to compare, timings are not measured in parallel
+    time_array = evaluate_rows(row_function=row_function,
+                               param_array=param_array,
+                               number_columns=3,
+                               checkpoint=checkpoint)
 
     time_dict = time_array_to_results(title=name, time_array=time_array)
 
@@ -122,10 +144,6 @@ def csv_msob_fp_time(name: str, number_flows: int, number_servers: int,
         "MCParam": mc_dist.param_to_string()
     })
 
-    filename = name
-    filename += f"_time_{perform_param.to_name()}_{arrival_enum.name}" \
-        f"_MC{mc_dist.to_name()}_{opt_method.name}_util_{target_util}"
-
     with open(filename + ".csv", 'w') as csv_file:
         writer = csv.writer(csv_file)
         for key, value in time_dict.items():
@@ -7,6 +7,7 @@ from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_operations.perform_enum import PerformEnum
 from nc_server.constant_rate_server import ConstantRateServer
 from optimization.optimize import Optimize
+from optimization.warm_start_sweep import WarmStartSweep
 from utils.perform_param_list import PerformParamList
 
 from msob_and_fp.optimize_fp_bound import OptimizeFPBound
@@ -17,13 +18,16 @@ from msob_and_fp.overlapping_tandem import OverlappingTandem
 def overlapping_tandem_df(
         arr_list: List[ArrivalDistribution],
         ser_list: List[ConstantRateServer],
-        perform_param_list: PerformParamList) -> pd.DataFrame:
+        perform_param_list: PerformParamList,
+        warm_start=False) -> pd.DataFrame:
     """Compute delay standard_bound for T in T_list and write into dataframe.
 
     Args:
         arr_list: Arrival object list
         ser_list: Service object list
         perform_param_list: list of performance parameter values
+        warm_start: start each optimization at the previous optimum (see
+            WarmStartSweep) instead of a full grid search
 
     Returns:
         dataframe
@@ -38,24 +42,46 @@ def overlapping_tandem_df(
     server_bound = [0.0] * len(perform_param_list)
     fp_bound = [0.0] * len(perform_param_list)
 
+    if warm_start:
+        standard_sweep = WarmStartSweep(grid_bounds=two_param_bounds,
+                                        delta=delta_val,
+                                        vectorized=True)
+        server_sweep = WarmStartSweep(grid_bounds=one_param_bounds,
+                                      delta=delta_val,
+                                      vectorized=True)
+        fp_sweep = WarmStartSweep(grid_bounds=one_param_bounds,
+                                  delta=delta_val,
+                                  vectorized=True)
+
     for i in range(len(perform_param_list)):
         overlapping_tandem_setting = OverlappingTandem(
             arr_list=arr_list,
             ser_list=ser_list,
             perform_param=perform_param_list.get_parameter_at_i(i))
 
-        standard_bound[i] = Optimize(setting=overlapping_tandem_setting,
-                                     number_param=2).grid_search(
-                                         grid_bounds=two_param_bounds,
-                                         delta=delta_val).obj_value
-        server_bound[i] = OptimizeServerBound(
-            setting_msob_fp=overlapping_tandem_setting,
-            number_param=1).grid_search(grid_bounds=one_param_bounds,
-                                        delta=delta_val).obj_value
-        fp_bound[i] = OptimizeFPBound(
-            setting_msob_fp=overlapping_tandem_setting,
-            number_param=1).grid_search(grid_bounds=one_param_bounds,
-                                        delta=delta_val).obj_value
+        standard_optimize = Optimize(setting=overlapping_tandem_setting, number_param=2)
+        server_optimize = OptimizeServerBound(setting_msob_fp=overlapping_tandem_setting,
+                                              number_param=1)
+        fp_optimize = OptimizeFPBound(setting_msob_fp=overlapping_tandem_setting,
+                                      number_param=1)
+
+        if warm_start:
+            standard_bound[i] = standard_sweep.optimize(
+                optimize=standard_optimize).obj_value
+            server_bound[i] = server_sweep.optimize(
+                optimize=server_optimize).obj_value
+            fp_bound[i] = fp_sweep.optimize(optimize=fp_optimize).obj_value
+
+        else:
+            standard_bound[i] = standard_optimize.grid_search(
+                grid_bounds=two_param_bounds, delta=delta_val,
+                vectorized=True).obj_value
+            server_bound[i] = server_optimize.grid_search(
+                grid_bounds=one_param_bounds, delta=delta_val,
+                vectorized=True).obj_value
+            fp_bound[i] = fp_optimize.grid_search(grid_bounds=one_param_bounds,
+                                                  delta=delta_val,
+                                                  vectorized=True).obj_value
 
     results_df = pd.DataFrame(
         {
@@ -50,15 +50,18 @@ def square_adjust_arr_df(list_arr_list: List[List[ArrivalDistribution]],
         standard_bound[i] = Optimize(setting=overlapping_tandem_setting,
                                      number_param=2).grid_search(
                                          grid_bounds=two_param_bounds,
-                                         delta=delta_val).obj_value
+                                         delta=delta_val,
+                                         vectorized=True).obj_value
         server_bound[i] = OptimizeServerBound(
             setting_msob_fp=overlapping_tandem_setting,
             number_param=1).grid_search(grid_bounds=one_param_bounds,
-                                        delta=delta_val).obj_value
+                                        delta=delta_val,
+                                        vectorized=True).obj_value
         fp_bound[i] = OptimizeFPBound(
             setting_msob_fp=overlapping_tandem_setting,
             number_param=2).grid_search(grid_bounds=two_param_bounds,
-                                        delta=delta_val).obj_value
+                                        delta=delta_val,
+                                        vectorized=True).obj_value
 
         utilizations[i] = overlapping_tandem_setting.server_util(
             server_index=server_index)
@@ -3,6 +3,8 @@
 from math import inf
 from typing import List
 
+import numpy as np
+
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from nc_operations.aggregate import AggregateTwo
@@ -10,11 +12,13 @@ from nc_operations.arb_scheduling import LeftoverARB
 from nc_operations.convolve import Convolve
 from nc_operations.deconvolve import Deconvolve
 from nc_operations.e2e_enum import E2EEnum
+from nc_operations.evaluation_plan import EvaluationPlan, ParamRef
 from nc_operations.gps_scheduling import LeftoverGPSPG
 from nc_operations.sfa_tandem_bound import sfa_tandem_bound
 from nc_operations.single_hop_bound import single_hop_bound
 from nc_server.constant_rate_server import ConstantRateServer
 from utils.exceptions import IllegalArgumentError
+from utils.helper_functions import is_array
 from utils.perform_parameter import PerformParameter
 from utils.setting_sfa import SettingSFA
 
@@ -30,12 +34,15 @@ class OverlappingTandem(SettingMSOBFP):
         self.ser_list = ser_list
         self.perform_param = perform_param
 
-    def standard_bound(self, param_list: List[float]) -> float:
-        """conducts a PMOO analysis -> case distinction necessary"""
-        theta = param_list[0]
-        p = param_list[1]
+        # the operator trees are compiled on the first evaluation, p is
+        # inserted by bind()
+        self._standard_plan = EvaluationPlan(build=self._standard_trees)
+        self._server_plan = EvaluationPlan(build=self._server_trees)
+        self._fp_plan = EvaluationPlan(build=self._fp_trees)
 
-        foi = self.arr_list[0]
+    def _standard_trees(self, param_list: List[float]) -> list:
+        """:return: foi and both end-to-end services"""
+        p = ParamRef(1, param_list[1])
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
 
@@ -52,12 +59,6 @@ class OverlappingTandem(SettingMSOBFP):
 
         s_e2e_1 = Convolve(ser1=conv_s1_s2_lo, ser2=s3_lo, indep=False, p=p)
 
-        res_1 = single_hop_bound(foi=foi,
-                                 s_e2e=s_e2e_1,
-                                 theta=theta,
-                                 perform_param=self.perform_param,
-                                 indep=True)
-
         d_2_1 = Deconvolve(arr=a_2, ser=s_1)
         conv_s2_s3_lo = LeftoverARB(ser=Convolve(ser1=LeftoverARB(
             ser=s_2, cross_arr=d_2_1),
@@ -67,18 +68,10 @@ class OverlappingTandem(SettingMSOBFP):
 
         s_e2e_2 = Convolve(ser1=s1_lo, ser2=conv_s2_s3_lo, indep=False, p=p)
 
-        res_2 = single_hop_bound(foi=foi,
-                                 s_e2e=s_e2e_2,
-                                 theta=theta,
-                                 perform_param=self.perform_param,
-                                 indep=True)
-
-        return min(res_1, res_2)
-
-    def server_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
+        return [self.arr_list[0], s_e2e_1, s_e2e_2]
 
-        foi = self.arr_list[0]
+    def _server_trees(self, param_list: List[float]) -> list:
+        """:return: foi and both end-to-end services"""
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
 
@@ -95,12 +88,6 @@ class OverlappingTandem(SettingMSOBFP):
 
         s_e2e_1 = Convolve(ser1=conv_s1_s2_lo, ser2=s3_lo)
 
-        res_1 = single_hop_bound(foi=foi,
-                                 s_e2e=s_e2e_1,
-                                 theta=theta,
-                                 perform_param=self.perform_param,
-                                 indep=True)
-
         d_2_1 = DetermTokenBucket(sigma_single=0.0, rho_single=s_1.rate, m=1)
         conv_s2_s3_lo = LeftoverARB(ser=Convolve(ser1=LeftoverARB(
             ser=s_2, cross_arr=d_2_1),
@@ -110,18 +97,10 @@ class OverlappingTandem(SettingMSOBFP):
 
         s_e2e_2 = Convolve(ser1=s1_lo, ser2=conv_s2_s3_lo)
 
-        res_2 = single_hop_bound(foi=self.arr_list[0],
-                                 s_e2e=s_e2e_2,
-                                 theta=theta,
-                                 perform_param=self.perform_param,
-                                 indep=True)
-
-        return min(res_1, res_2)
-
-    def fp_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
+        return [self.arr_list[0], s_e2e_1, s_e2e_2]
 
-        foi = self.arr_list[0]
+    def _fp_trees(self, param_list: List[float]) -> list:
+        """:return: foi and end-to-end service"""
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
 
@@ -132,7 +111,57 @@ class OverlappingTandem(SettingMSOBFP):
         s_23_conv = Convolve(ser1=s_2, ser2=s_3)
         s_23_lo = LeftoverARB(ser=s_23_conv, cross_arr=a_3)
         s_123_conv = Convolve(ser1=s_1, ser2=s_23_lo)
-        s_e2e = LeftoverARB(ser=s_123_conv, cross_arr=a_2)
+
+        return [self.arr_list[0], LeftoverARB(ser=s_123_conv, cross_arr=a_2)]
+
+    def standard_bound(self, param_list: List[float]) -> float:
+        """conducts a PMOO analysis -> case distinction necessary"""
+        theta = param_list[0]
+        foi, s_e2e_1, s_e2e_2 = self._standard_plan.roots(param_list=param_list)
+
+        res_1 = single_hop_bound(foi=foi,
+                                 s_e2e=s_e2e_1,
+                                 theta=theta,
+                                 perform_param=self.perform_param,
+                                 indep=True)
+
+        res_2 = single_hop_bound(foi=foi,
+                                 s_e2e=s_e2e_2,
+                                 theta=theta,
+                                 perform_param=self.perform_param,
+                                 indep=True)
+
+        if is_array(theta):
+            # as for floats, the bound is infeasible if one branch is
+            return np.where(np.isinf(res_1) | np.isinf(res_2), inf, np.minimum(res_1, res_2))
+
+        return min(res_1, res_2)
+
+    def server_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+        foi, s_e2e_1, s_e2e_2 = self._server_plan.roots(param_list=param_list)
+
+        res_1 = single_hop_bound(foi=foi,
+                                 s_e2e=s_e2e_1,
+                                 theta=theta,
+                                 perform_param=self.perform_param,
+                                 indep=True)
+
+        res_2 = single_hop_bound(foi=foi,
+                                 s_e2e=s_e2e_2,
+                                 theta=theta,
+                                 perform_param=self.perform_param,
+                                 indep=True)
+
+        if is_array(theta):
+            # as for floats, the bound is infeasible if one branch is
+            return np.where(np.isinf(res_1) | np.isinf(res_2), inf, np.minimum(res_1, res_2))
+
+        return min(res_1, res_2)
+
+    def fp_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+        foi, s_e2e = self._fp_plan.roots(param_list=param_list)
 
         return single_hop_bound(foi=foi,
                                 s_e2e=s_e2e,
@@ -153,6 +182,10 @@ class OverlappingTandem(SettingMSOBFP):
         util_s_2 = (foi_rate + a_2_rate + a_3_rate) / c_2
         util_s_3 = (foi_rate + a_3_rate) / c_3
 
+        if is_array(util_s_1):
+            # batched arrivals / servers
+            return np.maximum.reduce([util_s_1, util_s_2, util_s_3])
+
         return max(util_s_1, util_s_2, util_s_3)
 
     def server_util(self, server_index: int) -> float:
@@ -359,6 +392,10 @@ class OverlappingTandemSFAPerform(SettingSFA):
         util_s_2 = (foi_rate + a_2_rate + a_3_rate) / c_2
         util_s_3 = (foi_rate + a_3_rate) / c_3
 
+        if is_array(util_s_1):
+            # batched arrivals / servers
+            return np.maximum.reduce([util_s_1, util_s_2, util_s_3])
+
         return max(util_s_1, util_s_2, util_s_3)
 
     def server_util(self, server_index: int) -> float:
@@ -3,14 +3,18 @@
 from math import inf
 from typing import List
 
+import numpy as np
+
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from nc_operations.arb_scheduling import LeftoverARB
 from nc_operations.deconvolve import Deconvolve
 from nc_operations.convolve import Convolve
+from nc_operations.evaluation_plan import EvaluationPlan, ParamRef
 from nc_operations.single_hop_bound import single_hop_bound
 from nc_server.constant_rate_server import ConstantRateServer
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import is_array
 from utils.perform_parameter import PerformParameter
 
 from msob_and_fp.setting_msob_fp import SettingMSOBFP
@@ -24,10 +28,15 @@ class Square(SettingMSOBFP):
         self.ser_list = ser_list
         self.perform_param = perform_param
 
-    def standard_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
-        p = param_list[1]
+        # the operator trees are compiled on the first evaluation, p is
+        # inserted by bind()
+        self._standard_plan = EvaluationPlan(build=self._standard_trees)
+        self._server_plan = EvaluationPlan(build=self._server_trees)
+        self._fp_plan = EvaluationPlan(build=self._fp_trees)
 
+    def _standard_trees(self, param_list: List[float]) -> list:
+        """:return: foi and end-to-end service"""
+        p = ParamRef(1, param_list[1])
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
         a_4 = self.arr_list[3]
@@ -45,17 +54,10 @@ class Square(SettingMSOBFP):
         s_1_lo = LeftoverARB(ser=s_1, cross_arr=d_3_3)
         s_2_lo = LeftoverARB(ser=s_2, cross_arr=d_4_4)
 
-        s_e2e = Convolve(ser1=s_1_lo, ser2=s_2_lo, indep=False, p=p)
-
-        return single_hop_bound(foi=self.arr_list[0],
-                                s_e2e=s_e2e,
-                                theta=theta,
-                                perform_param=self.perform_param,
-                                indep=True)
-
-    def server_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
+        return [self.arr_list[0], Convolve(ser1=s_1_lo, ser2=s_2_lo, indep=False, p=p)]
 
+    def _server_trees(self, param_list: List[float]) -> list:
+        """:return: foi and both end-to-end services"""
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
         a_4 = self.arr_list[3]
@@ -64,54 +66,30 @@ class Square(SettingMSOBFP):
         s_3 = self.ser_list[2]
         s_4 = self.ser_list[3]
 
-        try:
-            d_3_3 = DetermTokenBucket(sigma_single=0.0,
-                                      rho_single=s_3.rate,
-                                      m=1)
-            d_4_4 = Deconvolve(arr=a_4,
-                               ser=LeftoverARB(ser=s_4,
-                                               cross_arr=Deconvolve(arr=a_2,
-                                                                    ser=s_3)))
-
-            s_1_lo = LeftoverARB(ser=s_1, cross_arr=d_3_3)
-            s_2_lo = LeftoverARB(ser=s_2, cross_arr=d_4_4)
-
-            s_net_1 = Convolve(ser1=s_1_lo, ser2=s_2_lo)
-
-            res_1 = single_hop_bound(foi=self.arr_list[0],
-                                     s_e2e=s_net_1,
-                                     theta=theta,
-                                     perform_param=self.perform_param)
-
-        except ParameterOutOfBounds:
-            res_1 = inf
+        d_3_3 = DetermTokenBucket(sigma_single=0.0, rho_single=s_3.rate, m=1)
+        d_4_4 = Deconvolve(arr=a_4,
+                           ser=LeftoverARB(ser=s_4,
+                                           cross_arr=Deconvolve(arr=a_2,
+                                                                ser=s_3)))
 
-        try:
-            d_3_3 = Deconvolve(arr=a_3,
-                               ser=LeftoverARB(ser=s_3, cross_arr=a_2))
-            d_4_4 = DetermTokenBucket(sigma_single=0.0,
-                                      rho_single=s_4.rate,
-                                      m=1)
+        s_1_lo = LeftoverARB(ser=s_1, cross_arr=d_3_3)
+        s_2_lo = LeftoverARB(ser=s_2, cross_arr=d_4_4)
 
-            s_1_lo = LeftoverARB(ser=s_1, cross_arr=d_3_3)
-            s_2_lo = LeftoverARB(ser=s_2, cross_arr=d_4_4)
+        s_net_1 = Convolve(ser1=s_1_lo, ser2=s_2_lo)
 
-            s_net_2 = Convolve(ser1=s_1_lo, ser2=s_2_lo)
+        d_3_3 = Deconvolve(arr=a_3, ser=LeftoverARB(ser=s_3, cross_arr=a_2))
+        d_4_4 = DetermTokenBucket(sigma_single=0.0, rho_single=s_4.rate, m=1)
 
-            res_2 = single_hop_bound(foi=self.arr_list[0],
-                                     s_e2e=s_net_2,
-                                     theta=theta,
-                                     perform_param=self.perform_param)
+        s_1_lo = LeftoverARB(ser=s_1, cross_arr=d_3_3)
+        s_2_lo = LeftoverARB(ser=s_2, cross_arr=d_4_4)
 
-        except ParameterOutOfBounds:
-            res_2 = inf
+        s_net_2 = Convolve(ser1=s_1_lo, ser2=s_2_lo)
 
-        return min(res_1, res_2)
-
-    def fp_bound(self, param_list: List[float]) -> float:
-        theta = param_list[0]
-        p = param_list[1]
+        return [self.arr_list[0], s_net_1, s_net_2]
 
+    def _fp_trees(self, param_list: List[float]) -> list:
+        """:return: foi and end-to-end service"""
+        p = ParamRef(1, param_list[1])
         a_2 = self.arr_list[1]
         a_3 = self.arr_list[2]
         a_4 = self.arr_list[3]
@@ -129,10 +107,51 @@ class Square(SettingMSOBFP):
         s_12_conv = Convolve(ser1=s_1,
                              ser2=LeftoverARB(ser=s_2, cross_arr=d_4_4))
 
-        s_net = LeftoverARB(ser=s_12_conv, cross_arr=d_3_3, indep=False, p=p)
+        return [self.arr_list[0], LeftoverARB(ser=s_12_conv, cross_arr=d_3_3, indep=False, p=p)]
+
+    def standard_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+        foi, s_e2e = self._standard_plan.roots(param_list=param_list)
 
-        return single_hop_bound(foi=self.arr_list[0],
-                                s_e2e=s_net,
+        return single_hop_bound(foi=foi,
+                                s_e2e=s_e2e,
+                                theta=theta,
+                                perform_param=self.perform_param,
+                                indep=True)
+
+    def server_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+        foi, s_net_1, s_net_2 = self._server_plan.roots(param_list=param_list)
+
+        try:
+            res_1 = single_hop_bound(foi=foi,
+                                     s_e2e=s_net_1,
+                                     theta=theta,
+                                     perform_param=self.perform_param)
+
+        except ParameterOutOfBounds:
+            res_1 = inf
+
+        try:
+            res_2 = single_hop_bound(foi=foi,
+                                     s_e2e=s_net_2,
+                                     theta=theta,
+                                     perform_param=self.perform_param)
+
+        except ParameterOutOfBounds:
+            res_2 = inf
+
+        if is_array(theta):
+            return np.minimum(res_1, res_2)
+
+        return min(res_1, res_2)
+
+    def fp_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+        foi, s_e2e = self._fp_plan.roots(param_list=param_list)
+
+        return single_hop_bound(foi=foi,
+                                s_e2e=s_e2e,
                                 theta=theta,
                                 perform_param=self.perform_param,
                                 indep=True)
@@ -148,6 +167,10 @@ class Square(SettingMSOBFP):
         util_s_1 = (a_foi_rate + a_3_rate) / c_1
         util_s_2 = (a_foi_rate + a_4_rate) / c_2
 
+        if is_array(util_s_1):
+            # batched arrivals / servers
+            return np.maximum(util_s_1, util_s_2)
+
         return max(util_s_1, util_s_2)
 
     def server_util(self, server_index: int) -> float:
@@ -161,13 +184,13 @@ class Square(SettingMSOBFP):
         c_3 = self.ser_list[2].rate
         c_4 = self.ser_list[3].rate
 
-        if server_index is 0:
+        if server_index == 0:
             return (a_foi_rate + a_3_rate) / c_1
-        elif server_index is 1:
+        elif server_index == 1:
             return (a_foi_rate + a_4_rate) / c_2
-        elif server_index is 2:
+        elif server_index == 2:
             return (a_2_rate + a_3_rate) / c_3
-        elif server_index is 3:
+        elif server_index == 3:
             return (a_2_rate + a_4_rate) / c_4
         else:
             raise ValueError("Wrong server index")
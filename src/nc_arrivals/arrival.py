@@ -1,10 +1,19 @@
 """Abstract Arrival class."""
 
 from abc import abstractmethod, ABC
+from math import inf
+from typing import Tuple
+
+from utils.helper_functions import central_difference
 
 
 class Arrival(ABC):
-    """Abstract Arrival class."""
+    """Abstract Arrival class.
+
+    sigma and rho also accept a NumPy array of thetas. They are then evaluated
+    element-wise and infeasible entries are masked (see mask_infeasible)
+    instead of raising ParameterOutOfBounds.
+    """
 
     @abstractmethod
     def sigma(self, theta: float) -> float:
@@ -22,6 +31,33 @@ class Arrival(ABC):
         """
         pass
 
+    def d_sigma(self, theta: float) -> float:
+        """
+        Derivative of sigma with respect to theta (numerical, unless an
+        analytic derivative is implemented). Only meaningful where sigma is
+        feasible.
+
+        :param theta: mgf parameter
+        """
+        return central_difference(self.sigma, theta)
+
+    def d_rho(self, theta: float) -> float:
+        """
+        Derivative of rho with respect to theta (numerical, unless an
+        analytic derivative is implemented). Only meaningful where rho is
+        feasible.
+
+        :param theta: mgf parameter
+        """
+        return central_difference(self.rho, theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        """
+        :return: open interval of theta outside of which sigma or rho raise
+                 ParameterOutOfBounds (stability is not taken into account)
+        """
+        return 0.0, inf
+
     @abstractmethod
     def is_discrete(self) -> bool:
         """
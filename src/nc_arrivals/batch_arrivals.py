@@ -0,0 +1,98 @@
+"""Arrival processes of all Monte Carlo rows at once."""
+
+import numpy as np
+
+from nc_arrivals.iid import DM1, MD1, DGamma1, DWeibull1
+from nc_arrivals.markov_modulated import MMOOCont, MMOODisc
+from nc_arrivals.regulated_arrivals import (DetermTokenBucket,
+                                            LeakyBucketMassoulie)
+from utils.batch import Batch
+
+
+class DM1Batch(Batch, DM1):
+    """D/M/1 with one lambda per row."""
+    def __init__(self, lamb: np.ndarray, m=1) -> None:
+        super().__init__(lamb=np.asarray(lamb, dtype=float), m=m)
+
+    def __getitem__(self, index: int) -> DM1:
+        return DM1(lamb=self.lamb[index], m=self.m)
+
+
+class DGamma1Batch(Batch, DGamma1):
+    """D/Gamma/1 with one alpha and beta per row."""
+    def __init__(self, alpha_shape: np.ndarray, beta_rate: np.ndarray, m=1) -> None:
+        super().__init__(alpha_shape=np.asarray(alpha_shape, dtype=float),
+                         beta_rate=np.asarray(beta_rate, dtype=float),
+                         m=m)
+
+    def __getitem__(self, index: int) -> DGamma1:
+        return DGamma1(alpha_shape=self.alpha_shape[index], beta_rate=self.beta_rate[index], m=self.m)
+
+
+class DWeibull1Batch(Batch, DWeibull1):
+    """D/Weibull/1 with one lambda per row."""
+    def __init__(self, lamb: np.ndarray, m=1) -> None:
+        super().__init__(lamb=np.asarray(lamb, dtype=float), m=m)
+
+    def __getitem__(self, index: int) -> DWeibull1:
+        return DWeibull1(lamb=self.lamb[index], m=self.m)
+
+
+class MD1Batch(Batch, MD1):
+    """M/D/1 with one lambda and mu per row."""
+    def __init__(self, lamb: np.ndarray, mu: np.ndarray, m=1) -> None:
+        super().__init__(lamb=np.asarray(lamb, dtype=float), mu=np.asarray(mu, dtype=float), m=m)
+
+    def __getitem__(self, index: int) -> MD1:
+        return MD1(lamb=self.lamb[index], mu=self.mu[index], m=self.m)
+
+
+class MMOOContBatch(Batch, MMOOCont):
+    """Continuous-time MMOO with one mu, lambda and peak rate per row."""
+    def __init__(self, mu: np.ndarray, lamb: np.ndarray, peak_rate: np.ndarray, m=1) -> None:
+        super().__init__(mu=np.asarray(mu, dtype=float),
+                         lamb=np.asarray(lamb, dtype=float),
+                         peak_rate=np.asarray(peak_rate, dtype=float),
+                         m=m)
+
+    def __getitem__(self, index: int) -> MMOOCont:
+        return MMOOCont(mu=self.mu[index], lamb=self.lamb[index], peak_rate=self.peak_rate[index], m=self.m)
+
+
+class MMOODiscBatch(Batch, MMOODisc):
+    """Discrete-time MMOO with one stay_on, stay_off and peak rate per row."""
+    def __init__(self, stay_on: np.ndarray, stay_off: np.ndarray, peak_rate: np.ndarray, m=1) -> None:
+        super().__init__(stay_on=np.asarray(stay_on, dtype=float),
+                         stay_off=np.asarray(stay_off, dtype=float),
+                         peak_rate=np.asarray(peak_rate, dtype=float),
+                         m=m)
+
+    def __getitem__(self, index: int) -> MMOODisc:
+        return MMOODisc(stay_on=self.stay_on[index],
+                        stay_off=self.stay_off[index],
+                        peak_rate=self.peak_rate[index],
+                        m=self.m)
+
+
+class DetermTokenBucketBatch(Batch, DetermTokenBucket):
+    """Token bucket with one burst and rate per row."""
+    def __init__(self, sigma_single: np.ndarray, rho_single: np.ndarray, m=1) -> None:
+        super().__init__(sigma_single=np.asarray(sigma_single, dtype=float),
+                         rho_single=np.asarray(rho_single, dtype=float),
+                         m=m)
+
+    def __getitem__(self, index: int) -> DetermTokenBucket:
+        return DetermTokenBucket(sigma_single=self.sigma_single[index], rho_single=self.rho_single[index], m=self.m)
+
+
+class LeakyBucketMassoulieBatch(Batch, LeakyBucketMassoulie):
+    """Leaky bucket according to Massoulié with one burst and rate per row."""
+    def __init__(self, sigma_single: np.ndarray, rho_single: np.ndarray, m=1) -> None:
+        super().__init__(sigma_single=np.asarray(sigma_single, dtype=float),
+                         rho_single=np.asarray(rho_single, dtype=float),
+                         m=m)
+
+    def __getitem__(self, index: int) -> LeakyBucketMassoulie:
+        return LeakyBucketMassoulie(sigma_single=self.sigma_single[index],
+                                    rho_single=self.rho_single[index],
+                                    m=self.m)
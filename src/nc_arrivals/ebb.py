@@ -1,8 +1,12 @@
 """Exponentially Bounded Burstiness"""
 
 import math
+from typing import Tuple
+
+import numpy as np
 
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import broadcast_like, is_array, mask_infeasible
 
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 
@@ -18,6 +22,11 @@ class EBB(ArrivalDistribution):
         self.m = m
 
     def sigma(self, theta: float) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = (self.m / theta) * np.log(1 + self.factor_m * theta / (self.decay - theta))
+            return mask_infeasible(res, feasible=(theta > 0) & (theta < self.decay))
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta={theta} must be > 0")
 
@@ -27,7 +36,19 @@ class EBB(ArrivalDistribution):
         return (self.m / theta) * math.log(1 + self.factor_m * theta / (self.decay - theta))
 
     def rho(self, theta=0.0) -> float:
-        return self.m * self.rho_single
+        return broadcast_like(theta, self.m * self.rho_single)
+
+    def d_sigma(self, theta: float) -> float:
+        log_arg = 1 + self.factor_m * theta / (self.decay - theta)
+        d_log_arg = self.factor_m * self.decay / (self.decay - theta)**2
+
+        return self.m * (d_log_arg / (log_arg * theta) - np.log(log_arg) / theta**2)
+
+    def d_rho(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return 0.0, self.decay
 
     def is_discrete(self) -> bool:
         return self.discr_time
@@ -1,9 +1,14 @@
 """Typical Queueing Theory Processes"""
 
 import math
+from typing import Tuple
+
+import numpy as np
+from scipy.special import erf
 
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import broadcast_like, is_array, mask_infeasible
 
 
 class DM1(ArrivalDistribution):
@@ -19,13 +24,18 @@ class DM1(ArrivalDistribution):
         :param theta: mgf parameter
         :return:      sigma(theta)
         """
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
         """
         rho(theta)
         :param theta: mgf parameter
         """
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = (self.m / theta) * np.log(self.lamb / (self.lamb - theta))
+            return mask_infeasible(res, feasible=(theta > 0) & (theta < self.lamb))
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -34,6 +44,15 @@ class DM1(ArrivalDistribution):
 
         return (self.m / theta) * math.log(self.lamb / (self.lamb - theta))
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        return self.m * (1 / (theta * (self.lamb - theta)) - np.log(self.lamb / (self.lamb - theta)) / theta**2)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return 0.0, self.lamb
+
     def is_discrete(self) -> bool:
         return True
 
@@ -67,13 +86,18 @@ class DGamma1(ArrivalDistribution):
         :param theta: mgf parameter
         :return:      sigma(theta)
         """
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
         """
         rho(theta)
         :param theta: mgf parameter
         """
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = (self.m * self.alpha_shape / theta) * np.log(self.beta_rate / (self.beta_rate - theta))
+            return mask_infeasible(res, feasible=(theta > 0) & (theta < self.beta_rate))
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -82,6 +106,16 @@ class DGamma1(ArrivalDistribution):
 
         return (self.m * self.alpha_shape / theta) * math.log(self.beta_rate / (self.beta_rate - theta))
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        return self.m * self.alpha_shape * (1 / (theta * (self.beta_rate - theta)) -
+                                            np.log(self.beta_rate / (self.beta_rate - theta)) / theta**2)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return 0.0, self.beta_rate
+
     def is_discrete(self) -> bool:
         return True
 
@@ -112,14 +146,26 @@ class MD1(ArrivalDistribution):
         self.m = m
 
     def sigma(self, theta=0.0) -> float:
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = (self.m / theta) * self.lamb * (np.exp(theta / self.mu) - 1)
+            return mask_infeasible(res, feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
         return (self.m / theta) * self.lamb * (math.exp(theta / self.mu) - 1)
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        exp_part = np.exp(theta / self.mu)
+        return self.m * self.lamb * (exp_part / (self.mu * theta) - (exp_part - 1) / theta**2)
+
     def is_discrete(self) -> bool:
         return False
 
@@ -148,9 +194,14 @@ class MM1(ArrivalDistribution):
         self.m = m
 
     def sigma(self, theta=0.0) -> float:
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = self.m * self.lamb / (self.mu - theta)
+            return mask_infeasible(res, feasible=(theta > 0) & (theta < self.mu))
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -159,6 +210,15 @@ class MM1(ArrivalDistribution):
 
         return self.m * self.lamb / (self.mu - theta)
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        return self.m * self.lamb / (self.mu - theta)**2
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return 0.0, self.mu
+
     def is_discrete(self) -> bool:
         return False
 
@@ -191,18 +251,29 @@ class DPoisson1(ArrivalDistribution):
         :param theta: mgf parameter
         :return:      sigma(theta)
         """
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
         """
         rho(theta)
         :param theta: mgf parameter
         """
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = (self.m / theta) * self.lamb * (np.exp(theta) - 1)
+            return mask_infeasible(res, feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
         return (self.m / theta) * self.lamb * (math.exp(theta) - 1)
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        return self.m * self.lamb * (np.exp(theta) / theta - (np.exp(theta) - 1) / theta**2)
+
     def is_discrete(self) -> bool:
         return True
 
@@ -235,13 +306,21 @@ class DWeibull1(ArrivalDistribution):
         :param theta: mgf parameter
         :return:      sigma(theta)
         """
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
         """
         rho(theta)
         :param theta: mgf parameter
         """
+        if is_array(theta):
+            sigma = self.lamb / math.sqrt(2)
+            with np.errstate(all="ignore"):
+                error_part = erf(sigma * theta / math.sqrt(2)) + 1
+                res = self.m * np.log(1 + sigma * theta * np.exp(0.5 * (sigma * theta)**2) *
+                                      math.sqrt(0.5 * math.pi) * error_part) / theta
+            return mask_infeasible(res, feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -255,6 +334,20 @@ class DWeibull1(ArrivalDistribution):
         except FloatingPointError:
             return math.inf
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        sigma = self.lamb / math.sqrt(2)
+        exp_part = np.exp(0.5 * (sigma * theta)**2)
+        error_part = erf(sigma * theta / math.sqrt(2)) + 1
+        log_arg = 1 + sigma * theta * exp_part * math.sqrt(0.5 * math.pi) * error_part
+        # the derivative of erf cancels the exponential
+        d_log_arg = sigma * math.sqrt(0.5 * math.pi) * exp_part * (1 + (sigma * theta)**2) * error_part + \
+            sigma**2 * theta
+
+        return self.m * (d_log_arg / (log_arg * theta) - np.log(log_arg) / theta**2)
+
     def is_discrete(self) -> bool:
         return True
 
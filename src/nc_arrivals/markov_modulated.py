@@ -2,7 +2,10 @@
 
 import math
 
+import numpy as np
+
 from utils.exceptions import IllegalArgumentError, ParameterOutOfBounds
+from utils.helper_functions import broadcast_like, is_array, mask_infeasible
 
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 
@@ -17,9 +20,15 @@ class MMOOCont(ArrivalDistribution):
         self.m = m
 
     def sigma(self, theta=0.0) -> float:
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                bb = theta * self.peak_rate - self.mu - self.lamb
+                res = 0.5 * self.m * (bb + np.sqrt((bb**2) + 4 * self.mu * theta * self.peak_rate)) / theta
+            return mask_infeasible(res, feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -27,6 +36,17 @@ class MMOOCont(ArrivalDistribution):
 
         return 0.5 * self.m * (bb + math.sqrt((bb**2) + 4 * self.mu * theta * self.peak_rate)) / theta
 
+    def d_sigma(self, theta=0.0) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        bb = theta * self.peak_rate - self.mu - self.lamb
+        sqrt_part = np.sqrt((bb**2) + 4 * self.mu * theta * self.peak_rate)
+        numerator = bb + sqrt_part
+        d_numerator = self.peak_rate + (bb * self.peak_rate + 2 * self.mu * self.peak_rate) / sqrt_part
+
+        return 0.5 * self.m * (d_numerator / theta - numerator / theta**2)
+
     def is_discrete(self) -> bool:
         return False
 
@@ -56,6 +76,24 @@ class MMOODisc(ArrivalDistribution):
         self.m = m
 
     def sigma(self, theta=0.0) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                exp_peak = np.exp(theta * self.peak_rate)
+                off_on = self.stay_off + self.stay_on * exp_peak
+                sqrt_part = np.sqrt(off_on**2 - 4 * (self.stay_off + self.stay_on - 1) * exp_peak)
+
+                spectral_rad = 0.5 * (off_on + sqrt_part)
+
+                eigen_0 = 1 - self.stay_off
+                eigen_1 = spectral_rad - self.stay_off
+
+                factor = np.where(eigen_0 > 0,
+                                  np.maximum(eigen_0, eigen_1) / np.minimum(eigen_0, eigen_1),
+                                  np.minimum(eigen_0, eigen_1) / np.maximum(eigen_0, eigen_1))
+
+                res = self.m * np.log(exp_peak * factor / spectral_rad) / theta
+            return mask_infeasible(res, feasible=eigen_0 * eigen_1 > 0)
+
         off_on = self.stay_off + self.stay_on * math.exp(theta * self.peak_rate)
         sqrt_part = math.sqrt(off_on**2 - 4 * (self.stay_off + self.stay_on - 1) * math.exp(theta * self.peak_rate))
 
@@ -74,6 +112,23 @@ class MMOODisc(ArrivalDistribution):
         return self.m * math.log(math.exp(theta * self.peak_rate) * factor / spectral_rad) / theta
 
     def rho(self, theta: float) -> float:
+        if is_array(theta):
+            if np.any(np.logical_or(np.less_equal(self.stay_on, 0.0), np.greater_equal(self.stay_on, 1.0))):
+                raise IllegalArgumentError(f"p_stay_on = {self.stay_on} must " f"be in (0,1)")
+
+            if np.any(np.logical_or(np.less_equal(self.stay_off, 0.0), np.greater_equal(self.stay_off, 1.0))):
+                raise IllegalArgumentError(f"p_stay_off = {self.stay_off} must " f"be in (0,1)")
+
+            with np.errstate(all="ignore"):
+                exp_peak = np.exp(theta * self.peak_rate)
+                off_on = self.stay_off + self.stay_on * exp_peak
+                sqrt_part = np.sqrt(off_on**2 - 4 * (self.stay_off + self.stay_on - 1) * exp_peak)
+
+                spectral_rad = 0.5 * (off_on + sqrt_part)
+
+                res = self.m * np.log(spectral_rad) / theta
+            return mask_infeasible(res, feasible=(theta > 0) & (res >= 0))
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
@@ -95,6 +150,39 @@ class MMOODisc(ArrivalDistribution):
 
         return rho_mmoo_disc
 
+    def _spectral_rad(self, theta: float):
+        """
+        :return: spectral radius and its derivative with respect to theta
+        """
+        exp_peak = np.exp(theta * self.peak_rate)
+        off_on = self.stay_off + self.stay_on * exp_peak
+        d_off_on = self.stay_on * self.peak_rate * exp_peak
+
+        discriminant = off_on**2 - 4 * (self.stay_off + self.stay_on - 1) * exp_peak
+        d_discriminant = 2 * off_on * d_off_on - 4 * (self.stay_off + self.stay_on - 1) * self.peak_rate * exp_peak
+        sqrt_part = np.sqrt(discriminant)
+
+        return 0.5 * (off_on + sqrt_part), 0.5 * (d_off_on + d_discriminant / (2 * sqrt_part))
+
+    def d_sigma(self, theta: float) -> float:
+        spectral_rad, d_spectral_rad = self._spectral_rad(theta)
+
+        # log(factor) = |log|eigen_1| - log|eigen_0||
+        log_ratio = np.log(np.abs(spectral_rad - self.stay_off)) - np.log(np.abs(1 - self.stay_off))
+        log_factor = np.abs(log_ratio)
+        d_log_factor = np.sign(log_ratio) * d_spectral_rad / (spectral_rad - self.stay_off)
+
+        # sigma = m * (peak_rate + (log(factor) - log(spectral_rad)) / theta)
+        log_part = log_factor - np.log(spectral_rad)
+        d_log_part = d_log_factor - d_spectral_rad / spectral_rad
+
+        return self.m * (d_log_part / theta - log_part / theta**2)
+
+    def d_rho(self, theta: float) -> float:
+        spectral_rad, d_spectral_rad = self._spectral_rad(theta)
+
+        return self.m * (d_spectral_rad / (spectral_rad * theta) - np.log(spectral_rad) / theta**2)
+
     def is_discrete(self) -> bool:
         return True
 
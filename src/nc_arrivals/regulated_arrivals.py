@@ -3,8 +3,11 @@
 import math
 from abc import abstractmethod
 
+import numpy as np
+
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import broadcast_like, is_array, mask_infeasible
 
 
 class RegulatedArrivals(ArrivalDistribution):
@@ -28,11 +31,17 @@ class RegulatedArrivals(ArrivalDistribution):
         rho(theta)
         :param theta: mgf parameter
         """
+        if is_array(theta):
+            return mask_infeasible(broadcast_like(theta, self.m * self.rho_single), feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta = {theta} must be > 0")
 
         return self.m * self.rho_single
 
+    def d_rho(self, theta: float) -> float:
+        return broadcast_like(theta, 0.0)
+
     def is_discrete(self) -> bool:
         """
         :return True if the arrival distribution is discrete, False if not
@@ -61,7 +70,10 @@ class DetermTokenBucket(RegulatedArrivals):
         self.burst = self.m * self.sigma_single
 
     def sigma(self, theta: float) -> float:
-        return self.m * self.sigma_single
+        return broadcast_like(theta, self.m * self.sigma_single)
+
+    def d_sigma(self, theta: float) -> float:
+        return broadcast_like(theta, 0.0)
 
     def __str__(self) -> str:
         return f"TBconst_sigma={self.sigma_single}_rho={self.rho_single}_n={self.m}"
@@ -73,12 +85,23 @@ class LeakyBucketMassoulie(RegulatedArrivals):
         super().__init__(sigma_single=sigma_single, rho_single=rho_single, m=m)
 
     def sigma(self, theta: float) -> float:
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                res = self.m * np.log(0.5 *
+                                      (np.exp(theta * self.sigma_single) + np.exp(-theta * self.sigma_single))) / theta
+            return mask_infeasible(res, feasible=theta > 0)
+
         if theta <= 0:
             raise ParameterOutOfBounds(f"theta={theta} must be > 0")
 
         return self.m * math.log(0.5 *
                                  (math.exp(theta * self.sigma_single) + math.exp(-theta * self.sigma_single))) / theta
 
+    def d_sigma(self, theta: float) -> float:
+        # sigma = m * log(cosh(theta * sigma_single)) / theta
+        return self.m * (self.sigma_single * np.tanh(theta * self.sigma_single) / theta -
+                         np.log(np.cosh(theta * self.sigma_single)) / theta**2)
+
     def __str__(self) -> str:
         return f"MassOne_sigma={self.sigma_single}_" \
             f"rho={self.rho_single}_n={self.m}"
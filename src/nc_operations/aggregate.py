@@ -1,13 +1,13 @@
 """Aggregation classes."""
 
-from typing import List
+from typing import List, Tuple
 
 import numpy as np
 from nc_arrivals.arrival import Arrival
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from utils.exceptions import IllegalArgumentError, ParameterOutOfBounds
-from utils.helper_functions import get_p_n, get_q
+from utils.helper_functions import get_p_n, get_q, intersect_domains, is_array, mask_infeasible, scale_domain
 
 
 class AggregateList(Arrival):
@@ -45,6 +45,15 @@ class AggregateList(Arrival):
     def rho(self, theta: float) -> float:
         res = 0.0
 
+        if is_array(theta):
+            feasible = True
+            for i, arr in enumerate(self.arr_list):
+                rho_i = arr.rho(theta) if self.indep else arr.rho(self.p_list[i] * theta)
+                feasible = np.logical_and(feasible, rho_i >= 0)
+                res = res + rho_i
+
+            return mask_infeasible(res, feasible=feasible)
+
         if self.indep:
             for arrival in self.arr_list:
                 rho_i = arrival.rho(theta)
@@ -63,6 +72,35 @@ class AggregateList(Arrival):
 
         return res
 
+    def d_sigma(self, theta: float) -> float:
+        res = 0.0
+        if self.indep:
+            for arr in self.arr_list:
+                res = res + arr.d_sigma(theta)
+        else:
+            for i, arr in enumerate(self.arr_list):
+                res = res + self.p_list[i] * arr.d_sigma(self.p_list[i] * theta)
+
+        return res
+
+    def d_rho(self, theta: float) -> float:
+        res = 0.0
+        if self.indep:
+            for arr in self.arr_list:
+                res = res + arr.d_rho(theta)
+        else:
+            for i, arr in enumerate(self.arr_list):
+                res = res + self.p_list[i] * arr.d_rho(self.p_list[i] * theta)
+
+        return res
+
+    def theta_domain(self) -> Tuple[float, float]:
+        if self.indep:
+            return intersect_domains([arr.theta_domain() for arr in self.arr_list])
+
+        return intersect_domains(
+            [scale_domain(arr.theta_domain(), self.p_list[i]) for i, arr in enumerate(self.arr_list)])
+
     def is_discrete(self):
         return self.arr_list[0].is_discrete()
 
@@ -92,11 +130,25 @@ class AggregateTwo(Arrival):
         arr_1_rho_p_theta = self.arr1.rho(self.p * theta)
         arr_2_rho_q_theta = self.arr2.rho(self.q * theta)
 
+        if is_array(theta):
+            return mask_infeasible(arr_1_rho_p_theta + arr_2_rho_q_theta,
+                                   feasible=(arr_1_rho_p_theta >= 0) & (arr_2_rho_q_theta >= 0))
+
         if arr_1_rho_p_theta < 0 or arr_2_rho_q_theta < 0:
             raise ParameterOutOfBounds("The rhos must be >= 0")
 
         return arr_1_rho_p_theta + arr_2_rho_q_theta
 
+    def d_sigma(self, theta: float) -> float:
+        return self.p * self.arr1.d_sigma(self.p * theta) + self.q * self.arr2.d_sigma(self.q * theta)
+
+    def d_rho(self, theta: float) -> float:
+        return self.p * self.arr1.d_rho(self.p * theta) + self.q * self.arr2.d_rho(self.q * theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.arr1.theta_domain(), self.p),
+                                  scale_domain(self.arr2.theta_domain(), self.q)])
+
     def is_discrete(self):
         return self.arr1.is_discrete()
 
@@ -117,6 +169,15 @@ class AggregateHomogeneous(Arrival):
     def rho(self, theta: float) -> float:
         return self.n * self.arr.rho(theta=theta)
 
+    def d_sigma(self, theta: float) -> float:
+        return self.n * self.arr.d_sigma(theta=theta)
+
+    def d_rho(self, theta: float) -> float:
+        return self.n * self.arr.d_rho(theta=theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return self.arr.theta_domain()
+
     def is_discrete(self):
         return self.arr.is_discrete()
 
@@ -1,11 +1,15 @@
 """Implements all network operations in the sigma-rho calculus."""
 
+from math import inf
+from typing import Tuple
+
 from nc_arrivals.arrival import Arrival
 from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from nc_server.rate_latency_server import RateLatencyServer
 from nc_server.server import Server
 from utils.exceptions import ParameterOutOfBounds
-from utils.helper_functions import get_q
+from utils.helper_functions import (broadcast_like, get_q, intersect_domains, is_array, mask_infeasible,
+                                    scale_domain)
 
 
 class LeftoverARB(Server):
@@ -29,7 +33,7 @@ class LeftoverARB(Server):
     def sigma(self, theta):
         if (isinstance(self.ser, RateLatencyServer)
                 and isinstance(self.cross_arr, DetermTokenBucket)):
-            return self.cross_arr.burst + self.ser.rate * self.ser.latency
+            return broadcast_like(theta, self.cross_arr.burst + self.ser.rate * self.ser.latency)
 
         return self.ser.sigma(theta=self.q * theta) + self.cross_arr.sigma(
             theta=self.p * theta)
@@ -39,6 +43,9 @@ class LeftoverARB(Server):
                 and isinstance(self.cross_arr, DetermTokenBucket)):
             residual_rate = self.ser.rate - self.cross_arr.arr_rate
 
+            if is_array(theta):
+                return mask_infeasible(broadcast_like(theta, residual_rate), feasible=residual_rate > 0, fill=-inf)
+
             if residual_rate <= 0:
                 raise ParameterOutOfBounds("The residual rate must be > 0")
 
@@ -49,7 +56,28 @@ class LeftoverARB(Server):
 
         residual_rate = ser_rho_q_theta - arr_rho_p_theta
 
+        if is_array(theta):
+            return mask_infeasible(residual_rate, feasible=residual_rate > 0, fill=-inf)
+
         if residual_rate <= 0:
             raise ParameterOutOfBounds("The residual rate must be > 0")
 
         return residual_rate
+
+    def d_sigma(self, theta):
+        if (isinstance(self.ser, RateLatencyServer)
+                and isinstance(self.cross_arr, DetermTokenBucket)):
+            return broadcast_like(theta, 0.0)
+
+        return self.q * self.ser.d_sigma(theta=self.q * theta) + self.p * self.cross_arr.d_sigma(theta=self.p * theta)
+
+    def d_rho(self, theta):
+        if (isinstance(self.ser, RateLatencyServer)
+                and isinstance(self.cross_arr, DetermTokenBucket)):
+            return broadcast_like(theta, 0.0)
+
+        return self.q * self.ser.d_rho(theta=self.q * theta) - self.p * self.cross_arr.d_rho(theta=self.p * theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.ser.theta_domain(), self.q),
+                                  scale_domain(self.cross_arr.theta_domain(), self.p)])
@@ -0,0 +1,88 @@
+"""We compare the runtime of a grid search with and without SigmaRhoCache"""
+
+from timeit import default_timer as timer
+from typing import List, Tuple
+
+import numpy as np
+
+from nc_arrivals.iid import DM1
+from nc_operations.arb_scheduling import LeftoverARB
+from nc_operations.deconvolve import Deconvolve
+from nc_operations.e2e_enum import E2EEnum
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.sfa_tandem_bound import sfa_tandem_bound
+from nc_operations.sigma_rho_cache import SigmaRhoCache
+from nc_server.constant_rate_server import ConstantRateServer
+from nc_server.server import Server
+from utils.exceptions import ParameterOutOfBounds
+from utils.perform_parameter import PerformParameter
+
+
+def deep_tandem(number_servers: int) -> Tuple[DM1, List[Server]]:
+    """
+    Tandem of number_servers servers, the cross flow of the k-th server has
+    traversed k servers of its own before, i.e., the leftover services are
+    independent, but their operator trees get deeper along the path.
+
+    :param number_servers: length of the tandem
+    :return: flow of interest and leftover services
+    """
+    leftover_service_list: List[Server] = []
+    for k in range(number_servers):
+        cross_arr = DM1(lamb=8.0)
+        for _ in range(k):
+            cross_arr = Deconvolve(arr=cross_arr, ser=ConstantRateServer(rate=1.0))
+
+        leftover_service_list.append(LeftoverARB(ser=ConstantRateServer(rate=2.0), cross_arr=cross_arr))
+
+    return DM1(lamb=8.0), leftover_service_list
+
+
+def grid_search_tandem(foi: DM1, leftover_service_list: List[Server], perform_param: PerformParameter,
+                       theta_grid: np.ndarray) -> float:
+    res = np.inf
+    for theta in theta_grid:
+        try:
+            res = min(
+                res,
+                sfa_tandem_bound(foi=foi,
+                                 leftover_service_list=leftover_service_list,
+                                 theta=float(theta),
+                                 perform_param=perform_param,
+                                 p_list=[],
+                                 e2e_enum=E2EEnum.ARR_RATE))
+        except ParameterOutOfBounds:
+            continue
+
+    return res
+
+
+def compare_sigma_rho_cache(number_servers: int, repetitions=5) -> Tuple[float, float]:
+    """Measures the time of a grid search on a deep tandem with and without
+    cache"""
+    foi, leftover_service_list = deep_tandem(number_servers=number_servers)
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4 * number_servers)
+    theta_grid = np.arange(0.05, 1.0, 0.01)
+
+    start = timer()
+    for _ in range(repetitions):
+        bound = grid_search_tandem(foi, leftover_service_list, perform_param, theta_grid)
+    time_without_cache = (timer() - start) / repetitions
+
+    start = timer()
+    for _ in range(repetitions):
+        with SigmaRhoCache(max_size=100000):
+            cached_bound = grid_search_tandem(foi, leftover_service_list, perform_param, theta_grid)
+    time_with_cache = (timer() - start) / repetitions
+
+    if cached_bound != bound:
+        raise ArithmeticError(f"cached bound {cached_bound} differs from {bound}")
+
+    return time_without_cache, time_with_cache
+
+
+if __name__ == '__main__':
+    for NUMBER_SERVERS in [2, 5, 8, 11]:
+        TIMES = compare_sigma_rho_cache(number_servers=NUMBER_SERVERS)
+        print(f"servers={NUMBER_SERVERS}: without cache {TIMES[0]:.4f}s, with cache {TIMES[1]:.4f}s, "
+              f"speedup {TIMES[0] / TIMES[1]:.1f}")
@@ -1,12 +1,16 @@
 """Convolution class."""
 
 import math
+from typing import Tuple
 from warnings import warn
 
+import numpy as np
+
 from nc_server.rate_latency_server import RateLatencyServer
 from nc_server.server import Server
 from utils.exceptions import ParameterOutOfBounds
-from utils.helper_functions import get_q, is_equal
+from utils.helper_functions import (EPSILON, broadcast_like, get_q, intersect_domains, is_array, is_equal,
+                                    mask_infeasible, scale_domain)
 
 
 class Convolve(Server):
@@ -26,7 +30,7 @@ class Convolve(Server):
 
     def sigma(self, theta: float) -> float:
         if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
-            return (self.ser1.rate * self.ser1.latency + self.ser2.rate * self.ser2.latency)
+            return broadcast_like(theta, self.ser1.rate * self.ser1.latency + self.ser2.rate * self.ser2.latency)
 
         ser_1_sigma_p = self.ser1.sigma(self.p * theta)
         ser_2_sigma_q = self.ser2.sigma(self.q * theta)
@@ -34,6 +38,13 @@ class Convolve(Server):
         ser_1_rho_p = self.ser1.rho(self.p * theta)
         ser_2_rho_q = self.ser2.rho(self.q * theta)
 
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                rho_diff = np.abs(ser_1_rho_p - ser_2_rho_q)
+                res = np.where(rho_diff < EPSILON, ser_1_sigma_p + ser_2_sigma_q,
+                               ser_1_sigma_p + ser_2_sigma_q - np.log(1 - np.exp(-theta * rho_diff)) / theta)
+            return mask_infeasible(res, feasible=np.isfinite(ser_1_rho_p) & np.isfinite(ser_2_rho_q))
+
         if not is_equal(ser_1_rho_p, ser_2_rho_q):
 
             return ser_1_sigma_p + ser_2_sigma_q - math.log(1 -
@@ -44,11 +55,19 @@ class Convolve(Server):
 
     def rho(self, theta: float) -> float:
         if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
-            return min(self.ser1.rate, self.ser2.rate)
+            return broadcast_like(theta, min(self.ser1.rate, self.ser2.rate))
 
         ser_1_rho_p = self.ser1.rho(self.p * theta)
         ser_2_rho_q = self.ser2.rho(self.q * theta)
 
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                rhos_equal = np.abs(ser_1_rho_p - ser_2_rho_q) < EPSILON
+                res = np.where(rhos_equal, ser_1_rho_p - 1 / theta, np.minimum(ser_1_rho_p, ser_2_rho_q))
+            if np.any(rhos_equal):
+                warn("better use ConvolveRateReduction() for equal rhos")
+            return mask_infeasible(res, feasible=(ser_1_rho_p >= 0) & (ser_2_rho_q >= 0), fill=-math.inf)
+
         if ser_1_rho_p < 0 or ser_2_rho_q < 0:
             raise ParameterOutOfBounds("The rhos must be > 0")
 
@@ -59,6 +78,42 @@ class Convolve(Server):
             warn("better use ConvolveRateReduction() for equal rhos")
             return ser_1_rho_p - 1 / theta
 
+    def d_sigma(self, theta: float) -> float:
+        if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
+            return broadcast_like(theta, 0.0)
+
+        d_sigma_sum = self.p * self.ser1.d_sigma(self.p * theta) + self.q * self.ser2.d_sigma(self.q * theta)
+
+        rho_diff = self.ser1.rho(self.p * theta) - self.ser2.rho(self.q * theta)
+        d_rho_diff = self.p * self.ser1.d_rho(self.p * theta) - self.q * self.ser2.d_rho(self.q * theta)
+
+        # -log(1 - e^y) / theta with y = -theta * |rho_diff|
+        exp_y = np.exp(-theta * np.abs(rho_diff))
+        d_y = -(np.abs(rho_diff) + theta * np.sign(rho_diff) * d_rho_diff)
+        d_log_part = exp_y * d_y / ((1 - exp_y) * theta) + np.log(1 - exp_y) / theta**2
+
+        res = np.where(np.abs(rho_diff) < EPSILON, d_sigma_sum, d_sigma_sum + d_log_part)
+
+        return res if is_array(theta) else float(res)
+
+    def d_rho(self, theta: float) -> float:
+        if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
+            return broadcast_like(theta, 0.0)
+
+        ser_1_rho_p = self.ser1.rho(self.p * theta)
+        ser_2_rho_q = self.ser2.rho(self.q * theta)
+        d_ser_1_rho_p = self.p * self.ser1.d_rho(self.p * theta)
+
+        # rho = ser_1_rho_p - 1 / theta for equal rhos
+        res = np.where(np.abs(ser_1_rho_p - ser_2_rho_q) < EPSILON, d_ser_1_rho_p + 1 / theta**2,
+                       np.where(ser_1_rho_p < ser_2_rho_q, d_ser_1_rho_p, self.q * self.ser2.d_rho(self.q * theta)))
+
+        return res if is_array(theta) else float(res)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.ser1.theta_domain(), self.p),
+                                  scale_domain(self.ser2.theta_domain(), self.q)])
+
 
 class ConvolveRateReduction(Server):
     """Convolution class."""
@@ -78,7 +133,7 @@ class ConvolveRateReduction(Server):
 
     def sigma(self, theta: float) -> float:
         if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
-            return (self.ser1.rate * self.ser1.latency + self.ser2.rate * self.ser2.latency)
+            return broadcast_like(theta, self.ser1.rate * self.ser1.latency + self.ser2.rate * self.ser2.latency)
 
         ser_1_sigma_p = self.ser1.sigma(self.p * theta)
         ser_2_sigma_q = self.ser2.sigma(self.q * theta)
@@ -86,6 +141,13 @@ class ConvolveRateReduction(Server):
         ser_1_rho_p = self.ser1.rho(self.p * theta)
         ser_2_rho_q = self.ser2.rho(self.q * theta)
 
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                rho_diff = np.abs(ser_1_rho_p - ser_2_rho_q)
+                rho_diff = np.where(rho_diff < EPSILON, self.delta, rho_diff)
+                res = ser_1_sigma_p + ser_2_sigma_q - np.log(1 - np.exp(-theta * rho_diff)) / theta
+            return mask_infeasible(res, feasible=np.isfinite(ser_1_rho_p) & np.isfinite(ser_2_rho_q))
+
         if not is_equal(ser_1_rho_p, ser_2_rho_q):
 
             return ser_1_sigma_p + ser_2_sigma_q - math.log(1 -
@@ -96,11 +158,20 @@ class ConvolveRateReduction(Server):
 
     def rho(self, theta: float) -> float:
         if isinstance(self.ser1, RateLatencyServer) and isinstance(self.ser2, RateLatencyServer):
-            return min(self.ser1.rate, self.ser2.rate)
+            return broadcast_like(theta, min(self.ser1.rate, self.ser2.rate))
 
         ser_1_rho_p = self.ser1.rho(self.p * theta)
         ser_2_rho_q = self.ser2.rho(self.q * theta)
 
+        if is_array(theta):
+            with np.errstate(all="ignore"):
+                rhos_equal = np.abs(ser_1_rho_p - ser_2_rho_q) < EPSILON
+                res = np.where(rhos_equal, ser_1_rho_p - self.delta, np.minimum(ser_1_rho_p, ser_2_rho_q))
+            return mask_infeasible(res,
+                                   feasible=(ser_1_rho_p >= 0) & (ser_2_rho_q >= 0) &
+                                   (~rhos_equal | ((self.delta > 0) & (res > 0))),
+                                   fill=-math.inf)
+
         if ser_1_rho_p < 0 or ser_2_rho_q < 0:
             raise ParameterOutOfBounds("The rhos must be > 0")
 
@@ -112,3 +183,7 @@ class ConvolveRateReduction(Server):
                 raise ParameterOutOfBounds("Residual rate must be > 0")
 
             return ser_1_rho_p - self.delta
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.ser1.theta_domain(), self.p),
+                                  scale_domain(self.ser2.theta_domain(), self.q)])
@@ -1,13 +1,17 @@
 """Output bound class."""
 
 import math
+from typing import Tuple
+
+import numpy as np
 
 from nc_arrivals.arrival import Arrival
 from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from nc_server.rate_latency_server import RateLatencyServer
 from nc_server.server import Server
 from utils.exceptions import ParameterOutOfBounds
-from utils.helper_functions import get_q
+from utils.helper_functions import (broadcast_like, get_q, intersect_domains, is_array, mask_infeasible,
+                                    scale_domain)
 
 from nc_operations.stability_check import stability_check
 
@@ -34,12 +38,23 @@ class Deconvolve(Arrival):
         :return:      sigma(theta)
         """
         if isinstance(self.arr, DetermTokenBucket) and isinstance(self.ser, RateLatencyServer):
-            return self.arr.burst + self.ser.rate * self.ser.latency
+            return broadcast_like(theta, self.arr.burst + self.ser.rate * self.ser.latency)
 
         arr_sigma_p = self.arr.sigma(self.p * theta)
         ser_sigma_q = self.ser.sigma(self.q * theta)
 
         arr_rho_p = self.arr.rho(self.p * theta)
+
+        if is_array(theta):
+            ser_rho_q = self.ser.rho(self.q * theta)
+            with np.errstate(all="ignore"):
+                k_sig = -np.log(1 - np.exp(theta * (arr_rho_p - ser_rho_q))) / theta
+                res = arr_sigma_p + ser_sigma_q + k_sig
+
+                if not self.arr.is_discrete():
+                    res = res + arr_rho_p
+            return mask_infeasible(res, feasible=arr_rho_p < ser_rho_q)
+
         k_sig = -math.log(1 - math.exp(theta * (arr_rho_p - self.ser.rho(self.q * theta)))) / theta
 
         if self.arr.is_discrete():
@@ -54,11 +69,19 @@ class Deconvolve(Arrival):
         :return: rho(theta)
         """
         if isinstance(self.arr, DetermTokenBucket) and isinstance(self.ser, RateLatencyServer):
+            if is_array(theta):
+                return mask_infeasible(broadcast_like(theta, self.arr.arr_rate),
+                                       feasible=self.arr.rho(theta) < self.ser.rho(theta))
+
             stability_check(arr=self.arr, ser=self.ser, theta=theta)
             return self.arr.arr_rate
 
         arr_rho_p = self.arr.rho(self.p * theta)
 
+        if is_array(theta):
+            ser_rho_q = self.ser.rho(self.q * theta)
+            return mask_infeasible(arr_rho_p, feasible=(arr_rho_p >= 0) & (ser_rho_q >= 0) & (arr_rho_p < ser_rho_q))
+
         if arr_rho_p < 0 or self.ser.rho(self.q * theta) < 0:
             raise ParameterOutOfBounds("The rhos must be >= 0")
 
@@ -66,5 +89,45 @@ class Deconvolve(Arrival):
 
         return arr_rho_p
 
+    def d_sigma(self, theta: float) -> float:
+        """
+
+        :param theta: mgf parameter
+        :return:      derivative of sigma(theta) (chain rule)
+        """
+        if isinstance(self.arr, DetermTokenBucket) and isinstance(self.ser, RateLatencyServer):
+            return broadcast_like(theta, 0.0)
+
+        rho_diff = self.arr.rho(self.p * theta) - self.ser.rho(self.q * theta)
+        d_arr_rho_p = self.p * self.arr.d_rho(self.p * theta)
+        d_rho_diff = d_arr_rho_p - self.q * self.ser.d_rho(self.q * theta)
+
+        # k_sig = -log(1 - e^x) / theta with x = theta * rho_diff
+        exp_x = np.exp(theta * rho_diff)
+        d_x = rho_diff + theta * d_rho_diff
+        d_k_sig = exp_x * d_x / ((1 - exp_x) * theta) + np.log(1 - exp_x) / theta**2
+
+        res = self.p * self.arr.d_sigma(self.p * theta) + self.q * self.ser.d_sigma(self.q * theta) + d_k_sig
+
+        if not self.arr.is_discrete():
+            res = res + d_arr_rho_p
+
+        return res
+
+    def d_rho(self, theta: float) -> float:
+        """
+
+        :param theta: mgf parameter
+        :return:      derivative of rho(theta)
+        """
+        if isinstance(self.arr, DetermTokenBucket) and isinstance(self.ser, RateLatencyServer):
+            return broadcast_like(theta, 0.0)
+
+        return self.p * self.arr.d_rho(self.p * theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([scale_domain(self.arr.theta_domain(), self.p),
+                                  scale_domain(self.ser.theta_domain(), self.q)])
+
     def is_discrete(self):
         return self.arr.is_discrete()
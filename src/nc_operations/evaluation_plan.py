@@ -0,0 +1,221 @@
+"""Compiles trees of arrivals, servers and operators into a flat DAG of
+memoizing nodes that is built once and evaluated for many parameters."""
+
+import copy
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from nc_arrivals.arrival import Arrival
+from nc_server.server import Server
+from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import get_p_n, get_q
+
+MEMO_SIZE = 10000
+
+_MISSING = object()
+
+
+class ParamRef(float):
+    """
+    Hoelder parameter param_list[index]. It is used like a float with the
+    given value when the tree is constructed and rewritten by
+    EvaluationPlan.bind().
+    """
+    def __new__(cls, index: int, value: float):
+        obj = super().__new__(cls, value)
+        obj.index = index
+        return obj
+
+    def __getnewargs__(self):
+        return self.index, float(self)
+
+    def __repr__(self) -> str:
+        return f"ParamRef({self.index}, {float(self)})"
+
+
+class _MemoMethod(object):
+    """
+    sigma or rho of a compiled node, evaluated only once per theta. It is
+    set as an instance attribute, i.e., the class of the node and its
+    isinstance() checks are unaffected.
+    """
+    def __init__(self, node: Union[Arrival, Server], name: str) -> None:
+        self.node = node
+        self.name = name
+        self.memo = {}
+
+    def __call__(self, theta=0.0):
+        try:
+            res = self.memo.get(theta, _MISSING)
+        except TypeError:
+            # arrays are unhashable and evaluated element-wise anyway
+            return getattr(type(self.node), self.name)(self.node, theta)
+
+        if res is _MISSING:
+            try:
+                res = getattr(type(self.node), self.name)(self.node, theta)
+            except (ParameterOutOfBounds, ArithmeticError) as exc:
+                # the exception is part of the result
+                res = exc
+
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            self.memo[theta] = res
+
+        if isinstance(res, Exception):
+            raise res.with_traceback(None)
+
+        return res
+
+    def __getstate__(self) -> dict:
+        return {"node": self.node, "name": self.name, "memo": {}}
+
+
+def _is_node(value) -> bool:
+    return isinstance(value, (Arrival, Server))
+
+
+def _key(value):
+    """hashable representation of a non-child attribute"""
+    if isinstance(value, ParamRef):
+        return "param", value.index
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_key(entry) for entry in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return "id", id(value)
+
+    return value
+
+
+class EvaluationPlan(object):
+    """
+    DAG of memoizing nodes. Structurally equal subtrees are merged, e.g.,
+    two Deconvolve(arr=a_2, ser=s_1) in different trees become one node.
+    Nodes that do not depend on a ParamRef keep their memo across bind().
+
+    The trees are either added by compile() or built by build(param_list)
+    on the first call of roots(), i.e., settings that are constructed many
+    times but evaluated rarely do not pay for the compilation.
+    """
+    def __init__(self, build: Optional[Callable[[List[float]], list]] = None) -> None:
+        """
+        :param build: returns the trees of roots(), called once
+        """
+        self._build = build
+        self._roots: Optional[list] = None
+        # node table in topological order
+        self._table: List[Union[Arrival, Server]] = []
+        self._index: Dict[tuple, int] = {}
+        self._compiled: Dict[int, int] = {}
+        # the sources keep their ids unique while the plan exists
+        self._sources: List[Union[Arrival, Server]] = []
+        self._params: List[tuple] = []
+        self._parametric: Set[int] = set()
+
+    def compile(self, tree: Union[Arrival, Server]) -> Union[Arrival, Server]:
+        """
+        :param tree: arrival, server or a tree of operators, where Hoelder
+                     parameters may be given as ParamRef
+        :return: compiled root, to be used like the original tree
+        """
+        return self._table[self._compile(tree)]
+
+    def roots(self, param_list: List[float]) -> list:
+        """
+        Compiles the trees of build on the first call and binds the
+        parameters.
+
+        :param param_list: theta and Hoelder parameters
+        :return: compiled roots
+        """
+        if self._roots is None:
+            self._roots = [self.compile(tree) for tree in self._build(param_list)]
+
+        self.bind(param_list=param_list)
+
+        return self._roots
+
+    def _compile(self, obj: Union[Arrival, Server]) -> int:
+        if id(obj) in self._compiled:
+            return self._compiled[id(obj)]
+
+        self._sources.append(obj)
+
+        children = {}
+        child_indices = []
+        params = {}
+        key_items = []
+        for attr, value in vars(obj).items():
+            if isinstance(value, _MemoMethod):
+                continue
+
+            if _is_node(value):
+                child_indices.append(self._compile(value))
+                children[attr] = self._table[child_indices[-1]]
+                key_items.append((attr, child_indices[-1]))
+            elif isinstance(value, list) and value and all(_is_node(entry) for entry in value):
+                indices = [self._compile(entry) for entry in value]
+                child_indices += indices
+                children[attr] = [self._table[index] for index in indices]
+                key_items.append((attr, tuple(indices)))
+            else:
+                if isinstance(value, ParamRef) or (isinstance(value, list)
+                                                   and any(isinstance(entry, ParamRef) for entry in value)):
+                    params[attr] = value
+                key_items.append((attr, _key(value)))
+
+        if children:
+            key = (type(obj), tuple(key_items))
+        else:
+            key = ("leaf", id(obj))
+
+        if key not in self._index:
+            node = copy.copy(obj)
+            node.__dict__.update(children)
+            node.sigma = _MemoMethod(node=node, name="sigma")
+            node.rho = _MemoMethod(node=node, name="rho")
+
+            index = len(self._table)
+            self._table.append(node)
+            self._index[key] = index
+
+            if params:
+                self._params.append((index, params))
+            if params or any(child in self._parametric for child in child_indices):
+                self._parametric.add(index)
+
+        self._compiled[id(obj)] = self._index[key]
+        self._compiled[id(self._table[self._index[key]])] = self._index[key]
+
+        return self._index[key]
+
+    def bind(self, param_list: List[float]) -> None:
+        """
+        Inserts the parameters and invalidates the memo of all nodes
+        depending on them.
+
+        :param param_list: theta and Hoelder parameters
+        """
+        for index, params in self._params:
+            node = self._table[index]
+            for attr, ref in params.items():
+                if attr == "p_list":
+                    # the last entry is derived from the others
+                    p_list = [param_list[p.index] if isinstance(p, ParamRef) else p for p in ref[:-1]]
+                    node.p_list = p_list + [get_p_n(p_list=p_list)]
+                else:
+                    setattr(node, attr, param_list[ref.index])
+
+                    if attr == "p" and hasattr(node, "q"):
+                        node.q = get_q(p=node.p)
+
+        for index in self._parametric:
+            node = self._table[index]
+            node.sigma.memo.clear()
+            node.rho.memo.clear()
+
+    def __len__(self) -> int:
+        return len(self._table)
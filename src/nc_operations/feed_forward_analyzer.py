@@ -0,0 +1,527 @@
+"""Derives the operator trees of a feed-forward network from its flows."""
+
+from math import inf
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+import numpy as np
+
+from nc_arrivals.arrival import Arrival
+from nc_server.server import Server
+from optimization.optimization_result import OptimizationResult
+from utils.exceptions import IllegalArgumentError, ParameterOutOfBounds
+from utils.helper_functions import intersect_domains
+from utils.perform_parameter import PerformParameter
+from utils.setting import Setting
+
+from nc_operations.aggregate import AggregateList
+from nc_operations.arb_scheduling import LeftoverARB
+from nc_operations.convolve import Convolve
+from nc_operations.deconvolve import Deconvolve
+from nc_operations.e2e_enum import E2EEnum
+from nc_operations.evaluation_plan import EvaluationPlan, ParamRef
+from nc_operations.flow import Flow
+from nc_operations.nc_analysis import NCAnalysis
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.pmoo_tandem_bound import pmoo_tandem_bound
+from nc_operations.sfa_tandem_bound import sfa_tandem_bound
+from nc_operations.single_hop_bound import single_hop_bound
+
+
+class FeedForwardAnalyzer(Setting):
+    """
+    Analyzes the flows of a feed-forward network under arbitrary
+    multiplexing. The flows' server_indices are their paths, i.e., indices
+    of ser_list in the order of traversal.
+
+    - TFA: sum of the per-server delay bounds of the total flow, the
+      violation probability is split equally (only PerformEnum.DELAY)
+    - SFA: convolution of the leftover services along the path
+    - PMOO: leftover service of the convolution, every cross flow segment
+      is subtracted once (E2EEnum.STANDARD requires nested segments)
+
+    The output of a flow at a server is derived once and shared by all
+    flows of interest, the trees are compiled into one EvaluationPlan.
+
+    Every subtree keeps track of the flows and servers it depends on. If
+    two operands share one of them, e.g., the outputs of two flows that
+    met at a server, the operator uses Hoelder's inequality. Its parameter
+    is appended to param_list, i.e., param_list = [theta, p_1, ...] has
+    number_param entries. The trees of all flows are derived up front, such
+    that the parameters are the same for every flow of interest.
+    """
+    def __init__(self,
+                 flows: List[Flow],
+                 ser_list: List[Server],
+                 perform_param: PerformParameter,
+                 nc_analysis=NCAnalysis.SFA,
+                 e2e_enum=E2EEnum.STANDARD,
+                 foi_index=0) -> None:
+        """
+        :param flows:         flows with their paths
+        :param ser_list:      servers
+        :param perform_param: performance parameter
+        :param nc_analysis:   TFA, SFA or PMOO
+        :param e2e_enum:      STANDARD derives an operator tree, the other
+                              values use sfa_tandem_bound /
+                              pmoo_tandem_bound
+        :param foi_index:     flow of interest of standard_bound()
+        """
+        for flow in flows:
+            if not flow.server_indices:
+                raise IllegalArgumentError("every flow needs a path")
+
+            for server_index in flow.server_indices:
+                if server_index < 0 or server_index >= len(ser_list):
+                    raise IllegalArgumentError(f"server index {server_index} does not exist")
+
+        if nc_analysis == NCAnalysis.TFA and perform_param.perform_metric != PerformEnum.DELAY:
+            raise NotImplementedError("TFA is only implemented for the delay")
+
+        self.flows = flows
+        self.ser_list = ser_list
+        self.perform_param = perform_param
+        self.nc_analysis = nc_analysis
+        self.e2e_enum = e2e_enum
+        self.foi_index = foi_index
+
+        self._check_feed_forward()
+
+        self._plan = EvaluationPlan()
+        self._arrivals: Dict[Tuple[int, int], Arrival] = {}
+        self._leftovers: Dict[Tuple[int, int], Server] = {}
+        self._totals: Dict[int, Tuple[Arrival, Optional[ParamRef]]] = {}
+        # flows and servers every subtree depends on, keyed by id (the node
+        # is stored as well to keep the id unique)
+        self._sources: Dict[int, Tuple[Union[Arrival, Server], FrozenSet[tuple]]] = {}
+        self._number_hoelder = 0
+        # compiled foi, service(s), cross flows and Hoelder parameter of the
+        # bound per flow of interest
+        self._trees: Dict[int, tuple] = {}
+
+        for flow_index, flow in enumerate(flows):
+            self._register(flow.arr, {("flow", flow_index)})
+        for server_index, ser in enumerate(ser_list):
+            self._register(ser, {("server", server_index)})
+
+        for flow_index in range(len(flows)):
+            try:
+                self._flow_trees(flow_index)
+            except NotImplementedError:
+                # raised again if the flow is evaluated
+                pass
+
+        self.number_param = 1 + self._number_hoelder
+
+    def _check_feed_forward(self) -> None:
+        successors = [set() for _ in self.ser_list]
+        for flow in self.flows:
+            for hop in range(len(flow.server_indices) - 1):
+                successors[flow.server_indices[hop]].add(flow.server_indices[hop + 1])
+
+        in_degree = [0] * len(self.ser_list)
+        for server_successors in successors:
+            for successor in server_successors:
+                in_degree[successor] += 1
+
+        # Kahn's algorithm
+        queue = [index for index, degree in enumerate(in_degree) if degree == 0]
+        number_sorted = 0
+        while queue:
+            index = queue.pop()
+            number_sorted += 1
+            for successor in successors[index]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    queue.append(successor)
+
+        if number_sorted < len(self.ser_list):
+            raise IllegalArgumentError("the network is not feed-forward")
+
+    def _register(self, node: Union[Arrival, Server], sources) -> Union[Arrival, Server]:
+        self._sources[id(node)] = (node, frozenset(sources))
+        return node
+
+    def _depends_on(self, node: Union[Arrival, Server]) -> FrozenSet[tuple]:
+        return self._sources[id(node)][1]
+
+    def _hoelder_param(self, first: Union[Arrival, Server], second: Union[Arrival, Server]) -> Optional[ParamRef]:
+        """
+        :return: new Hoelder parameter if the operands are dependent, else
+                 None
+        """
+        if self._depends_on(first).isdisjoint(self._depends_on(second)):
+            return None
+
+        return self._new_param()
+
+    def _new_param(self) -> ParamRef:
+        # the value is only used for the construction, _bind() inserts
+        # param_list before every evaluation
+        self._number_hoelder += 1
+        return ParamRef(index=self._number_hoelder, value=2.0)
+
+    def _aggregate(self, arrivals: List[Arrival]) -> Arrival:
+        """
+        Aggregates dependent arrivals with Hoelder's inequality and the
+        resulting groups as independent.
+        """
+        groups: List[List[Arrival]] = []
+        for arrival in arrivals:
+            dependent = [group for group in groups if any(
+                not self._depends_on(arrival).isdisjoint(self._depends_on(member)) for member in group)]
+            merged = [arrival]
+            for group in dependent:
+                merged += group
+                groups.remove(group)
+            groups.append(merged)
+
+        aggregates = []
+        for group in groups:
+            if len(group) == 1:
+                aggregates.append(group[0])
+            else:
+                p_list = [self._new_param() for _ in range(len(group) - 1)]
+                aggregates.append(
+                    self._register(AggregateList(arr_list=group, indep=False, p_list=p_list),
+                                   frozenset().union(*(self._depends_on(member) for member in group))))
+
+        if len(aggregates) == 1:
+            return aggregates[0]
+
+        return self._register(AggregateList(arr_list=aggregates, indep=True, p_list=[]),
+                              frozenset().union(*(self._depends_on(member) for member in aggregates)))
+
+    def _leftover_arb(self, ser: Server, cross_arrivals: List[Arrival]) -> Server:
+        if not cross_arrivals:
+            return ser
+
+        cross_arr = self._aggregate(cross_arrivals)
+        p = self._hoelder_param(ser, cross_arr)
+        if p is None:
+            leftover = LeftoverARB(ser=ser, cross_arr=cross_arr)
+        else:
+            leftover = LeftoverARB(ser=ser, cross_arr=cross_arr, indep=False, p=p)
+
+        return self._register(leftover, self._depends_on(ser) | self._depends_on(cross_arr))
+
+    def _convolve_all(self, ser_list: List[Server]) -> Server:
+        res = ser_list[0]
+        for ser in ser_list[1:]:
+            p = self._hoelder_param(res, ser)
+            if p is None:
+                convolution = Convolve(ser1=res, ser2=ser)
+            else:
+                convolution = Convolve(ser1=res, ser2=ser, indep=False, p=p)
+            res = self._register(convolution, self._depends_on(res) | self._depends_on(ser))
+
+        return res
+
+    def _arrival(self, flow_index: int, hop: int) -> Arrival:
+        """
+        :return: arrival of the flow at the hop-th server of its path
+        """
+        key = (flow_index, hop)
+        if key not in self._arrivals:
+            flow = self.flows[flow_index]
+            if hop == 0:
+                self._arrivals[key] = flow.arr
+            else:
+                arr = self._arrival(flow_index, hop - 1)
+                ser = self._leftover(flow_index, flow.server_indices[hop - 1])
+                p = self._hoelder_param(arr, ser)
+                if p is None:
+                    output = Deconvolve(arr=arr, ser=ser)
+                else:
+                    output = Deconvolve(arr=arr, ser=ser, indep=False, p=p)
+                self._arrivals[key] = self._register(output, self._depends_on(arr) | self._depends_on(ser))
+
+        return self._arrivals[key]
+
+    def _cross_arrivals(self, server_index: int, exclude: List[int]) -> List[Arrival]:
+        return [
+            self._arrival(flow_index, flow.server_indices.index(server_index))
+            for flow_index, flow in enumerate(self.flows)
+            if flow_index not in exclude and server_index in flow.server_indices
+        ]
+
+    def _leftover(self, flow_index: int, server_index: int) -> Server:
+        """
+        :return: leftover service of the server for the flow
+        """
+        key = (flow_index, server_index)
+        if key not in self._leftovers:
+            self._leftovers[key] = self._leftover_arb(ser=self.ser_list[server_index],
+                                                      cross_arrivals=self._cross_arrivals(server_index,
+                                                                                          exclude=[flow_index]))
+
+        return self._leftovers[key]
+
+    def _pmoo_segments(self, flow_index: int) -> Dict[Tuple[int, int], List[Arrival]]:
+        """
+        :return: cross arrivals, grouped by the first and last position of
+                 their contiguous segment on the path of the flow
+        """
+        path = self.flows[flow_index].server_indices
+        segments: Dict[Tuple[int, int], List[Arrival]] = {}
+
+        for cross_index, cross_flow in enumerate(self.flows):
+            if cross_index == flow_index:
+                continue
+
+            start = None
+            for hop, server_index in enumerate(cross_flow.server_indices):
+                position = path.index(server_index) if server_index in path else None
+
+                if start is not None and (position is None or position != end + 1):
+                    segments.setdefault((start, end), []).append(self._arrival(cross_index, start_hop))
+                    start = None
+
+                if position is not None:
+                    if start is None:
+                        start, start_hop = position, hop
+                    end = position
+
+            if start is not None:
+                segments.setdefault((start, end), []).append(self._arrival(cross_index, start_hop))
+
+        return segments
+
+    def _pmoo_service(self, flow_index: int, segments: Dict[Tuple[int, int], List[Arrival]], low: int,
+                      high: int) -> Server:
+        """
+        :return: leftover service of the positions low, ..., high of the path
+        """
+        path = self.flows[flow_index].server_indices
+
+        inner = [(start, end) for start, end in segments
+                 if low <= start and end <= high and (start, end) != (low, high)]
+        children = sorted(interval for interval in inner if not any(
+            other != interval and other[0] <= interval[0] and interval[1] <= other[1] for other in inner))
+
+        parts: List[Server] = []
+        position = low
+        for start, end in children:
+            parts += [self.ser_list[path[k]] for k in range(position, start)]
+            parts.append(self._pmoo_service(flow_index, segments, start, end))
+            position = end + 1
+        parts += [self.ser_list[path[k]] for k in range(position, high + 1)]
+
+        return self._leftover_arb(ser=self._convolve_all(parts), cross_arrivals=segments.get((low, high), []))
+
+    def _e2e_service(self, flow_index: int) -> Server:
+        path = self.flows[flow_index].server_indices
+
+        if self.nc_analysis == NCAnalysis.SFA:
+            return self._convolve_all([self._leftover(flow_index, server_index) for server_index in path])
+
+        elif self.nc_analysis == NCAnalysis.PMOO:
+            segments = self._pmoo_segments(flow_index)
+
+            intervals = list(segments)
+            for i, (start_1, end_1) in enumerate(intervals):
+                for start_2, end_2 in intervals[i + 1:]:
+                    if start_1 < start_2 <= end_1 < end_2 or start_2 < start_1 <= end_2 < end_1:
+                        raise NotImplementedError("PMOO with E2EEnum.STANDARD requires nested cross flows")
+
+            return self._pmoo_service(flow_index, segments, 0, len(path) - 1)
+
+        else:
+            raise NotImplementedError(f"{self.nc_analysis} has no end-to-end service")
+
+    def _total_flow(self, server_index: int) -> Tuple[Arrival, Optional[ParamRef]]:
+        if server_index not in self._totals:
+            total_flow = self._aggregate(self._cross_arrivals(server_index, exclude=[]))
+            self._totals[server_index] = (total_flow, self._hoelder_param(total_flow, self.ser_list[server_index]))
+
+        return self._totals[server_index]
+
+    def _check_independent(self, arrivals: List[Arrival], ser_list: List[Server]) -> None:
+        operands = arrivals + ser_list
+        for i, first in enumerate(operands):
+            for second in operands[i + 1:]:
+                if not self._depends_on(first).isdisjoint(self._depends_on(second)):
+                    raise NotImplementedError(f"{self.e2e_enum} requires independent flows and services, "
+                                              f"use E2EEnum.STANDARD")
+
+    def _flow_trees(self, flow_index: int) -> tuple:
+        if flow_index in self._trees:
+            return self._trees[flow_index]
+
+        flow = self.flows[flow_index]
+        path = flow.server_indices
+        compile_tree = self._plan.compile
+
+        if self.nc_analysis == NCAnalysis.TFA:
+            totals = [self._total_flow(server_index) for server_index in path]
+            trees = ([compile_tree(total_flow) for total_flow, _ in totals],
+                     [compile_tree(self.ser_list[server_index]) for server_index in path], [p for _, p in totals])
+
+        elif self.e2e_enum == E2EEnum.STANDARD:
+            s_e2e = self._e2e_service(flow_index)
+            trees = (compile_tree(flow.arr), compile_tree(s_e2e), self._hoelder_param(flow.arr, s_e2e))
+
+        elif self.nc_analysis == NCAnalysis.SFA:
+            leftovers = [self._leftover(flow_index, server_index) for server_index in path]
+            self._check_independent([flow.arr], leftovers)
+            trees = (compile_tree(flow.arr), [compile_tree(leftover) for leftover in leftovers])
+
+        elif self.nc_analysis == NCAnalysis.PMOO:
+            segments = self._pmoo_segments(flow_index)
+            self._check_independent([flow.arr] + [arrival for arrivals in segments.values() for arrival in arrivals],
+                                    [self.ser_list[server_index] for server_index in path])
+            cross_flows = [
+                Flow(arr=compile_tree(arrival), server_indices=list(range(start, end + 1)))
+                for (start, end), arrivals in segments.items() for arrival in arrivals
+            ]
+            trees = (Flow(arr=compile_tree(flow.arr), server_indices=list(range(len(path)))), cross_flows,
+                     [compile_tree(self.ser_list[server_index]) for server_index in path])
+
+        else:
+            raise NotImplementedError(f"{self.nc_analysis} is not implemented")
+
+        self._trees[flow_index] = trees
+        return trees
+
+    def _bind(self, param_list: List[float]) -> None:
+        if len(param_list) != self.number_param:
+            raise IllegalArgumentError(f"param_list of length {len(param_list)}, theta and "
+                                       f"{self.number_param - 1} Hoelder parameters are required")
+
+        self._plan.bind(param_list)
+
+    def _flow_bound(self, flow_index: int, param_list: List[float]) -> float:
+        trees = self._flow_trees(flow_index)
+        theta = param_list[0]
+
+        if self.nc_analysis == NCAnalysis.TFA:
+            total_flows, servers, p_list = trees
+            per_server = PerformParameter(perform_metric=PerformEnum.DELAY,
+                                          value=self.perform_param.value / len(servers))
+
+            res = 0.0
+            for total_flow, server, p in zip(total_flows, servers, p_list):
+                res += _single_hop_bound(total_flow, server, theta, per_server, p, param_list)
+
+            return res
+
+        if self.e2e_enum == E2EEnum.STANDARD:
+            foi, s_e2e, p = trees
+            return _single_hop_bound(foi, s_e2e, theta, self.perform_param, p, param_list)
+
+        if self.nc_analysis == NCAnalysis.SFA:
+            foi, leftover_service_list = trees
+            return sfa_tandem_bound(foi=foi,
+                                    leftover_service_list=leftover_service_list,
+                                    theta=theta,
+                                    perform_param=self.perform_param,
+                                    p_list=[],
+                                    e2e_enum=self.e2e_enum)
+
+        foi, cross_flows, ser_on_foi_path = trees
+        return pmoo_tandem_bound(foi=foi,
+                                 cross_flows_on_foi_path=cross_flows,
+                                 ser_on_foi_path=ser_on_foi_path,
+                                 theta=theta,
+                                 perform_param=self.perform_param,
+                                 e2e_enum=self.e2e_enum)
+
+    def flow_bound(self, flow_index: int, param_list: List[float]) -> float:
+        """
+        :param flow_index: flow of interest
+        :param param_list: theta and Hoelder parameters
+        :return:           bound of the flow of interest
+        """
+        self._bind(param_list)
+        return self._flow_bound(flow_index=flow_index, param_list=param_list)
+
+    def standard_bound(self, param_list: List[float]) -> float:
+        return self.flow_bound(flow_index=self.foi_index, param_list=param_list)
+
+    def all_bounds(self, param_list: List[float], foi_indices: Optional[List[int]] = None) -> List[float]:
+        """
+        Bounds of several flows of interest in one pass, shared subtrees
+        (e.g. the output of a cross flow) are evaluated once.
+
+        :param param_list:  theta and Hoelder parameters
+        :param foi_indices: flows of interest, all flows if None
+        :return:            bound per flow of interest, inf if infeasible
+        """
+        if foi_indices is None:
+            foi_indices = list(range(len(self.flows)))
+
+        self._bind(param_list)
+
+        res = []
+        for flow_index in foi_indices:
+            try:
+                res.append(self._flow_bound(flow_index=flow_index, param_list=param_list))
+            except (FloatingPointError, OverflowError, ParameterOutOfBounds):
+                res.append(inf)
+
+        return res
+
+    def grid_search_all(self, theta_bounds: Tuple[float, float], delta: float,
+                        foi_indices: Optional[List[int]] = None,
+                        hoelder_params: Optional[List[float]] = None) -> List[OptimizationResult]:
+        """
+        Optimizes theta of every flow of interest on the same grid. The flows
+        are evaluated in the inner loop, i.e., every shared output bound is
+        computed once per theta instead of once per flow.
+
+        :param theta_bounds:   lower and upper bound of theta
+        :param delta:          granularity of the grid
+        :param foi_indices:    flows of interest, all flows if None
+        :param hoelder_params: fixed Hoelder parameters, 2.0 (Cauchy-Schwarz)
+                               if None
+        :return:               optimization result per flow of interest
+        """
+        if foi_indices is None:
+            foi_indices = list(range(len(self.flows)))
+
+        if hoelder_params is None:
+            hoelder_params = [2.0] * (self.number_param - 1)
+
+        opt_theta = [0.0] * len(foi_indices)
+        opt_value = [inf] * len(foi_indices)
+
+        # thetas outside of the domain are infeasible for every flow
+        low, high = intersect_domains([theta_bounds, self.theta_domain()])
+
+        for theta in np.arange(low, high, delta):
+            bounds = self.all_bounds(param_list=[float(theta)] + hoelder_params, foi_indices=foi_indices)
+
+            for i, bound in enumerate(bounds):
+                if bound < opt_value[i]:
+                    opt_theta[i] = float(theta)
+                    opt_value[i] = bound
+
+        return [
+            OptimizationResult(opt_x=[opt_theta[i]] + hoelder_params, obj_value=opt_value[i],
+                               heuristic="grid_search_all")
+            for i in range(len(foi_indices))
+        ]
+
+    def approximate_utilization(self) -> float:
+        rate_sum = [0.0] * len(self.ser_list)
+        for flow in self.flows:
+            for server_index in flow.server_indices:
+                rate_sum[server_index] += flow.arr.average_rate()
+
+        return max(rate_sum[index] / ser.average_rate() for index, ser in enumerate(self.ser_list))
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([flow.arr.theta_domain() for flow in self.flows] +
+                                 [ser.theta_domain() for ser in self.ser_list])
+
+    def to_name(self) -> str:
+        return f"{self.__class__.__name__}_{self.nc_analysis.name}_{self.e2e_enum.name}"
+
+
+
+def _single_hop_bound(foi: Arrival, s_e2e: Server, theta: float, perform_param: PerformParameter,
+                      p: Optional[ParamRef], param_list: List[float]) -> float:
+    if p is None:
+        return single_hop_bound(foi=foi, s_e2e=s_e2e, theta=theta, perform_param=perform_param)
+
+    return single_hop_bound(foi=foi, s_e2e=s_e2e, theta=theta, perform_param=perform_param, indep=False,
+                            p=param_list[p.index])
@@ -12,3 +12,13 @@ def get_sigma_rho(arr: Arrival, ser: Server, theta: float, indep=True, p=1.0, q=
     else:
         return arr.sigma(theta=p * theta) + ser.sigma(theta=q * theta), arr.rho(theta=p * theta) - ser.rho(theta=q *
                                                                                                            theta)
+
+
+def get_d_sigma_rho(arr: Arrival, ser: Server, theta: float, indep=True, p=1.0, q=1.0) -> List[float]:
+    """Derivatives of the sum of sigmas and the rho difference with respect to theta (chain rule for p and q)"""
+    if indep:
+        return arr.d_sigma(theta=theta) + ser.d_sigma(theta=theta), arr.d_rho(theta=theta) - ser.d_rho(theta=theta)
+
+    else:
+        return (p * arr.d_sigma(theta=p * theta) + q * ser.d_sigma(theta=q * theta),
+                p * arr.d_rho(theta=p * theta) - q * ser.d_rho(theta=q * theta))
@@ -1,9 +1,11 @@
 """Implements the leftover process under GPS."""
 
-from typing import List
+from math import inf
+from typing import List, Tuple
 
 from nc_server.server import Server
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import intersect_domains, is_array, mask_infeasible, scale_domain
 
 
 class LeftoverGPSPG(Server):
@@ -17,7 +19,15 @@ class LeftoverGPSPG(Server):
         return self.phi_foi_weight * self.ser.sigma(theta=self.phi_foi_weight * theta)
 
     def rho(self, theta):
+        if is_array(theta):
+            return mask_infeasible(self.phi_foi_weight * self.ser.rho(theta=self.phi_foi_weight * theta),
+                                   feasible=self.ser.rho(theta=theta) >= 0,
+                                   fill=-inf)
+
         if self.ser.rho(theta=theta) < 0:
             raise ParameterOutOfBounds("The rhos must be >= 0")
 
         return self.phi_foi_weight * self.ser.rho(theta=self.phi_foi_weight * theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([self.ser.theta_domain(), scale_domain(self.ser.theta_domain(), self.phi_foi_weight)])
@@ -10,3 +10,8 @@ class PerformEnum(Enum):
     OUTPUT = "Output"
     BACKLOG = "Backlog"
     BACKLOG_PROB = "BacklogProb"
+    # natural logarithm of the probability / output bound, evaluated in the
+    # log domain, i.e., it does not overflow for large theta or long tandems
+    LOG_DELAY_PROB = "LogDelayProb"
+    LOG_OUTPUT = "LogOutput"
+    LOG_BACKLOG_PROB = "LogBacklogProb"
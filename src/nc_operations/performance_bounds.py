@@ -2,12 +2,14 @@
 
 import math
 
+import numpy as np
+
 from nc_arrivals.arrival import Arrival
-from nc_operations.get_sigma_rho import get_sigma_rho
+from nc_operations.get_sigma_rho import get_d_sigma_rho, get_sigma_rho
 from nc_operations.stability_check import stability_check
 from nc_server.server import Server
 from utils.exceptions import IllegalArgumentError
-from utils.helper_functions import get_q
+from utils.helper_functions import get_q, is_array, log_one_minus_exp, mask_infeasible
 
 
 def backlog_prob(arr: Arrival, ser: Server, theta: float, backlog_value: float, indep=True, p=1.0) -> float:
@@ -18,6 +20,21 @@ def backlog_prob(arr: Arrival, ser: Server, theta: float, backlog_value: float,
     else:
         q = get_q(p=p)
 
+    if is_array(theta):
+        # element-wise, the stability condition is rho_diff < 0
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = np.exp(-theta * backlog_value) * np.exp(theta * sigma_sum) / (-rho_diff * theta)
+            else:
+                ser_rho_q = ser.rho(theta=q * theta)
+                tau_opt = 1 / (theta * ser_rho_q)
+                res = np.exp(-theta * backlog_value) * np.exp(
+                    theta * (ser_rho_q * tau_opt + sigma_sum)) / (-rho_diff * theta * tau_opt)
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
     stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
     sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
 
@@ -44,11 +61,25 @@ def backlog(arr: Arrival, ser: Server, theta: float, prob_b: float, indep=True,
     else:
         q = get_q(p=p)
 
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = sigma_sum - (np.log(prob_b * theta * (-rho_diff))) / theta
+            else:
+                ser_rho_q = ser.rho(theta=q * theta)
+                tau_opt = 1 / (theta * ser_rho_q)
+                log_part = np.log(prob_b * theta * tau_opt * (-rho_diff))
+                res = tau_opt * ser_rho_q + sigma_sum - log_part / theta
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
     stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
     sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
 
     if arr.is_discrete():
-        return sigma_sum - (log(prob_b * theta * (-rho_diff))) / theta
+        return sigma_sum - (math.log(prob_b * theta * (-rho_diff))) / theta
     else:
         tau_opt = 1 / (theta * ser.rho(theta=q * theta))
         log_part = math.log(prob_b * theta * tau_opt * (-rho_diff))
@@ -63,6 +94,20 @@ def delay_prob(arr: Arrival, ser: Server, theta: float, delay_value: int, indep=
     else:
         q = get_q(p=p)
 
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+        ser_rho_q = ser.rho(theta=q * theta)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = np.exp(-theta * ser_rho_q * delay_value) * np.exp(theta * sigma_sum) / (-rho_diff * theta)
+            else:
+                tau_opt = 1 / (theta * ser_rho_q)
+                res = np.exp(-theta * ser_rho_q * delay_value) * np.exp(
+                    theta * (ser_rho_q * tau_opt + sigma_sum)) / (-rho_diff * theta * tau_opt)
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
     stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
     sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
 
@@ -90,6 +135,21 @@ def delay(arr: Arrival, ser: Server, theta: float, prob_d: float, indep=True, p=
     else:
         q = get_q(p=p)
 
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+        ser_rho_q = ser.rho(theta=q * theta)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                log_part = np.log(prob_d * theta * (-rho_diff))
+                res = (sigma_sum - log_part / theta) / ser_rho_q
+            else:
+                tau_opt = 1 / (theta * ser_rho_q)
+                log_part = np.log(prob_d * theta * tau_opt * (-rho_diff))
+                res = (tau_opt * ser_rho_q + sigma_sum - log_part / theta) / ser_rho_q
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
     stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
     sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
 
@@ -110,6 +170,20 @@ def output(arr: Arrival, ser: Server, theta: float, delta_time: int, indep=True,
     else:
         q = get_q(p=p)
 
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+        arr_rho_p = arr.rho(theta=p * theta)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = np.exp(theta * arr_rho_p * delta_time) * np.exp(
+                    theta * sigma_sum) / (1 - np.exp(theta * rho_diff))
+            else:
+                res = np.exp(theta * arr_rho_p *
+                             (delta_time + 1)) * np.exp(theta * sigma_sum) / (1 - np.exp(theta * rho_diff))
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
     stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
     sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
 
@@ -124,3 +198,189 @@ def output(arr: Arrival, ser: Server, theta: float, delta_time: int, indep=True,
 
     except ZeroDivisionError:
         return math.inf
+
+
+def log_backlog_prob(arr: Arrival, ser: Server, theta: float, backlog_value: float, indep=True, p=1.0) -> float:
+    """Natural logarithm of backlog_prob, evaluated in the log domain"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = -theta * backlog_value + theta * sigma_sum - np.log(-rho_diff * theta)
+            else:
+                # theta * ser_rho_q * tau_opt = 1
+                tau_opt = 1 / (theta * ser.rho(theta=q * theta))
+                res = -theta * backlog_value + 1.0 + theta * sigma_sum - np.log(-rho_diff * theta * tau_opt)
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    try:
+        if arr.is_discrete():
+            return -theta * backlog_value + theta * sigma_sum - math.log(-rho_diff * theta)
+        else:
+            tau_opt = 1 / (theta * ser.rho(theta=q * theta))
+            return -theta * backlog_value + 1.0 + theta * sigma_sum - math.log(-rho_diff * theta * tau_opt)
+
+    except ZeroDivisionError:
+        return math.inf
+
+
+def log_delay_prob(arr: Arrival, ser: Server, theta: float, delay_value: int, indep=True, p=1.0) -> float:
+    """Natural logarithm of delay_prob, evaluated in the log domain"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+        ser_rho_q = ser.rho(theta=q * theta)
+
+        with np.errstate(all="ignore"):
+            if arr.is_discrete():
+                res = -theta * ser_rho_q * delay_value + theta * sigma_sum - np.log(-rho_diff * theta)
+            else:
+                tau_opt = 1 / (theta * ser_rho_q)
+                res = -theta * ser_rho_q * delay_value + 1.0 + theta * sigma_sum - np.log(
+                    -rho_diff * theta * tau_opt)
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    try:
+        if arr.is_discrete():
+            return -theta * ser.rho(theta=q * theta) * delay_value + theta * sigma_sum - math.log(-rho_diff * theta)
+        else:
+            tau_opt = 1 / (theta * ser.rho(theta=q * theta))
+            return -theta * ser.rho(theta=q * theta) * delay_value + 1.0 + theta * sigma_sum - math.log(
+                -rho_diff * theta * tau_opt)
+
+    except ZeroDivisionError:
+        return math.inf
+
+
+def log_output(arr: Arrival, ser: Server, theta: float, delta_time: int, indep=True, p=1.0) -> float:
+    """Natural logarithm of output, evaluated in the log domain"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if arr.is_discrete():
+        time_factor = delta_time
+    else:
+        time_factor = delta_time + 1
+
+    if is_array(theta):
+        sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+        with np.errstate(all="ignore"):
+            res = theta * arr.rho(theta=p * theta) * time_factor + theta * sigma_sum - log_one_minus_exp(
+                theta * rho_diff)
+
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    return theta * arr.rho(theta=p * theta) * time_factor + theta * sigma_sum - log_one_minus_exp(theta * rho_diff)
+
+
+def d_log_backlog_prob(arr: Arrival, ser: Server, theta: float, backlog_value: float, indep=True, p=1.0) -> float:
+    """Derivative of log_backlog_prob with respect to theta"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if not is_array(theta):
+        stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    d_sigma_sum, d_rho_diff = get_d_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    with np.errstate(all="ignore"):
+        res = -backlog_value + sigma_sum + theta * d_sigma_sum - d_rho_diff / rho_diff
+        if arr.is_discrete():
+            res = res - 1 / theta
+        else:
+            res = res + q * ser.d_rho(theta=q * theta) / ser.rho(theta=q * theta)
+
+    if is_array(theta):
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    return float(res)
+
+
+def d_log_delay_prob(arr: Arrival, ser: Server, theta: float, delay_value: int, indep=True, p=1.0) -> float:
+    """Derivative of log_delay_prob with respect to theta"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if not is_array(theta):
+        stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    d_sigma_sum, d_rho_diff = get_d_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    ser_rho_q = ser.rho(theta=q * theta)
+    d_ser_rho_q = q * ser.d_rho(theta=q * theta)
+
+    with np.errstate(all="ignore"):
+        res = -(ser_rho_q + theta * d_ser_rho_q) * delay_value + sigma_sum + theta * d_sigma_sum - d_rho_diff / rho_diff
+        if arr.is_discrete():
+            res = res - 1 / theta
+        else:
+            res = res + d_ser_rho_q / ser_rho_q
+
+    if is_array(theta):
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    return float(res)
+
+
+def d_log_output(arr: Arrival, ser: Server, theta: float, delta_time: int, indep=True, p=1.0) -> float:
+    """Derivative of log_output with respect to theta"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    if arr.is_discrete():
+        time_factor = delta_time
+    else:
+        time_factor = delta_time + 1
+
+    if not is_array(theta):
+        stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    d_sigma_sum, d_rho_diff = get_d_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    with np.errstate(all="ignore"):
+        # d/dx -log(1 - e^x) = 1 / (e^(-x) - 1)
+        res = ((arr.rho(theta=p * theta) + theta * p * arr.d_rho(theta=p * theta)) * time_factor + sigma_sum +
+               theta * d_sigma_sum + (rho_diff + theta * d_rho_diff) / np.expm1(-theta * rho_diff))
+
+    if is_array(theta):
+        return mask_infeasible(res, feasible=rho_diff < 0)
+
+    return float(res)
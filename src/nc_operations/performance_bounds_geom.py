@@ -5,7 +5,7 @@ import math
 from nc_arrivals.arrival import Arrival
 from nc_server.server import Server
 from utils.exceptions import IllegalArgumentError
-from utils.helper_functions import get_q
+from utils.helper_functions import get_q, log_one_minus_exp
 
 from nc_operations.get_sigma_rho import get_sigma_rho
 from nc_operations.stability_check import stability_check
@@ -102,3 +102,50 @@ def delay_geom(arr: Arrival, ser: Server, theta: float, prob_d: float, indep=Tru
         tau_opt = math.log(arr.rho(theta=p * theta) / ser.rho(theta=q * theta)) / (theta * rho_diff)
         log_part = math.log(prob_d * (1 - math.exp(theta * tau_opt * rho_diff)))
         return (tau_opt * arr.rho(theta=p * theta) + sigma_sum - log_part / theta) / ser.rho(theta=q * theta)
+
+
+def log_backlog_prob_geom(arr: Arrival, ser: Server, theta: float, backlog_value: float, indep=True, p=1.0) -> float:
+    """Natural logarithm of backlog_prob_geom, evaluated in the log domain"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    try:
+        if arr.is_discrete():
+            return -theta * backlog_value + theta * sigma_sum - log_one_minus_exp(theta * rho_diff)
+        else:
+            tau_opt = math.log(arr.rho(theta=p * theta) / ser.rho(theta=q * theta)) / (theta * rho_diff)
+            return -theta * backlog_value + theta * (arr.rho(theta=p * theta) * tau_opt +
+                                                     sigma_sum) - log_one_minus_exp(theta * tau_opt * rho_diff)
+
+    except ZeroDivisionError:
+        return math.inf
+
+
+def log_delay_prob_geom(arr: Arrival, ser: Server, theta: float, delay_value: int, indep=True, p=1.0) -> float:
+    """Natural logarithm of delay_prob_geom, evaluated in the log domain"""
+    if indep:
+        p = 1.0
+        q = 1.0
+    else:
+        q = get_q(p=p)
+
+    stability_check(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+    sigma_sum, rho_diff = get_sigma_rho(arr=arr, ser=ser, theta=theta, indep=indep, p=p, q=q)
+
+    try:
+        if arr.is_discrete():
+            return -theta * ser.rho(theta=q * theta) * delay_value + theta * sigma_sum - log_one_minus_exp(
+                theta * rho_diff)
+        else:
+            tau_opt = math.log(arr.rho(theta=p * theta) / ser.rho(theta=q * theta)) / (theta * rho_diff)
+            return -theta * ser.rho(theta=q * theta) * delay_value + theta * (
+                arr.rho(theta=p * theta) * tau_opt + sigma_sum) - log_one_minus_exp(theta * tau_opt * rho_diff)
+
+    except ZeroDivisionError:
+        return math.inf
@@ -8,6 +8,7 @@ import scipy.special
 from nc_server.constant_rate_server import ConstantRateServer
 from nc_server.rate_latency_server import RateLatencyServer
 from utils.exceptions import ParameterOutOfBounds
+from utils.helper_functions import log_binom, log_one_minus_exp, log_zeta
 from utils.perform_parameter import PerformParameter
 
 from nc_operations.e2e_enum import E2EEnum
@@ -69,7 +70,7 @@ def pmoo_tandem_bound(foi: Flow,
         if res_rate_with_foi <= 0:
             raise ParameterOutOfBounds("Stability condition is violated")
 
-    factor_not_on_foi = 1.0
+    log_factor_not_on_foi = 0.0
 
     if ser_not_on_foi_path is not None:
         residual_rate_not_on_foi_list = [0.0] * len(ser_not_on_foi_path)
@@ -89,28 +90,38 @@ def pmoo_tandem_bound(foi: Flow,
             if res_rate_not_foi <= 0:
                 raise ParameterOutOfBounds("Stability condition is violated")
 
-            factor_not_on_foi = 1.0 / (1 - math.exp(-theta * res_rate_not_foi))
+            log_factor_not_on_foi = -log_one_minus_exp(-theta * res_rate_not_foi)
 
     if e2e_enum == E2EEnum.ARR_RATE:
-        gamma = 1.0 * factor_not_on_foi
+        # the product of the geometric factors is summed up in the log domain
+        log_gamma = log_factor_not_on_foi
 
         for residual_rate_with_foi in residual_rate_with_foi_list:
-            gamma *= 1 / (1 - math.exp(-theta * residual_rate_with_foi))
+            log_gamma -= log_one_minus_exp(-theta * residual_rate_with_foi)
 
         if perform_param.perform_metric == PerformEnum.BACKLOG_PROB:
-            return math.exp(-theta * perform_param.value) * math.exp(theta * sigma_sum) * gamma
+            return math.exp(-theta * perform_param.value + theta * sigma_sum + log_gamma)
+
+        elif perform_param.perform_metric == PerformEnum.LOG_BACKLOG_PROB:
+            return -theta * perform_param.value + theta * sigma_sum + log_gamma
 
         elif perform_param.perform_metric == PerformEnum.BACKLOG:
-            return (theta * sigma_sum + math.log(gamma / perform_param.value)) / theta
+            return (theta * sigma_sum + log_gamma - math.log(perform_param.value)) / theta
 
         elif perform_param.perform_metric == PerformEnum.DELAY_PROB:
-            return math.exp(-theta * foi_rate * perform_param.value) * math.exp(theta * sigma_sum) * gamma
+            return math.exp(-theta * foi_rate * perform_param.value + theta * sigma_sum + log_gamma)
+
+        elif perform_param.perform_metric == PerformEnum.LOG_DELAY_PROB:
+            return -theta * foi_rate * perform_param.value + theta * sigma_sum + log_gamma
 
         elif perform_param.perform_metric == PerformEnum.DELAY:
-            return (theta * sigma_sum + math.log(gamma / perform_param.value)) / (theta * foi_rate)
+            return (theta * sigma_sum + log_gamma - math.log(perform_param.value)) / (theta * foi_rate)
 
         elif perform_param.perform_metric == PerformEnum.OUTPUT:
-            return math.exp(theta * foi_rate * perform_param.value) * math.exp(theta * sigma_sum) * gamma
+            return math.exp(theta * foi_rate * perform_param.value + theta * sigma_sum + log_gamma)
+
+        elif perform_param.perform_metric == PerformEnum.LOG_OUTPUT:
+            return theta * foi_rate * perform_param.value + theta * sigma_sum + log_gamma
 
         else:
             raise NotImplementedError(f"{perform_param.perform_metric} is an infeasible " f"performance metric")
@@ -122,22 +133,25 @@ def pmoo_tandem_bound(foi: Flow,
         q = math.exp(-theta * min_residual_rate_with_foi)
         d_lower = len(ser_on_foi_path) * q / (1 - q)
 
-        if perform_param.perform_metric == PerformEnum.DELAY_PROB:
+        if perform_param.perform_metric in (PerformEnum.DELAY_PROB, PerformEnum.LOG_DELAY_PROB):
             if perform_param.value >= d_lower:
                 T_over_n = perform_param.value / len(ser_on_foi_path)
-                zeta = (1 + T_over_n)**(1 + T_over_n) / (T_over_n**T_over_n)
 
-                return math.exp(-theta * min_residual_rate * perform_param.value) * math.exp(
-                    theta * sigma_sum) * (zeta**len(ser_on_foi_path)) * factor_not_on_foi
+                log_delay_prob = -theta * min_residual_rate * perform_param.value + theta * sigma_sum + len(
+                    ser_on_foi_path) * log_zeta(T_over_n) + log_factor_not_on_foi
+
+                if perform_param.perform_metric == PerformEnum.LOG_DELAY_PROB:
+                    return log_delay_prob
+
+                return math.exp(log_delay_prob)
             else:
                 raise ParameterOutOfBounds("Zeta condition is violated")
 
         elif perform_param.perform_metric == PerformEnum.DELAY:
             T_over_n = d_lower / len(ser_on_foi_path)
-            zeta = (1 + T_over_n)**(1 + T_over_n) / (T_over_n**T_over_n)
 
-            delay_bound = (theta * sigma_sum + math.log(1 / perform_param.value) + len(ser_on_foi_path) * math.log(zeta)
-                           + math.log(factor_not_on_foi)) / (theta * min_residual_rate)
+            delay_bound = (theta * sigma_sum + math.log(1 / perform_param.value) + len(ser_on_foi_path) *
+                           log_zeta(T_over_n) + log_factor_not_on_foi) / (theta * min_residual_rate)
 
             if delay_bound >= d_lower:
                 return delay_bound
@@ -151,7 +165,7 @@ def pmoo_tandem_bound(foi: Flow,
         min_residual_rate = min(residual_rate_list)
         dominating_pole_index = residual_rate_list.index(min(residual_rate_list))
 
-        gamma = 1.0
+        log_gamma = 0.0
 
         for index, residual_rate in enumerate(residual_rate_list):
             if index is not dominating_pole_index:
@@ -163,17 +177,20 @@ def pmoo_tandem_bound(foi: Flow,
                     min_residual_rate -= delta
                     rate_diff = residual_rate - min_residual_rate
 
-                gamma *= 1 / (1 - math.exp(-theta * rate_diff))
+                log_gamma -= log_one_minus_exp(-theta * rate_diff)
 
         min_residual_rate_with_foi = min_residual_rate - foi_rate
-        gamma *= 1 / (1 - math.exp(-theta * min_residual_rate_with_foi))
-        gamma *= factor_not_on_foi
+        log_gamma -= log_one_minus_exp(-theta * min_residual_rate_with_foi)
+        log_gamma += log_factor_not_on_foi
 
         if perform_param.perform_metric == PerformEnum.DELAY_PROB:
-            return math.exp(-theta * min_residual_rate * perform_param.value) * math.exp(theta * sigma_sum) * gamma
+            return math.exp(-theta * min_residual_rate * perform_param.value + theta * sigma_sum + log_gamma)
+
+        elif perform_param.perform_metric == PerformEnum.LOG_DELAY_PROB:
+            return -theta * min_residual_rate * perform_param.value + theta * sigma_sum + log_gamma
 
         elif perform_param.perform_metric == PerformEnum.DELAY:
-            return (theta * sigma_sum + math.log(gamma / perform_param.value)) / (theta * min_residual_rate)
+            return (theta * sigma_sum + log_gamma - math.log(perform_param.value)) / (theta * min_residual_rate)
 
         else:
             raise NotImplementedError(f"{perform_param.perform_metric} is an infeasible " f"performance metric")
@@ -182,42 +199,51 @@ def pmoo_tandem_bound(foi: Flow,
         min_residual_rate = min(residual_rate_list)
         min_residual_rate_with_foi = min_residual_rate - foi_rate
 
-        gamma = 1.0
+        log_gamma = 0.0
         k = 0
 
         for index, residual_rate in enumerate(residual_rate_list):
             rate_diff = residual_rate - min_residual_rate
             if rate_diff > 0:
                 rate_diff = residual_rate - min_residual_rate
-                gamma *= 1 / (1 - math.exp(-theta * rate_diff))
+                log_gamma -= log_one_minus_exp(-theta * rate_diff)
             else:
                 k += 1
 
-        factor = 0.0
-        for i in range(k):
-            factor += scipy.special.binom(perform_param.value + 1 + k - i - 2, perform_param.value + 1 - 1) / (
-                (1 - math.exp(-theta * min_residual_rate_with_foi))**(i + 1))
+        if k == 0:
+            # empty sum
+            log_factor = -math.inf
+        else:
+            log_factor = scipy.special.logsumexp([
+                log_binom(perform_param.value + 1 + k - i - 2, perform_param.value + 1 - 1) -
+                (i + 1) * log_one_minus_exp(-theta * min_residual_rate_with_foi) for i in range(k)
+            ])
 
-        gamma *= factor_not_on_foi
+        log_gamma += log_factor_not_on_foi
+
+        log_delay_prob = -theta * min_residual_rate * (
+            perform_param.value + 1) + theta * foi_rate + theta * sigma_sum + log_gamma + log_factor
 
         if perform_param.perform_metric == PerformEnum.DELAY_PROB:
-            return math.exp(-theta * min_residual_rate * (perform_param.value + 1)) * math.exp(
-                theta * foi_rate) * math.exp(theta * sigma_sum) * gamma * factor
+            return math.exp(log_delay_prob)
+
+        elif perform_param.perform_metric == PerformEnum.LOG_DELAY_PROB:
+            return log_delay_prob
 
         elif perform_param.perform_metric == PerformEnum.DELAY:
-            target_delay_prob = perform_param.value
+            log_target_delay_prob = math.log(perform_param.value)
 
             def helper_function(delay: float) -> float:
-                perform_delay = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=delay)
-                current_delay_prob = pmoo_tandem_bound(foi=foi,
-                                                       cross_flows_on_foi_path=cross_flows_on_foi_path,
-                                                       ser_on_foi_path=ser_on_foi_path,
-                                                       theta=theta,
-                                                       perform_param=perform_delay,
-                                                       e2e_enum=e2e_enum,
-                                                       indep=indep)
+                perform_delay = PerformParameter(perform_metric=PerformEnum.LOG_DELAY_PROB, value=delay)
+                current_log_delay_prob = pmoo_tandem_bound(foi=foi,
+                                                           cross_flows_on_foi_path=cross_flows_on_foi_path,
+                                                           ser_on_foi_path=ser_on_foi_path,
+                                                           theta=theta,
+                                                           perform_param=perform_delay,
+                                                           e2e_enum=e2e_enum,
+                                                           indep=indep)
 
-                return target_delay_prob - current_delay_prob
+                return log_target_delay_prob - current_log_delay_prob
 
             res = scipy.optimize.bisect(helper_function, a=1e-6, b=1e5, full_output=True)
             return res[0]
@@ -275,7 +301,7 @@ def pmoo_tandem_bound_mixed(foi: Flow,
     min_residual_rate = min(residual_rate_list)
 
     min_residual_rate_with_foi = min_residual_rate - foi_rate
-    gamma = 1 / (1 - math.exp(-theta * min_residual_rate_with_foi))
+    log_gamma = -log_one_minus_exp(-theta * min_residual_rate_with_foi)
 
     # if perform_param.perform_metric == PerformEnum.BACKLOG_PROB:
     #     return  math.exp(-theta * perform_param.value) *  math.exp(
@@ -289,7 +315,7 @@ def pmoo_tandem_bound_mixed(foi: Flow,
     #         theta * sigma_sum) * gamma
 
     if perform_param.perform_metric == PerformEnum.DELAY:
-        return (theta * foi.arr.sigma(theta=theta) + len(ser_list) * math.log(gamma) - math.log(
+        return (theta * foi.arr.sigma(theta=theta) + len(ser_list) * log_gamma - math.log(
             perform_param.value)) / (theta * foi.arr.rho(theta=theta)) + burst_cross_sum / min_residual_rate
 
     # elif perform_param.perform_metric == PerformEnum.OUTPUT:
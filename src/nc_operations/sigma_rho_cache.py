@@ -0,0 +1,147 @@
+"""Opt-in memoization of sigma / rho per (object, theta)."""
+
+from collections import OrderedDict
+from functools import wraps
+from typing import List, Set, Tuple
+
+from nc_arrivals.arrival import Arrival
+from nc_server.server import Server
+from utils.exceptions import IllegalArgumentError
+
+MAX_SIZE = 10000
+
+_NO_THETA = object()
+
+
+def _all_subclasses(cls: type) -> List[type]:
+    res = []
+    for subclass in cls.__subclasses__():
+        res.append(subclass)
+        res += _all_subclasses(subclass)
+
+    return res
+
+
+class SigmaRhoCache(object):
+    """
+    While active, sigma(theta) and rho(theta) of all arrivals, servers and
+    operators are evaluated only once per (object, theta). Setting an
+    attribute of an object that is already cached, e.g., the Hoelder p in
+    EvaluationPlan.bind(), clears the cache, as the values of all operators
+    above it change as well. Usage:
+
+        with SigmaRhoCache() as cache:
+            Optimize(setting=setting, number_param=2).grid_search(...)
+        print(cache.hit_rate)
+
+    Least recently used entries are evicted, so objects of previous
+    optimizer points do not accumulate. Arrays of theta and raised
+    exceptions are not cached. Classes defined after entering the context
+    are not affected.
+    """
+    _active = False
+
+    def __init__(self, max_size=MAX_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # the values hold strong references, i.e., the ids stay unique
+        self._cache: OrderedDict = OrderedDict()
+        self._cached_ids: Set[int] = set()
+        self._originals: List[Tuple[type, str, object]] = []
+
+    def __enter__(self):
+        if SigmaRhoCache._active:
+            raise IllegalArgumentError("another SigmaRhoCache is already active")
+
+        SigmaRhoCache._active = True
+
+        for cls in set(_all_subclasses(Arrival) + _all_subclasses(Server)):
+            for name in ("sigma", "rho"):
+                method = cls.__dict__.get(name)
+                if method is None or getattr(method, "__isabstractmethod__", False):
+                    continue
+
+                self._originals.append((cls, name, method))
+                setattr(cls, name, self._wrap(method))
+
+        for cls in (Arrival, Server):
+            self._originals.append((cls, "__setattr__", cls.__dict__.get("__setattr__")))
+            cls.__setattr__ = self._invalidating_setattr()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        for cls, name, method in self._originals:
+            if method is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, method)
+
+        self._originals = []
+        self.clear()
+        SigmaRhoCache._active = False
+
+    def _wrap(self, method):
+        cache = self._cache
+        cached_ids = self._cached_ids
+
+        @wraps(method)
+        def cached_method(obj, theta=_NO_THETA):
+            if theta is _NO_THETA:
+                return method(obj)
+
+            key = (method, id(obj), theta)
+            try:
+                _, res = cache[key]
+            except KeyError:
+                self.misses += 1
+                res = method(obj, theta)
+                cache[key] = (obj, res)
+                cached_ids.add(id(obj))
+                if len(cache) > self.max_size:
+                    cache.popitem(last=False)
+
+                return res
+            except TypeError:
+                # arrays are unhashable and evaluated element-wise anyway
+                return method(obj, theta)
+
+            self.hits += 1
+            cache.move_to_end(key)
+
+            return res
+
+        return cached_method
+
+    def _invalidating_setattr(self):
+        cached_ids = self._cached_ids
+
+        def invalidating_setattr(obj, name, value):
+            object.__setattr__(obj, name, value)
+
+            if id(obj) in cached_ids and name not in ("sigma", "rho"):
+                self.clear()
+
+        return invalidating_setattr
+
+    def clear(self) -> None:
+        """Removes all entries, e.g., between two optimizer points"""
+        self._cache.clear()
+        self._cached_ids.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: fraction of the sigma / rho calls answered by the cache
+        """
+        if self.hits + self.misses == 0:
+            return 0.0
+
+        return self.hits / (self.hits + self.misses)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __str__(self) -> str:
+        return f"SigmaRhoCache_hits={self.hits}_misses={self.misses}_hit_rate={self.hit_rate:.3f}"
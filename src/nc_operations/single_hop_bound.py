@@ -5,11 +5,18 @@ from nc_arrivals.regulated_arrivals import DetermTokenBucket
 from nc_operations.aggregate import AggregateHomogeneous
 from nc_operations.dnc_delay import dnc_delay
 from nc_operations.perform_enum import PerformEnum
-from nc_operations.performance_bounds import (backlog, backlog_prob, delay,
-                                              delay_prob, output)
+from nc_operations.performance_bounds import (backlog, backlog_prob,
+                                              d_log_backlog_prob,
+                                              d_log_delay_prob, d_log_output,
+                                              delay, delay_prob,
+                                              log_backlog_prob,
+                                              log_delay_prob, log_output,
+                                              output)
 from nc_operations.performance_bounds_geom import (backlog_geom,
                                                    backlog_prob_geom,
-                                                   delay_geom, delay_prob_geom)
+                                                   delay_geom, delay_prob_geom,
+                                                   log_backlog_prob_geom,
+                                                   log_delay_prob_geom)
 from nc_server.rate_latency_server import RateLatencyServer
 from nc_server.server import Server
 from utils.exceptions import IllegalArgumentError
@@ -106,11 +113,99 @@ def single_hop_bound(foi: Arrival,
                           indep=indep,
                           p=p)
 
+        case PerformEnum.LOG_BACKLOG_PROB:
+            if geom_series:
+                return log_backlog_prob_geom(arr=foi,
+                                             ser=s_e2e,
+                                             theta=theta,
+                                             backlog_value=perform_param.value,
+                                             indep=indep,
+                                             p=p)
+
+            else:
+                return log_backlog_prob(arr=foi,
+                                        ser=s_e2e,
+                                        theta=theta,
+                                        backlog_value=perform_param.value,
+                                        indep=indep,
+                                        p=p)
+
+        case PerformEnum.LOG_DELAY_PROB:
+            if geom_series:
+                return log_delay_prob_geom(arr=foi,
+                                           ser=s_e2e,
+                                           theta=theta,
+                                           delay_value=perform_param.value,
+                                           indep=indep,
+                                           p=p)
+
+            return log_delay_prob(arr=foi,
+                                  ser=s_e2e,
+                                  theta=theta,
+                                  delay_value=perform_param.value,
+                                  indep=indep,
+                                  p=p)
+
+        case PerformEnum.LOG_OUTPUT:
+            return log_output(arr=foi,
+                              ser=s_e2e,
+                              theta=theta,
+                              delta_time=perform_param.value,
+                              indep=indep,
+                              p=p)
+
         case _:
             raise IllegalArgumentError(f"{perform_param.perform_metric} is an "
                                        f"infeasible performance metric")
 
 
+def d_log_single_hop_bound(foi: Arrival,
+                           s_e2e: Server,
+                           theta: float,
+                           perform_param: PerformParameter,
+                           indep=True,
+                           p=1.0,
+                           geom_series=False) -> float:
+    """
+    Derivative of the logarithm of single_hop_bound with respect to theta
+    (i.e., of single_hop_bound itself for the LOG_ metrics). Only the
+    probability and output bounds are covered.
+    """
+    if indep:
+        p = 1.0
+
+    if geom_series:
+        raise NotImplementedError("derivatives of the geometric series bounds are not implemented")
+
+    match perform_param.perform_metric:
+        case PerformEnum.BACKLOG_PROB | PerformEnum.LOG_BACKLOG_PROB:
+            return d_log_backlog_prob(arr=foi,
+                                      ser=s_e2e,
+                                      theta=theta,
+                                      backlog_value=perform_param.value,
+                                      indep=indep,
+                                      p=p)
+
+        case PerformEnum.DELAY_PROB | PerformEnum.LOG_DELAY_PROB:
+            return d_log_delay_prob(arr=foi,
+                                    ser=s_e2e,
+                                    theta=theta,
+                                    delay_value=perform_param.value,
+                                    indep=indep,
+                                    p=p)
+
+        case PerformEnum.OUTPUT | PerformEnum.LOG_OUTPUT:
+            return d_log_output(arr=foi,
+                                ser=s_e2e,
+                                theta=theta,
+                                delta_time=perform_param.value,
+                                indep=indep,
+                                p=p)
+
+        case _:
+            raise NotImplementedError(f"derivative of {perform_param.perform_metric} is not implemented")
+
+
 def single_hop_homog_agg(foi_arr_single: Arrival,
                          n: int,
                          s_e2e: Server,
@@ -1,10 +1,11 @@
 """Single server topology class"""
 
-from typing import List
+from typing import List, Tuple
 
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_operations.single_hop_bound import single_hop_bound
 from nc_server.server import Server
+from utils.helper_functions import intersect_domains
 from utils.perform_parameter import PerformParameter
 from utils.setting import Setting
 
@@ -50,3 +51,6 @@ class SingleServerBandwidth(Setting):
 
     def approximate_utilization(self) -> float:
         raise NotImplementedError("this method cannot be called")
+
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([self.foi.theta_domain(), self.s_e2e.theta_domain()])
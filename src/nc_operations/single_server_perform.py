@@ -1,13 +1,14 @@
 """Single server topology class"""
 
-from typing import List
+from typing import List, Tuple
 
 from nc_arrivals.arrival_distribution import ArrivalDistribution
 from nc_arrivals.iid import DM1
 from nc_operations.perform_enum import PerformEnum
-from nc_operations.single_hop_bound import single_hop_bound
+from nc_operations.single_hop_bound import d_log_single_hop_bound, single_hop_bound
 from nc_server.constant_rate_server import ConstantRateServer
 from nc_server.server_distribution import ServerDistribution
+from utils.helper_functions import intersect_domains
 from utils.perform_parameter import PerformParameter
 from utils.setting import Setting
 
@@ -51,9 +52,28 @@ class SingleServerPerform(Setting):
                                 p=p,
                                 geom_series=self.geom_series)
 
+    def d_log_standard_bound(self, param_list: List[float]) -> float:
+        theta = param_list[0]
+
+        if self.indep:
+            p = 1.0
+        else:
+            p = param_list[1]
+
+        return d_log_single_hop_bound(foi=self.foi,
+                                      s_e2e=self.server,
+                                      theta=theta,
+                                      perform_param=self.perform_param,
+                                      indep=self.indep,
+                                      p=p,
+                                      geom_series=self.geom_series)
+
     def approximate_utilization(self) -> float:
         return self.foi.average_rate() / self.server.average_rate()
 
+    def theta_domain(self) -> Tuple[float, float]:
+        return intersect_domains([self.foi.theta_domain(), self.server.theta_domain()])
+
     def to_string(self) -> str:
         return self.to_name() + "_" + self.foi.to_value() + self.perform_param.__str__()
 
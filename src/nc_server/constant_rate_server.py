@@ -1,6 +1,10 @@
 """Implemented service classes for different distributions"""
 
+import numpy as np
+
 from nc_server.rate_latency_server import RateLatencyServer
+from utils.batch import Batch
+from utils.helper_functions import broadcast_like
 
 
 class ConstantRateServer(RateLatencyServer):
@@ -10,10 +14,10 @@ class ConstantRateServer(RateLatencyServer):
         super().__init__(rate=rate, latency=0.0)
 
     def sigma(self, theta=0.0) -> float:
-        return 0.0
+        return broadcast_like(theta, 0.0)
 
     def rho(self, theta: float) -> float:
-        return self.rate
+        return broadcast_like(theta, self.rate)
 
     def average_rate(self) -> float:
         return self.rate
@@ -26,3 +30,13 @@ class ConstantRateServer(RateLatencyServer):
 
     def to_value(self, number=1):
         return f"rate{str(number)}={str(self.rate)}"
+
+
+class ConstantRateServerBatch(Batch, ConstantRateServer):
+    """Constant rate service with one rate per Monte Carlo row"""
+
+    def __init__(self, rate: np.ndarray) -> None:
+        super().__init__(rate=np.asarray(rate, dtype=float))
+
+    def __getitem__(self, index: int) -> ConstantRateServer:
+        return ConstantRateServer(rate=self.rate[index])
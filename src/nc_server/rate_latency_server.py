@@ -1,6 +1,7 @@
 """Implemented service classes for different distributions"""
 
 from nc_server.server_distribution import ServerDistribution
+from utils.helper_functions import broadcast_like
 
 
 class RateLatencyServer(ServerDistribution):
@@ -11,10 +12,16 @@ class RateLatencyServer(ServerDistribution):
         self.latency = latency
 
     def sigma(self, theta: float) -> float:
-        return self.latency * self.rate
+        return broadcast_like(theta, self.latency * self.rate)
 
     def rho(self, theta: float) -> float:
-        return self.rate
+        return broadcast_like(theta, self.rate)
+
+    def d_sigma(self, theta: float) -> float:
+        return broadcast_like(theta, 0.0)
+
+    def d_rho(self, theta: float) -> float:
+        return broadcast_like(theta, 0.0)
 
     def average_rate(self) -> float:
         return self.rate
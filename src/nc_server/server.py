@@ -1,10 +1,19 @@
 """Implemented service class"""
 
 from abc import abstractmethod, ABC
+from math import inf
+from typing import Tuple
+
+from utils.helper_functions import central_difference
 
 
 class Server(ABC):
-    """Abstract Server class"""
+    """Abstract Server class
+
+    sigma and rho also accept a NumPy array of thetas. They are then evaluated
+    element-wise and infeasible entries are masked (see mask_infeasible)
+    instead of raising ParameterOutOfBounds.
+    """
 
     @abstractmethod
     def sigma(self, theta: float) -> float:
@@ -15,3 +24,20 @@ class Server(ABC):
     def rho(self, theta: float) -> float:
         """Rho method"""
         pass
+
+    def d_sigma(self, theta: float) -> float:
+        """Derivative of sigma with respect to theta (numerical, unless an
+        analytic derivative is implemented)"""
+        return central_difference(self.sigma, theta)
+
+    def d_rho(self, theta: float) -> float:
+        """Derivative of rho with respect to theta (numerical, unless an
+        analytic derivative is implemented)"""
+        return central_difference(self.rho, theta)
+
+    def theta_domain(self) -> Tuple[float, float]:
+        """
+        :return: open interval of theta outside of which sigma or rho raise
+                 ParameterOutOfBounds (stability is not taken into account)
+        """
+        return 0.0, inf
@@ -0,0 +1,236 @@
+"""Optimize theta and all other parameters of all Monte Carlo rows at once"""
+
+from math import inf
+from typing import List, Optional
+
+import numpy as np
+
+from optimization.optimization_result import OptimizationResult
+from optimization.optimize import has_log_objective
+from utils.batch import number_rows, take_rows
+from utils.exceptions import IllegalArgumentError
+from utils.setting import Setting
+
+
+class BatchOptimize(object):
+    """
+    Lock-step counterpart of Optimize for a setting built from batches (see
+    utils.batch). One optimizer state is kept per Monte Carlo row and the
+    candidate points of all rows are evaluated in one vectorized bound call.
+    Converged rows are retired, i.e., the setting is restricted to the
+    remaining rows.
+
+    The results are OptimizationResults with one row of opt_x and one
+    obj_value per Monte Carlo row.
+
+    As in Optimize, the logarithm of probability and output bounds is
+    minimized if log_objective is True.
+    """
+    def __init__(self, setting: Setting, number_param: int, log_objective=True) -> None:
+        self.setting = setting
+        self.number_param = number_param
+        self.log_objective = log_objective
+
+    def uses_log_objective(self) -> bool:
+        """
+        :return: True if the optimizers minimize the logarithm of eval_batch
+        """
+        return self.log_objective and has_log_objective(setting=self.setting)
+
+    def to_bound(self, obj_value: np.ndarray) -> np.ndarray:
+        """
+        :param obj_value: minimized objective of every row
+        :return:          corresponding bound of every row
+        """
+        if not self.uses_log_objective():
+            return obj_value
+
+        with np.errstate(over="ignore"):
+            return np.exp(obj_value)
+
+    def bound(self, setting: Setting, param_list: List[np.ndarray]) -> np.ndarray:
+        """
+        :param setting:    batched setting (possibly restricted to some rows)
+        :param param_list: theta and other parameters, one array each
+        :return:           element-wise evaluated bound
+        """
+        return setting.standard_bound(param_list=param_list)
+
+    def eval_batch(self, setting: Setting, param_array: np.ndarray) -> np.ndarray:
+        """
+        Counterpart of eval_except.
+
+        :param setting:     batched setting (possibly restricted to some rows)
+        :param param_array: candidate points, the last axis are the
+                            parameters and the one before are the rows
+        :return:            bound of every candidate point, inf if infeasible
+        """
+        with np.errstate(all="ignore"):
+            values = self.bound(setting=setting,
+                                param_list=[param_array[..., j] for j in range(self.number_param)])
+
+        values = np.broadcast_to(values, param_array.shape[:-1])
+
+        if self.uses_log_objective():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.log(values)
+
+        return np.where(np.isnan(values), inf, values)
+
+    def pattern_search(self, start_list: List[float], delta=3.0, delta_min=0.01) -> OptimizationResult:
+        """
+        Same iterations as Optimize.pattern_search for every row.
+
+        :param start_list: list of starting values (used for every row)
+        :param delta:      initial step length
+        :param delta_min:  final step length
+        :return:           optimized standard_bound of every row
+        """
+        if len(start_list) != self.number_param:
+            raise IllegalArgumentError(f"Number of parameters {len(start_list)} is wrong, "
+                                       f"should be {self.number_param} instead")
+
+        setting = self.setting
+        rows = np.arange(number_rows(setting))
+
+        param_list = np.tile(np.asarray(start_list, dtype=float), (rows.shape[0], 1))
+        param_new = param_list.copy()
+        optimum_current = self.eval_batch(setting=setting, param_array=param_list)
+        optimum_new = optimum_current.copy()
+        delta = np.full(rows.shape[0], float(delta))
+
+        opt_x = param_list.copy()
+        obj_value = optimum_current.copy()
+
+        while rows.shape[0] > 0:
+            for index in range(self.number_param):
+                value = param_list[:, index]
+
+                candidates = np.stack([param_new, param_new])
+                candidates[0, :, index] = value + delta
+                candidates[1, :, index] = value - delta
+                candidate_plus, candidate_minus = self.eval_batch(setting=setting, param_array=candidates)
+
+                # as in the scalar version, the coordinate stays at
+                # value - delta if neither step is successful
+                plus_better = candidate_plus < optimum_new
+                param_new[:, index] = np.where(plus_better, value + delta, value - delta)
+                optimum_new = np.where(plus_better, candidate_plus,
+                                       np.where(candidate_minus < optimum_new, candidate_minus, optimum_new))
+
+            # i.e., exploration step was successful
+            success = optimum_new < optimum_current
+
+            param_old = param_list
+            param_list = np.where(success[:, np.newaxis], param_new, param_list)
+            optimum_current = np.where(success, optimum_new, optimum_current)
+
+            # try a pattern step
+            param_pattern = 2 * param_list - param_old
+            if np.any(success):
+                candidate_new = self.eval_batch(setting=setting, param_array=param_pattern)
+                param_list = np.where((success & (candidate_new < optimum_current))[:, np.newaxis], param_pattern,
+                                      param_list)
+
+            param_new = np.where(success[:, np.newaxis], param_pattern, param_list)
+            delta = np.where(success, delta, 0.5 * delta)
+
+            done = delta <= delta_min
+            if np.any(done):
+                opt_x[rows[done]] = param_list[done]
+                obj_value[rows[done]] = optimum_new[done]
+
+                keep = ~done
+                setting = take_rows(setting=setting, rows=keep)
+                rows = rows[keep]
+                param_list, param_new = param_list[keep], param_new[keep]
+                optimum_current, optimum_new = optimum_current[keep], optimum_new[keep]
+                delta = delta[keep]
+
+        return OptimizationResult(opt_x=opt_x, obj_value=self.to_bound(obj_value), heuristic="batch_pattern_search")
+
+    def nelder_mead(self,
+                    simplex: np.ndarray,
+                    sd_min=10**(-2),
+                    x_tol=10**(-4),
+                    max_iterations: Optional[int] = None) -> OptimizationResult:
+        """
+        Nelder-Mead with the standard coefficients and abort criteria of
+        the sciPy implementation.
+
+        :param simplex:        initial parameter simplex (used for every row)
+        :param sd_min:         abort criterion (detect when the changes
+                               become very small)
+        :param x_tol:          abort criterion for the size of the simplex
+        :param max_iterations: defaults to 200 * number_param as in sciPy
+        :return:               optimized standard_bound of every row
+        """
+        if simplex.shape != (self.number_param + 1, self.number_param):
+            raise IllegalArgumentError(f"array argument is not a simplex, shape: {simplex.shape}")
+
+        if max_iterations is None:
+            max_iterations = 200 * self.number_param
+
+        setting = self.setting
+        rows = np.arange(number_rows(setting))
+
+        # one simplex per row, shape (rows, points, parameters)
+        simplex = np.broadcast_to(np.asarray(simplex, dtype=float), (rows.shape[0], ) + simplex.shape).copy()
+        values = self.eval_batch(setting=setting, param_array=simplex.transpose(1, 0, 2)).T
+
+        opt_x = simplex[:, 0].copy()
+        obj_value = values[:, 0].copy()
+
+        # reflection, expansion, outside and inside contraction
+        coefficients = np.array([1.0, 2.0, 0.5, -0.5])[:, np.newaxis, np.newaxis]
+
+        for iteration in range(max_iterations + 1):
+            order = np.argsort(values, axis=1, kind="stable")
+            simplex = np.take_along_axis(simplex, order[:, :, np.newaxis], axis=1)
+            values = np.take_along_axis(values, order, axis=1)
+
+            with np.errstate(invalid="ignore"):
+                done = ((np.max(np.abs(simplex[:, 1:] - simplex[:, :1]), axis=(1, 2)) <= x_tol) &
+                        (np.max(np.abs(values[:, 1:] - values[:, :1]), axis=1) <= sd_min))
+
+            if iteration == max_iterations:
+                done[:] = True
+
+            if np.any(done):
+                opt_x[rows[done]] = simplex[done, 0]
+                obj_value[rows[done]] = values[done, 0]
+
+                keep = ~done
+                setting = take_rows(setting=setting, rows=keep)
+                rows = rows[keep]
+                simplex, values = simplex[keep], values[keep]
+
+            if rows.shape[0] == 0:
+                break
+
+            centroid = np.mean(simplex[:, :-1], axis=1)
+            candidates = centroid + coefficients * (centroid - simplex[:, -1])
+            f_reflect, f_expand, f_outside, f_inside = self.eval_batch(setting=setting, param_array=candidates)
+
+            f_best, f_second, f_worst = values[:, 0], values[:, -2], values[:, -1]
+
+            expand = (f_reflect < f_best) & (f_expand < f_reflect)
+            reflect = ~expand & (f_reflect < f_second)
+            outside = ~(f_reflect < f_second) & (f_reflect < f_worst)
+            inside = ~(f_reflect < f_worst)
+            accept_outside = outside & (f_outside <= f_reflect)
+            accept_inside = inside & (f_inside < f_worst)
+            shrink = (outside & ~accept_outside) | (inside & ~accept_inside)
+
+            conditions = [expand, reflect, accept_outside, accept_inside]
+            simplex[:, -1] = np.select([condition[:, np.newaxis] for condition in conditions],
+                                       [candidates[1], candidates[0], candidates[2], candidates[3]],
+                                       default=simplex[:, -1])
+            values[:, -1] = np.select(conditions, [f_expand, f_reflect, f_outside, f_inside], default=f_worst)
+
+            if np.any(shrink):
+                simplex[shrink, 1:] = simplex[shrink, :1] + 0.5 * (simplex[shrink, 1:] - simplex[shrink, :1])
+                values[shrink, 1:] = self.eval_batch(setting=take_rows(setting=setting, rows=shrink),
+                                                     param_array=simplex[shrink, 1:].transpose(1, 0, 2)).T
+
+        return OptimizationResult(opt_x=opt_x, obj_value=self.to_bound(obj_value), heuristic="batch_nelder_mead")
@@ -1,6 +1,6 @@
 """Create simplex with random values on-the-fly"""
 
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 
@@ -14,13 +14,22 @@ class InitialSimplex(object):
         self.number_rows = parameters_to_optimize + 1
         self.number_columns = parameters_to_optimize
 
-    def uniform_dist(self, max_theta=3.0, max_l=4.0) -> np.ndarray:
-        res = np.random.uniform(low=0.0, high=max_theta, size=self.number_rows)
+    def uniform_dist(self,
+                     max_theta=3.0,
+                     max_l=4.0,
+                     rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        :param rng: random number generator, the global np.random state is
+                    used if None
+        """
+        random = np.random if rng is None else rng
+
+        res = random.uniform(low=0.0, high=max_theta, size=self.number_rows)
         res = np.reshape(res, (-1, self.number_rows)).transpose()
 
         if self.parameters_to_optimize > 1:
             for _i in range(self.number_columns - 1):
-                l_column = np.random.uniform(
+                l_column = random.uniform(
                     low=1.0, high=max_l, size=self.number_rows)
                 l_column = np.reshape(l_column,
                                       (-1, self.number_rows)).transpose()
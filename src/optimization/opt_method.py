@@ -3,6 +3,7 @@ from enum import Enum
 
 class OptMethod(Enum):
     GRID_SEARCH = "GridSearch"
+    MULTI_GRID_SEARCH = "MultiGridSearch"
     PATTERN_SEARCH = "PatternSearch"
     NELDER_MEAD = "NelderMead"
     BASIN_HOPPING = "BasinHopping"
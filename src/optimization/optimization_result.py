@@ -1,11 +1,14 @@
-from typing import List
+from typing import Dict, List, Optional
 
 
 class OptimizationResult(object):
-    def __init__(self, opt_x: List[float], obj_value: float, heuristic=""):
+    def __init__(self, opt_x: List[float], obj_value: float, heuristic="",
+                 evaluations: Optional[Dict[str, int]] = None):
         self.opt_x = opt_x
         self.obj_value = obj_value
         self.heuristic = heuristic
+        # number of bound evaluations per heuristic (see Optimize.portfolio)
+        self.evaluations = evaluations
 
     def __lt__(self, other):
         return self.obj_value < other.obj_value
@@ -1,27 +1,99 @@
 """Optimize theta and all other parameters"""
 
+import copy
+import functools
 import math
-from typing import List, Tuple
+import time
+from math import inf
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import scipy.optimize
 
+from nc_operations.perform_enum import PerformEnum
+from optimization.initial_simplex import InitialSimplex
 from optimization.nelder_mead_parameters import NelderMeadParameters
+from optimization.opt_method import OptMethod
 from optimization.optimization_result import OptimizationResult
+from optimization.result_cache import ResultCache, fingerprint
 from optimization.sim_anneal_param import SimAnnealParams
 from utils.deprecated import deprecated
-from utils.exceptions import IllegalArgumentError, ParameterOutOfBounds
-from utils.helper_functions import average_towards_best_row, centroid_without_one_row, expand_grid
+from utils.dual import Dual
+from utils.exceptions import BudgetExhausted, IllegalArgumentError, ParameterOutOfBounds
+from utils.helper_functions import average_towards_best_row, centroid_without_one_row, expand_grid, is_array
 from utils.setting import Setting
 
+PORTFOLIO_METHODS = (OptMethod.GRID_SEARCH, OptMethod.PATTERN_SEARCH, OptMethod.NELDER_MEAD, OptMethod.DUAL_ANNEALING,
+                     OptMethod.BFGS)
+
+# metrics whose bounds are positive, i.e., their logarithm is monotone
+LOG_OBJECTIVE_METRICS = (PerformEnum.DELAY_PROB, PerformEnum.BACKLOG_PROB, PerformEnum.OUTPUT)
+
+
+def has_log_objective(setting: Setting) -> bool:
+    """
+    :param setting: setting whose bound is minimized
+    :return:        True if the logarithm of its bound can be minimized instead
+    """
+    perform_param = getattr(setting, "perform_param", None)
+
+    return perform_param is not None and perform_param.perform_metric in LOG_OBJECTIVE_METRICS
+
+
+def minimize_log(method):
+    """
+    Decorator that runs the optimizer on the logarithm of eval_except (see
+    Optimize.log_objective) and maps obj_value back. The argmin is the same,
+    but the objective spans a few units instead of many orders of magnitude.
+    """
+    @functools.wraps(method)
+    def log_method(self, *args, **kwargs) -> OptimizationResult:
+        if not self.uses_log_objective():
+            return method(self, *args, **kwargs)
+
+        eval_except = self.eval_except
+
+        def log_eval_except(param_list: List[float]) -> float:
+            value = eval_except(param_list=param_list)
+
+            with np.errstate(divide="ignore"):
+                log_value = np.log(value)
+
+            return log_value if is_array(log_value) else float(log_value)
+
+        log_self = copy.copy(self)
+        log_self.log_objective = False
+        log_self.eval_except = log_eval_except
+
+        res = method(log_self, *args, **kwargs)
+        with np.errstate(over="ignore"):
+            res.obj_value = float(np.exp(res.obj_value))
+
+        return res
+
+    return log_method
+
 
 class Optimize(object):
     """Optimize class"""
 
-    def __init__(self, setting: Setting, number_param: int) -> None:
+    def __init__(self, setting: Setting, number_param: int, log_objective=True) -> None:
+        """
+        :param setting:       setting whose bound is minimized
+        :param number_param:  number of parameters
+        :param log_objective: if True, the optimizers minimize the logarithm
+                              of probability and output bounds
+        """
         self.setting = setting
         self.number_param = number_param
+        self.log_objective = log_objective
+
+    def uses_log_objective(self) -> bool:
+        """
+        :return: True if the optimizers minimize the logarithm of eval_except
+        """
+        return self.log_objective and has_log_objective(setting=self.setting)
 
     def eval_except(self, param_list: List[float]) -> float:
         """
@@ -35,21 +107,105 @@ class Optimize(object):
         except (FloatingPointError, OverflowError, ParameterOutOfBounds):
             return math.inf
 
-    def grid_search(self, grid_bounds: List[Tuple[float, float]], delta: float) -> OptimizationResult:
+    def cached(self, cache: Optional[ResultCache], method: str, **kwargs) -> OptimizationResult:
+        """
+        Looks the result up in the cache before running the optimization.
+
+        :param cache:  result cache, the method is simply called if None
+        :param method: name of the optimization method, e.g. "grid_search"
+        :param kwargs: arguments of the method
+        :return:       optimized standard_bound
+        """
+        if cache is None:
+            return getattr(self, method)(**kwargs)
+
+        key = fingerprint(type(self), self.setting, self.number_param, self.uses_log_objective(), method, kwargs)
+
+        return cache.get_or_compute(key, lambda: getattr(self, method)(**kwargs))
+
+    def value_and_gradient(self, param_list: List[float]) -> Tuple[float, np.ndarray]:
+        """
+        Evaluates the bound once with dual numbers (see utils.dual), i.e.,
+        the gradient costs about one more evaluation instead of
+        2 * number_param. Falls back to finite differences if the bound
+        has no element-wise mode.
+
+        :param param_list: theta and other parameters
+        :return:           function value and its gradient with respect to
+                           param_list, inf and nan if infeasible
+        """
+        try:
+            with np.errstate(all="ignore"):
+                res = self.eval_except(param_list=Dual.variables(param_list))
+        except TypeError:
+            # e.g., math functions applied to dual numbers
+            value = self.eval_except(param_list=list(param_list))
+            if not value < inf:
+                return inf, np.full(self.number_param, np.nan)
+
+            with np.errstate(all="ignore"):
+                gradient = scipy.optimize.approx_fprime(np.asarray(param_list, dtype=float),
+                                                        lambda x: self.eval_except(param_list=x.tolist()))
+
+            return value, gradient
+
+        if isinstance(res, Dual):
+            value, gradient = float(res.value), np.array(res.grad, dtype=float)
+        else:
+            # e.g., the bound does not depend on the parameters
+            value, gradient = float(res), np.zeros(self.number_param)
+
+        if not value < inf:
+            return inf, np.full(self.number_param, np.nan)
+
+        return value, gradient
+
+    def clip_theta(self, theta_bounds: Tuple[float, float]) -> Optional[Tuple[float, float]]:
+        """
+        Removes the part of the search interval of theta that is infeasible
+        for every parameter (see Setting.theta_domain).
+
+        :param theta_bounds: lower and upper bound of theta
+        :return:             clipped bounds, None if the interval is empty
+        """
+        domain_low, domain_high = self.setting.theta_domain()
+        low = max(theta_bounds[0], domain_low)
+        high = min(theta_bounds[1], domain_high)
+
+        if low >= high:
+            return None
+
+        return low, high
+
+    @minimize_log
+    def grid_search(self, grid_bounds: List[Tuple[float, float]], delta: float,
+                    vectorized=False) -> OptimizationResult:
         """
         Search optimal values along a grid in the parameter space.
 
         :param grid_bounds: list of tuples of lower and upper bounds
         :param delta:      granularity of the grid search
+        :param vectorized: evaluate the whole grid in one call with arrays
+                           of parameters (falls back to brute force if the
+                           bound cannot be evaluated element-wise)
         :return:           optimized standard_bound
         """
         if len(grid_bounds) != self.number_param:
             raise IllegalArgumentError(f"Number of parameters = {len(grid_bounds)} " f"!= {self.number_param}")
 
+        theta_bounds = self.clip_theta(theta_bounds=grid_bounds[0])
+        if theta_bounds is None:
+            return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="grid_search")
+        grid_bounds = [theta_bounds] + list(grid_bounds[1:])
+
         list_slices = [slice(0)] * len(grid_bounds)
 
         for i in range(len(grid_bounds)):
-            list_slices[i] = slice(grid_bounds[i][0], grid_bounds[i][1], delta)
+            low, high = grid_bounds[i]
+            # brute fails on a single grid point, e.g., if the clipped theta
+            # interval is narrower than delta
+            step = delta if high - low > delta else (high - low) / 2.0
+            list_slices[i] = slice(low, high, step)
 
         np.seterr("raise")
 
@@ -58,12 +214,356 @@ class Optimize(object):
         #                                 full_output=True)
 
         try:
-            grid_res = scipy.optimize.brute(func=self.eval_except, ranges=tuple(list_slices), full_output=True)
+            grid_res = None
+            if vectorized:
+                grid_res = self._brute_vectorized(list_slices=list_slices)
+
+            if grid_res is None:
+                grid_res = scipy.optimize.brute(func=self.eval_except, ranges=tuple(list_slices), full_output=True)
         except FloatingPointError:
             return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="grid_search")
 
         return OptimizationResult(opt_x=grid_res[0].tolist(), obj_value=grid_res[1], heuristic="grid_search")
 
+    def _brute_vectorized(self, list_slices: List[slice]) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Same grid and fmin polishing as scipy.optimize.brute, but all grid
+        points are evaluated in one call of eval_except.
+
+        :param list_slices: grid per parameter
+        :return:            optimal parameters and value, None if the bound
+                            cannot be evaluated element-wise
+        """
+        grid = np.mgrid[tuple(list_slices)]
+
+        values = self._eval_vectorized(param_list=list(grid))
+        if values is None:
+            return None
+        index = np.unravel_index(np.argmin(values), values.shape)
+
+        fmin_res = scipy.optimize.fmin(func=self.eval_except,
+                                       x0=grid[(slice(None), ) + index],
+                                       full_output=True,
+                                       disp=False)
+
+        return fmin_res[0], fmin_res[1]
+
+    def _eval_vectorized(self, param_list: List[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        :param param_list: one array of points per parameter
+        :return:           values of all points (inf if infeasible), None if
+                           the bound cannot be evaluated element-wise
+        """
+        try:
+            with np.errstate(all="ignore"):
+                values = self.eval_except(param_list=param_list)
+        except (TypeError, ValueError):
+            # e.g., math functions or if-statements applied to arrays
+            return None
+
+        if not isinstance(values, np.ndarray) or values.shape != param_list[0].shape:
+            return None
+
+        return np.where(np.isnan(values), inf, values)
+
+    @minimize_log
+    def multi_grid_search(self,
+                          grid_bounds: List[Tuple[float, float]],
+                          delta: float,
+                          coarse_delta: Optional[float] = None,
+                          top_k=3,
+                          max_coarse_points=4096) -> OptimizationResult:
+        """
+        Coarse-to-fine grid search: the top_k points found so far are
+        refined by their neighbors on a grid of halved granularity until
+        delta is reached. As in grid_search, the result is polished by fmin.
+
+        Up to 4 parameters, all 3^number_param - 1 neighbors are evaluated,
+        otherwise only the 2 * number_param neighbors along the axes. Hence,
+        the number of evaluations does not grow with
+        (width / delta)^number_param.
+
+        :param grid_bounds:       list of tuples of lower and upper bounds
+        :param delta:             granularity of the finest grid
+        :param coarse_delta:      granularity of the first grid, chosen such
+                                  that it has at most max_coarse_points if None
+        :param top_k:             number of points that are refined
+        :param max_coarse_points: size of the first grid if coarse_delta is None
+        :return:                  optimized standard_bound
+        """
+        if len(grid_bounds) != self.number_param:
+            raise IllegalArgumentError(f"Number of parameters = {len(grid_bounds)} " f"!= {self.number_param}")
+
+        theta_bounds = self.clip_theta(theta_bounds=grid_bounds[0])
+        if theta_bounds is None:
+            return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="multi_grid_search")
+        grid_bounds = [theta_bounds] + list(grid_bounds[1:])
+
+        lower = np.array([bounds[0] for bounds in grid_bounds])
+        upper = np.array([bounds[1] for bounds in grid_bounds])
+
+        if coarse_delta is None:
+            points_per_param = max(2, int(max_coarse_points**(1 / self.number_param)))
+            coarse_delta = max(delta, float(np.max(upper - lower)) / points_per_param)
+
+        step = coarse_delta
+        points = np.mgrid[tuple(slice(low, high, step) for low, high in grid_bounds)]
+        points = points.reshape(self.number_param, -1).T
+
+        if self.number_param <= 4:
+            offsets = np.mgrid[(slice(-1, 2), ) * self.number_param].reshape(self.number_param, -1).T
+            offsets = offsets[np.any(offsets != 0, axis=1)]
+        else:
+            offsets = np.concatenate((np.eye(self.number_param), -np.eye(self.number_param)))
+
+        np.seterr("raise")
+
+        try:
+            values = self._eval_points(points=points)
+
+            while step > delta:
+                step = max(step / 2, delta)
+
+                best_points = points[np.argsort(values, kind="stable")[:top_k]]
+                new_points = np.clip((best_points[:, np.newaxis, :] + step * offsets).reshape(-1, self.number_param),
+                                     lower, upper)
+                new_points = np.unique(new_points, axis=0)
+
+                points = np.concatenate((points, new_points))
+                values = np.concatenate((values, self._eval_points(points=new_points)))
+
+            opt_index = int(np.argmin(values))
+            if values[opt_index] == inf:
+                return OptimizationResult(opt_x=[0.0] * self.number_param,
+                                          obj_value=inf,
+                                          heuristic="multi_grid_search")
+
+            fmin_res = scipy.optimize.fmin(func=self.eval_except,
+                                           x0=points[opt_index],
+                                           full_output=True,
+                                           disp=False)
+        except FloatingPointError:
+            return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="multi_grid_search")
+
+        if fmin_res[1] < values[opt_index]:
+            return OptimizationResult(opt_x=fmin_res[0].tolist(), obj_value=fmin_res[1], heuristic="multi_grid_search")
+
+        return OptimizationResult(opt_x=points[opt_index].tolist(),
+                                  obj_value=values[opt_index],
+                                  heuristic="multi_grid_search")
+
+    def _eval_points(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: one row per point
+        :return:       values of all points, inf if infeasible
+        """
+        values = self._eval_vectorized(param_list=list(points.T))
+        if values is not None:
+            return values
+
+        values = np.array([self.eval_except(param_list=point.tolist()) for point in points], dtype=float)
+
+        return np.where(np.isnan(values), inf, values)
+
+    def brent(self, theta_bounds: Tuple[float, float] = (0.1, 10.0), delta=0.05, x_tol=1e-3) -> OptimizationResult:
+        """
+        Bounded Brent search for one parameter, assuming that the bound is
+        quasi-convex in theta. The search is restricted to the feasible
+        interval (e.g. theta < lamb, arrival rho < service rho), whose upper
+        end is found by bisection. Falls back to grid_search if the
+        evaluated points are not unimodal.
+
+        :param theta_bounds: lower and upper bound of theta
+        :param delta:        accuracy of the feasible interval and
+                             granularity of the fallback grid
+        :param x_tol:        absolute tolerance of the optimal theta
+        :return:             optimized standard_bound
+        """
+        if self.number_param != 1:
+            raise IllegalArgumentError(f"Brent's method optimizes 1 parameter, not {self.number_param}")
+
+        evaluated = {}
+
+        def log_bound(theta: float) -> float:
+            value = self.eval_except(param_list=[float(theta)])
+            evaluated[float(theta)] = value
+
+            # quasi-convexity is invariant under the logarithm
+            return math.log(value) if 0.0 < value < inf else inf
+
+        def bisect_feasible(feasible: float, infeasible: float, accuracy: float) -> Tuple[float, float]:
+            while infeasible - feasible > accuracy:
+                midpoint = (feasible + infeasible) / 2.0
+                if log_bound(midpoint) < inf:
+                    feasible = midpoint
+                else:
+                    infeasible = midpoint
+
+            return feasible, infeasible
+
+        def minimize(low: float, high: float) -> float:
+            return float(
+                scipy.optimize.minimize_scalar(fun=log_bound,
+                                               bounds=(low, high),
+                                               method="bounded",
+                                               options={
+                                                   "xatol": x_tol
+                                               }).x)
+
+        np.seterr("raise")
+
+        clipped_bounds = self.clip_theta(theta_bounds=theta_bounds)
+        if clipped_bounds is None:
+            return OptimizationResult(opt_x=[0.0], obj_value=inf, heuristic="brent")
+
+        low, high = clipped_bounds
+        if log_bound(low) == inf:
+            return self.grid_search(grid_bounds=[theta_bounds], delta=delta)
+
+        infeasible = None
+        if log_bound(high) == inf:
+            high, infeasible = bisect_feasible(feasible=low, infeasible=high, accuracy=delta)
+
+        if high - low > x_tol:
+            opt_theta = minimize(low, high)
+
+            if infeasible is not None and high - opt_theta < delta:
+                # the optimum may lie between the feasible and the
+                # infeasible point of the coarse bisection
+                refined_high = bisect_feasible(feasible=high, infeasible=infeasible, accuracy=x_tol)[0]
+                if refined_high - opt_theta > x_tol:
+                    minimize(opt_theta, refined_high)
+
+        thetas = sorted(theta for theta in evaluated if evaluated[theta] < inf)
+        values = [evaluated[theta] for theta in thetas]
+        opt_index = int(np.argmin(values))
+
+        unimodal = all(values[i] >= values[i + 1] for i in range(opt_index)) and all(
+            values[i] <= values[i + 1] for i in range(opt_index, len(values) - 1))
+
+        if not unimodal:
+            return self.grid_search(grid_bounds=[theta_bounds], delta=delta)
+
+        return OptimizationResult(opt_x=[thetas[opt_index]], obj_value=values[opt_index], heuristic="brent")
+
+    def barrier_gradient(self,
+                         theta_bounds: Tuple[float, float] = (0.1, 10.0),
+                         x_tol=1e-6,
+                         max_iterations=50,
+                         log_domain=False,
+                         fixed_params: Optional[List[float]] = None) -> OptimizationResult:
+        """
+        Newton steps on the logarithm of the bound, using the analytic
+        derivative of the setting (see Setting.d_log_standard_bound) and the
+        secant of the derivatives as curvature. The interval of theta is
+        enforced by a logarithmic barrier whose weight decreases in every
+        step. Infeasible points (e.g. arrival rho >= service rho) are never
+        accepted, i.e., the step is halved instead.
+
+        :param theta_bounds:   lower and upper bound of theta
+        :param x_tol:          absolute tolerance of the optimal theta
+        :param max_iterations: maximum number of Newton steps
+        :param log_domain:     True if standard_bound is already the
+                               logarithm of the bound (LOG_ metrics)
+        :param fixed_params:   further parameters (e.g. Hoelder) that are
+                               not optimized
+        :return:               optimized standard_bound
+        """
+        fixed_params = [] if fixed_params is None else list(fixed_params)
+        if self.number_param != 1 + len(fixed_params):
+            raise IllegalArgumentError(f"barrier_gradient optimizes theta only, {len(fixed_params)} fixed parameters "
+                                       f"are given for {self.number_param} parameters")
+
+        clipped_bounds = self.clip_theta(theta_bounds=theta_bounds)
+        if clipped_bounds is None:
+            return OptimizationResult(opt_x=[0.0] + fixed_params, obj_value=inf, heuristic="barrier_gradient")
+
+        low, high = clipped_bounds
+
+        def log_bound(theta: float) -> float:
+            value = self.eval_except(param_list=[theta] + fixed_params)
+
+            if log_domain:
+                return value if value < inf and not math.isnan(value) else inf
+
+            return math.log(value) if 0.0 < value < inf else inf
+
+        def d_log_bound(theta: float) -> float:
+            try:
+                return self.setting.d_log_standard_bound(param_list=[theta] + fixed_params)
+            except (FloatingPointError, OverflowError, ParameterOutOfBounds):
+                return math.nan
+
+        def barrier(theta: float, weight: float) -> float:
+            return -weight * (math.log(theta - low) + math.log(high - theta))
+
+        def d_barrier(theta: float, weight: float) -> float:
+            return -weight * (1.0 / (theta - low) - 1.0 / (high - theta))
+
+        with np.errstate(all="ignore"):
+            # start in the middle and move towards the lower bound until
+            # the bound is feasible
+            theta = (low + high) / 2.0
+            value = log_bound(theta)
+            while value == inf and theta - low > x_tol:
+                theta = (low + theta) / 2.0
+                value = log_bound(theta)
+
+            if value == inf:
+                return OptimizationResult(opt_x=[0.0] + fixed_params, obj_value=inf, heuristic="barrier_gradient")
+
+            weight = 1.0
+            derivative = d_log_bound(theta)
+            theta_prev = derivative_prev = None
+
+            for _ in range(max_iterations):
+                if math.isnan(derivative):
+                    break
+
+                gradient = derivative + d_barrier(theta, weight)
+
+                if theta_prev is None:
+                    curvature = -1.0
+                else:
+                    curvature = (derivative - derivative_prev + d_barrier(theta, weight) -
+                                 d_barrier(theta_prev, weight)) / (theta - theta_prev)
+
+                if curvature > 0.0:
+                    step = -gradient / curvature
+                else:
+                    # no information on the curvature yet, move halfway
+                    # towards the boundary in the direction of descent
+                    step = (high - theta) / 2.0 if gradient < 0.0 else (low - theta) / 2.0
+
+                # stay strictly inside the interval
+                step = max(min(step, 0.99 * (high - theta)), 0.99 * (low - theta))
+
+                # Armijo backtracking, infeasible points are rejected
+                merit = value + barrier(theta, weight)
+                while abs(step) > x_tol / 2.0:
+                    value_new = log_bound(theta + step)
+                    if value_new + barrier(theta + step, weight) <= merit + 1e-4 * step * gradient:
+                        break
+                    step /= 2.0
+                else:
+                    if weight <= x_tol:
+                        break
+                    weight /= 10.0
+                    continue
+
+                theta_prev, derivative_prev = theta, derivative
+                theta, value = theta + step, value_new
+                derivative = d_log_bound(theta)
+                weight /= 10.0
+
+                if abs(step) <= x_tol and weight <= x_tol:
+                    break
+
+        return OptimizationResult(opt_x=[theta] + fixed_params,
+                                  obj_value=value if log_domain else math.exp(value),
+                                  heuristic="barrier_gradient")
+
+    @minimize_log
     def pattern_search(self, start_list: List[float], delta=3.0, delta_min=0.01) -> OptimizationResult:
         """
         Optimization in Hooke and Jeeves.
@@ -120,6 +620,7 @@ class Optimize(object):
 
         return OptimizationResult(opt_x=param_list, obj_value=optimum_new, heuristic="pattern_search")
 
+    @minimize_log
     def nelder_mead(self, simplex: np.ndarray, sd_min=10**(-2)) -> OptimizationResult:
         """
         Nelder-Mead optimization from the sciPy package.
@@ -131,8 +632,9 @@ class Optimize(object):
         """
         np.seterr("raise")
         try:
+            # x0 is ignored if an initial simplex is given
             nm_res = scipy.optimize.minimize(self.eval_except,
-                                             x0=np.zeros(shape=(1, simplex.shape[1])),
+                                             x0=simplex[0],
                                              method='Nelder-Mead',
                                              options={
                                                  'initial_simplex': simplex,
@@ -144,6 +646,7 @@ class Optimize(object):
 
         return OptimizationResult(opt_x=nm_res.x, obj_value=nm_res.fun, heuristic="nelder_mead")
 
+    @minimize_log
     def basin_hopping(self, start_list: List[float]) -> OptimizationResult:
         """
         Basin Hopping optimization from the sciPy package.
@@ -159,6 +662,7 @@ class Optimize(object):
 
         return OptimizationResult(opt_x=bh_res.x, obj_value=bh_res.fun, heuristic="basin_hopping")
 
+    @minimize_log
     def diff_evolution(self, bound_list: List[tuple]) -> OptimizationResult:
         """
         Differential Evolution optimization from the sciPy package.
@@ -168,6 +672,11 @@ class Optimize(object):
         """
         np.seterr("raise")
 
+        theta_bounds = self.clip_theta(theta_bounds=bound_list[0])
+        if theta_bounds is None:
+            return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="diff_evolution")
+        bound_list = [theta_bounds] + list(bound_list[1:])
+
         try:
             de_res = scipy.optimize.differential_evolution(func=self.eval_except, bounds=bound_list)
 
@@ -176,17 +685,142 @@ class Optimize(object):
 
         return OptimizationResult(opt_x=de_res.x, obj_value=de_res.fun, heuristic="diff_evolution")
 
-    def dual_annealing(self, bound_list: List[Tuple[float, float]]) -> OptimizationResult:
+    @minimize_log
+    def dual_annealing(self, bound_list: List[Tuple[float, float]], seed: Optional[int] = None) -> OptimizationResult:
+        """
+        Dual Annealing optimization from the sciPy package.
+
+        :param bound_list: list of tuples of lower and upper bounds
+        :param seed:       seed of the random number generator
+        :return:           optimized standard_bound
+        """
         np.seterr("raise")
 
+        theta_bounds = self.clip_theta(theta_bounds=bound_list[0])
+        if theta_bounds is None:
+            return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="dual_annealing")
+        bound_list = [theta_bounds] + list(bound_list[1:])
+
         try:
-            dual_anneal_res = scipy.optimize.dual_annealing(func=self.eval_except, bounds=bound_list)
+            dual_anneal_res = scipy.optimize.dual_annealing(func=self.eval_except, bounds=bound_list, seed=seed)
 
         except (FloatingPointError, ValueError):
             return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="dual_annealing")
 
         return OptimizationResult(opt_x=dual_anneal_res.x, obj_value=dual_anneal_res.fun, heuristic="dual_annealing")
 
+    def portfolio(self,
+                  budget_seconds: float,
+                  methods: Optional[List[OptMethod]] = None,
+                  start_list: Optional[List[float]] = None,
+                  bound_list: Optional[List[Tuple[float, float]]] = None,
+                  delta=0.1,
+                  first_evaluations=50,
+                  eta=2) -> OptimizationResult:
+        """
+        Races several heuristics on a shared cache of bound evaluations
+        (successive halving): in every round, each remaining heuristic may
+        use up to a budget of evaluations, then the worse 1 - 1 / eta of the
+        unfinished heuristics are stopped and the budget is multiplied by
+        eta. The heuristics are deterministic, i.e., a heuristic continues
+        where it stopped since its previous evaluations are cache hits.
+
+        :param budget_seconds:    wall-clock budget of the whole race
+        :param methods:           heuristics out of PORTFOLIO_METHODS,
+                                  defaults to all of them
+        :param start_list:        starting values, defaults to theta = 0.5
+                                  and 1.0 for the other parameters
+        :param bound_list:        bounds of grid search and dual annealing,
+                                  defaults to (0.1, 4.0) and (0.9, 4.0)
+        :param delta:             granularity of the grid search
+        :param first_evaluations: evaluation budget of the first round
+        :param eta:               reduction factor per round
+        :return:                  best standard_bound over all heuristics,
+                                  the evaluations per heuristic are stored
+                                  in the result
+        """
+        if methods is None:
+            methods = list(PORTFOLIO_METHODS)
+        if not methods:
+            raise IllegalArgumentError("the portfolio needs at least one heuristic")
+        for method in methods:
+            if method not in PORTFOLIO_METHODS:
+                raise IllegalArgumentError(f"{method.name} is not part of the portfolio")
+        if start_list is None:
+            start_list = [0.5] + [1.0] * (self.number_param - 1)
+        if bound_list is None:
+            bound_list = [(0.1, 4.0)] + [(0.9, 4.0)] * (self.number_param - 1)
+
+        deadline = time.perf_counter() + budget_seconds
+        cache = {}
+        evaluations = {method.name: 0 for method in methods}
+        best = {method.name: (inf, list(start_list)) for method in methods}
+
+        def racing_eval(method: OptMethod, budget: int):
+            def eval_except(param_list: List[float]) -> float:
+                key = tuple(float(param) for param in np.ravel(param_list))
+
+                if key not in cache:
+                    if evaluations[method.name] >= budget:
+                        raise BudgetExhausted(f"{method.name} used {budget} evaluations")
+                    if time.perf_counter() > deadline:
+                        raise BudgetExhausted(f"{budget_seconds} seconds are over")
+
+                    evaluations[method.name] += 1
+                    value = self.eval_except(param_list=list(key))
+                    cache[key] = inf if math.isnan(value) else value
+
+                if cache[key] < best[method.name][0]:
+                    best[method.name] = (cache[key], list(key))
+
+                return cache[key]
+
+            return eval_except
+
+        def run(method: OptMethod, budget: int) -> None:
+            racer = copy.copy(self)
+            racer.eval_except = racing_eval(method=method, budget=budget)
+
+            match method:
+                case OptMethod.GRID_SEARCH:
+                    racer.grid_search(grid_bounds=bound_list, delta=delta)
+                case OptMethod.PATTERN_SEARCH:
+                    racer.pattern_search(start_list=start_list)
+                case OptMethod.NELDER_MEAD:
+                    racer.nelder_mead(simplex=InitialSimplex(
+                        parameters_to_optimize=self.number_param).gao_han(start_list=start_list))
+                case OptMethod.DUAL_ANNEALING:
+                    racer.dual_annealing(bound_list=bound_list, seed=0)
+                case OptMethod.BFGS:
+                    racer.bfgs(start_list=start_list)
+
+        remaining = list(methods)
+        budget = first_evaluations
+
+        while remaining and time.perf_counter() < deadline:
+            unfinished = []
+            for method in remaining:
+                try:
+                    run(method=method, budget=budget)
+                except BudgetExhausted:
+                    unfinished.append(method)
+
+                if time.perf_counter() > deadline:
+                    break
+
+            # finished heuristics keep their result, the worse of the
+            # others are stopped
+            unfinished.sort(key=lambda method: best[method.name][0])
+            remaining = unfinished[:math.ceil(len(unfinished) / eta)]
+            budget *= eta
+
+        winner = min(methods, key=lambda method: best[method.name][0])
+
+        return OptimizationResult(opt_x=best[winner.name][1],
+                                  obj_value=best[winner.name][0],
+                                  heuristic="portfolio_" + winner.name.lower(),
+                                  evaluations=evaluations)
+
     @deprecated
     def sim_annealing(self, start_list: List[float], sim_anneal_params: SimAnnealParams) -> OptimizationResult:
         """
@@ -380,11 +1014,27 @@ class Optimize(object):
 
         return OptimizationResult(opt_x=simplex[best_index], obj_value=y_value[best_index], heuristic="nelder_mead_old")
 
-    def bfgs(self, start_list: list) -> OptimizationResult:
+    def bfgs(self, start_list: list, dual_gradient=False) -> OptimizationResult:
+        """
+        Minimizes the bound itself (not its logarithm): the steeper log
+        objective makes the first quasi-Newton step leave the feasible
+        region, where the line search fails.
+
+        :param start_list:    list of starting values
+        :param dual_gradient: use the gradient of value_and_gradient instead
+                              of finite differences
+        :return:              optimized standard_bound
+        """
         np.seterr("raise")
 
         try:
-            bfgs_res = scipy.optimize.minimize(fun=self.eval_except, x0=np.array(start_list), method="BFGS")
+            if dual_gradient:
+                bfgs_res = scipy.optimize.minimize(fun=self.value_and_gradient,
+                                                   x0=np.array(start_list),
+                                                   method="BFGS",
+                                                   jac=True)
+            else:
+                bfgs_res = scipy.optimize.minimize(fun=self.eval_except, x0=np.array(start_list), method="BFGS")
 
         except FloatingPointError:
             return OptimizationResult(opt_x=[0.0] * self.number_param, obj_value=inf, heuristic="bfgs")
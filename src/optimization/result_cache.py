@@ -0,0 +1,154 @@
+"""Persistent cache of optimization results, shared by runs and processes."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from enum import Enum
+from math import nan
+from typing import Callable, Optional
+
+import numpy as np
+
+from optimization.optimization_result import OptimizationResult
+
+MAX_ENTRIES = 100000
+
+
+def canonical(obj) -> str:
+    """
+    Representation that only depends on the content, e.g., two separately
+    constructed DM1(lamb=1.0) are equal. Attributes starting with "_"
+    (caches, compiled plans) are ignored.
+
+    :param obj: setting, arrival, server, parameter, ...
+    :return: canonical string
+    """
+    if obj is None or isinstance(obj, (bool, int, str)):
+        return repr(obj)
+
+    if isinstance(obj, float):
+        return repr(float(obj))
+
+    if isinstance(obj, Enum):
+        return f"{type(obj).__name__}.{obj.name}"
+
+    if isinstance(obj, type):
+        return obj.__qualname__
+
+    if isinstance(obj, np.ndarray):
+        return canonical(obj.tolist())
+
+    if isinstance(obj, np.generic):
+        return canonical(obj.item())
+
+    if isinstance(obj, (list, tuple, range)):
+        return "[" + ",".join(canonical(entry) for entry in obj) + "]"
+
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{canonical(key)}:{canonical(obj[key])}" for key in sorted(obj, key=str)) + "}"
+
+    if not hasattr(obj, "__dict__"):
+        return repr(obj)
+
+    attributes = ",".join(f"{attr}={canonical(value)}" for attr, value in sorted(vars(obj).items())
+                          if not attr.startswith("_"))
+
+    return f"{type(obj).__name__}({attributes})"
+
+
+def fingerprint(*objects) -> str:
+    """
+    :param objects: everything the result depends on, e.g., optimizer class,
+                    setting, method name and its arguments
+    :return: SHA-256 hex digest of their canonical representation
+    """
+    return hashlib.sha256(canonical(list(objects)).encode("utf-8")).hexdigest()
+
+
+class ResultCache(object):
+    """
+    SQLite database of OptimizationResults, keyed by fingerprint(). It can
+    be used by several processes at the same time (write-ahead log). The
+    least recently used entries are evicted beyond max_entries.
+    """
+    def __init__(self, path: str, max_entries=MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                               "key TEXT PRIMARY KEY, opt_x TEXT, obj_value REAL, heuristic TEXT, "
+                               "last_access REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections must not be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=60.0)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
+
+    def get(self, key: str) -> Optional[OptimizationResult]:
+        """
+        :param key: fingerprint
+        :return: stored result, None if there is none
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT opt_x, obj_value, heuristic FROM results WHERE key = ?",
+                                     (key, )).fetchone()
+            if row is None:
+                return None
+
+            connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        obj_value = nan if row[1] is None else row[1]
+
+        return OptimizationResult(opt_x=json.loads(row[0]), obj_value=obj_value, heuristic=row[2])
+
+    def put(self, key: str, result: OptimizationResult) -> None:
+        """
+        :param key: fingerprint
+        :param result: result to be stored
+        """
+        opt_x = json.dumps([float(x) for x in result.opt_x])
+
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                               (key, opt_x, float(result.obj_value), result.heuristic, time.time()))
+
+            number_evicted = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if number_evicted > 0:
+                connection.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_access LIMIT ?)", (number_evicted, ))
+
+    def get_or_compute(self, key: str, compute: Callable[[], OptimizationResult]) -> OptimizationResult:
+        """
+        :param key: fingerprint
+        :param compute: computes the result if it is not stored
+        :return: stored or computed result
+        """
+        result = self.get(key)
+
+        if result is None:
+            result = compute()
+            self.put(key, result)
+
+        return result
+
+    def __len__(self) -> int:
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
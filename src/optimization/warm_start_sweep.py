@@ -0,0 +1,111 @@
+"""Optimize a sequence of settings, e.g. along a PerformParamList, where the
+optimal parameters move smoothly from one setting to the next."""
+
+from math import inf, isfinite, log
+from typing import List, Optional, Tuple
+
+from optimization.optimization_result import OptimizationResult
+from optimization.optimize import Optimize
+
+
+class WarmStartSweep(object):
+    """
+    The first step is a grid_search on grid_bounds. Every further step is a
+    grid_search with the same delta on a small window around the previous
+    optimum. The full grid_search is only run again if the objective jumps,
+    i.e., the local optimum is infeasible, lies at the edge of the window or
+    its log changes by more than jump_factor times the previous change. The
+    window is centred on the previous optimum clipped into grid_bounds, as the
+    grid_search polishes it with fmin, possibly beyond the grid.
+
+    Usage:
+
+        sweep = WarmStartSweep(grid_bounds=[(0.1, 10.0)], delta=0.05)
+        for i in range(len(perform_param_list)):
+            res[i] = sweep.optimize(Optimize(setting=..., number_param=1))
+    """
+    def __init__(self,
+                 grid_bounds: List[Tuple[float, float]],
+                 delta: float,
+                 vectorized=False,
+                 window=5,
+                 jump_factor=10.0,
+                 min_change=0.01) -> None:
+        """
+        :param grid_bounds: bounds of the full grid_search
+        :param delta:       granularity of both grid searches
+        :param vectorized:  see Optimize.grid_search
+        :param window:      number of grid points of the local search on
+                            each side of the previous optimum
+        :param jump_factor: tolerated increase of the change of the log
+                            objective from one step to the next
+        :param min_change:  changes of the log objective below this value
+                            are never considered as a jump
+        """
+        self.grid_bounds = grid_bounds
+        self.delta = delta
+        self.vectorized = vectorized
+        self.window = window
+        self.jump_factor = jump_factor
+        self.min_change = min_change
+
+        self.number_global = 0
+        self._previous: Optional[OptimizationResult] = None
+        self._previous_change = inf
+
+    def _global(self, optimize: Optimize) -> OptimizationResult:
+        self.number_global += 1
+
+        return optimize.grid_search(grid_bounds=self.grid_bounds, delta=self.delta, vectorized=self.vectorized)
+
+    def _local(self, optimize: Optimize) -> Tuple[OptimizationResult, bool]:
+        """
+        :return: local optimum and whether it lies at the edge of the window
+        """
+        width = self.window * self.delta
+        centres = [min(max(x, low), high) for x, (low, high) in zip(self._previous.opt_x, self.grid_bounds)]
+        local_bounds = [(max(low, x - width), min(high, x + width))
+                        for x, (low, high) in zip(centres, self.grid_bounds)]
+
+        res = optimize.grid_search(grid_bounds=local_bounds, delta=self.delta, vectorized=self.vectorized)
+
+        # the window is not clipped where it exceeds the grid_bounds
+        at_edge = any(
+            abs(opt - x) >= width - self.delta and low < opt - self.delta and opt + self.delta < high
+            for opt, x, (low, high) in zip(res.opt_x, centres, self.grid_bounds))
+
+        return res, at_edge
+
+    def optimize(self, optimize: Optimize) -> OptimizationResult:
+        """
+        :param optimize: optimizer of the next setting in the sweep
+        :return:         optimized bound of this setting
+        """
+        if self._previous is None or not isfinite(self._previous.obj_value):
+            res = self._global(optimize=optimize)
+            self._previous_change = inf
+
+        else:
+            res, at_edge = self._local(optimize=optimize)
+            change = _log_change(self._previous.obj_value, res.obj_value)
+
+            if (at_edge or not isfinite(res.obj_value)
+                    or change > self.jump_factor * max(self._previous_change, self.min_change)):
+                global_res = self._global(optimize=optimize)
+                if global_res.obj_value <= res.obj_value:
+                    res = global_res
+
+                change = _log_change(self._previous.obj_value, res.obj_value)
+
+            self._previous_change = change
+
+        self._previous = res
+
+        return res
+
+
+def _log_change(previous: float, current: float) -> float:
+    if not (0.0 < previous < inf and 0.0 < current < inf):
+        return inf
+
+    return abs(log(current) - log(previous))
@@ -0,0 +1,95 @@
+"""Struct-of-arrays versions of arrivals and servers."""
+
+import copy
+from typing import Tuple
+
+import numpy as np
+
+
+class Batch(object):
+    """
+    Mixin for an arrival or server whose parameters are arrays with one entry
+    per Monte Carlo row, e.g., DM1Batch(lamb=param_array[:, 0]). sigma and
+    rho are always evaluated element-wise, i.e., they return one value per
+    row (infeasible entries are masked instead of raising).
+
+    A scalar theta is used for all rows, an array theta has to broadcast
+    against batch_shape(), e.g., theta[:, np.newaxis] gives a
+    (len(theta), number of rows) array. Settings built from batches have to
+    be evaluated with an array theta, e.g., np.full(len(batch), theta).
+
+    Has to precede the row class in the bases, e.g.,
+    class DM1Batch(Batch, DM1).
+    """
+    def batch_shape(self) -> Tuple[int, ...]:
+        """
+        :return: common shape of the array parameters
+        """
+        return np.broadcast(*[value for value in vars(self).values() if isinstance(value, np.ndarray)]).shape
+
+    def batch_theta(self, theta) -> np.ndarray:
+        """
+        :param theta: mgf parameter(s)
+        :return: theta broadcast against the rows
+        """
+        return theta + np.zeros(self.batch_shape())
+
+    def sigma(self, theta=0.0) -> np.ndarray:
+        return super().sigma(self.batch_theta(theta))
+
+    def rho(self, theta) -> np.ndarray:
+        return super().rho(self.batch_theta(theta))
+
+    def __getitem__(self, index: int):
+        """
+        :param index: Monte Carlo row
+        :return: scalar arrival or server of this row
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no rows")
+
+    def take(self, rows: np.ndarray):
+        """
+        :param rows: indices or boolean mask of Monte Carlo rows
+        :return: batch of these rows only
+        """
+        res = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                setattr(res, name, np.broadcast_to(value, self.batch_shape())[rows])
+
+        return res
+
+    def __len__(self) -> int:
+        return self.batch_shape()[0]
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}_rows={len(self)}"
+
+
+def take_rows(setting, rows: np.ndarray):
+    """
+    :param setting: setting whose arrivals and servers are batches
+    :param rows: indices or boolean mask of Monte Carlo rows
+    :return: copy of the setting with these rows only
+    """
+    res = copy.copy(setting)
+    for name, value in vars(setting).items():
+        if isinstance(value, Batch):
+            setattr(res, name, value.take(rows))
+        elif isinstance(value, list):
+            setattr(res, name, [item.take(rows) if isinstance(item, Batch) else item for item in value])
+
+    return res
+
+
+def number_rows(setting) -> int:
+    """
+    :param setting: setting whose arrivals and servers are batches
+    :return: number of Monte Carlo rows
+    """
+    for value in vars(setting).values():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, Batch):
+                return len(item)
+
+    raise ValueError(f"{type(setting).__name__} contains no batch")
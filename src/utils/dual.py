@@ -0,0 +1,172 @@
+"""Forward-mode automatic differentiation with dual numbers"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+from scipy.special import erf
+
+TWO_OVER_SQRT_PI = 2.0 / np.sqrt(np.pi)
+
+
+def _parts(x) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    :param x: dual number or constant
+    :return:  value and gradient (None for constants)
+    """
+    if isinstance(x, Dual):
+        return x.value, x.grad
+
+    return x, None
+
+
+def _scale(grad: Optional[np.ndarray], factor) -> Optional[np.ndarray]:
+    if grad is None:
+        return None
+
+    return grad * np.asarray(factor)[..., np.newaxis]
+
+
+def _add(grad_1: Optional[np.ndarray], grad_2: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    if grad_1 is None:
+        return grad_2
+    if grad_2 is None:
+        return grad_1
+
+    return grad_1 + grad_2
+
+
+# value and gradient of the unary ufuncs, given the argument a, its gradient
+# and the value v
+_UNARY = {
+    np.negative: lambda a, g, v: -g,
+    np.positive: lambda a, g, v: g,
+    np.exp: lambda a, g, v: _scale(g, v),
+    np.expm1: lambda a, g, v: _scale(g, v + 1),
+    np.log: lambda a, g, v: _scale(g, 1 / a),
+    np.log1p: lambda a, g, v: _scale(g, 1 / (1 + a)),
+    np.sqrt: lambda a, g, v: _scale(g, 0.5 / v),
+    np.square: lambda a, g, v: _scale(g, 2 * a),
+    np.reciprocal: lambda a, g, v: _scale(g, -v**2),
+    np.absolute: lambda a, g, v: _scale(g, np.sign(a)),
+    np.sign: lambda a, g, v: _scale(g, 0.0),
+    np.tanh: lambda a, g, v: _scale(g, 1 - v**2),
+    np.cosh: lambda a, g, v: _scale(g, np.sinh(a)),
+    np.sinh: lambda a, g, v: _scale(g, np.cosh(a)),
+    erf: lambda a, g, v: _scale(g, TWO_OVER_SQRT_PI * np.exp(-a**2)),
+}
+
+# ufuncs that only depend on the value, e.g. comparisons
+_VALUE_ONLY = {
+    np.less, np.less_equal, np.greater, np.greater_equal, np.equal, np.not_equal, np.isnan, np.isfinite, np.isinf,
+    np.signbit
+}
+
+
+def _binary(ufunc, a, g_a, b, g_b, v) -> Optional[np.ndarray]:
+    if ufunc is np.add:
+        return _add(g_a, g_b)
+    if ufunc is np.subtract:
+        return _add(g_a, None if g_b is None else -g_b)
+    if ufunc is np.multiply:
+        return _add(_scale(g_a, b), _scale(g_b, a))
+    if ufunc is np.true_divide:
+        return _add(_scale(g_a, 1 / b), _scale(g_b, -v / b))
+    if ufunc is np.power:
+        d_base = _scale(g_a, b * a**(b - 1))
+        if g_b is None:
+            return d_base
+        return _add(d_base, _scale(g_b, v * np.log(a)))
+    if ufunc is np.maximum or ufunc is np.minimum:
+        first = (a >= b) if ufunc is np.maximum else (a <= b)
+        shape = np.shape(v) + (g_a if g_a is not None else g_b).shape[-1:]
+        zeros = np.zeros(shape)
+        return np.where(first[..., np.newaxis],
+                        zeros if g_a is None else g_a,
+                        zeros if g_b is None else g_b)
+
+    raise TypeError(f"{ufunc.__name__} is not supported for dual numbers")
+
+
+class Dual(NDArrayOperatorsMixin):
+    """
+    Value together with its gradient with respect to the parameters, i.e.,
+    grad has the shape of value plus one axis for the parameters.
+
+    NumPy ufuncs (and the arithmetic operators) apply the chain rule, so
+    every sigma / rho and bound that supports arrays of theta (see
+    is_array) propagates the gradient. The math module is not supported,
+    i.e., it raises a TypeError instead of losing the gradient. Dual
+    numbers are unhashable, so caches evaluate them (like arrays).
+    """
+    __hash__ = None
+
+    def __init__(self, value, grad) -> None:
+        self.value = np.asarray(value, dtype=float)
+        self.grad = np.asarray(grad, dtype=float)
+        if self.grad.shape[:-1] != self.value.shape:
+            self.grad = np.broadcast_to(self.grad, self.value.shape + self.grad.shape[-1:])
+
+    @classmethod
+    def variables(cls, values: List[float]) -> List["Dual"]:
+        """
+        :param values: e.g. the param_list of a setting
+        :return:       one dual number per value, the gradient of the
+                       i-th value is the i-th unit vector
+        """
+        unit_vectors = np.eye(len(values))
+
+        return [cls(value=value, grad=unit_vectors[i]) for i, value in enumerate(values)]
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or "out" in kwargs:
+            return NotImplemented
+
+        values, grads = zip(*[_parts(x) for x in inputs])
+
+        if ufunc in _VALUE_ONLY:
+            return ufunc(*values, **kwargs)
+
+        value = ufunc(*values, **kwargs)
+
+        if len(inputs) == 1:
+            if ufunc not in _UNARY:
+                raise TypeError(f"{ufunc.__name__} is not supported for dual numbers")
+            grad = _UNARY[ufunc](values[0], grads[0], value)
+        else:
+            grad = _binary(ufunc, values[0], grads[0], values[1], grads[1], value)
+
+        return Dual(value=value, grad=grad)
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func is not np.where or len(args) != 3 or kwargs:
+            return NotImplemented
+
+        condition = np.asarray(args[0])
+        (x, g_x), (y, g_y) = _parts(args[1]), _parts(args[2])
+
+        value = np.where(condition, x, y)
+        number_param = (g_x if g_x is not None else g_y).shape[-1]
+        zeros = np.zeros(value.shape + (number_param, ))
+        grad = np.where(condition[..., np.newaxis], zeros if g_x is None else g_x, zeros if g_y is None else g_y)
+
+        return Dual(value=value, grad=grad)
+
+    # dual numbers are immutable, i.e., the augmented assignments rebind
+    def __iadd__(self, other):
+        return self + other
+
+    def __isub__(self, other):
+        return self - other
+
+    def __imul__(self, other):
+        return self * other
+
+    def __itruediv__(self, other):
+        return self / other
+
+    def __ipow__(self, other):
+        return self**other
+
+    def __repr__(self) -> str:
+        return f"Dual(value={self.value}, grad={self.grad})"
@@ -31,3 +31,11 @@ class NotEnoughResults(Exception):
         msg = f"number of results {parameter} is not sufficient"
         super(NotEnoughResults, self).__init__(msg)
         self.parameter = parameter
+
+
+class BudgetExhausted(Exception):
+    """Exception if an optimizer exceeds its evaluation or time budget"""
+    def __init__(self, parameter):
+        msg = f"budget is exhausted, {parameter}"
+        super(BudgetExhausted, self).__init__(msg)
+        self.parameter = parameter
@@ -1,23 +1,30 @@
 """Helper functions"""
 
 from itertools import product
-from math import isinf
-from typing import List
+from math import exp, expm1, inf, isinf, lgamma, log, log1p
+from typing import List, Tuple
 
 import mpmath as mp
 import numpy as np
 import pandas as pd
 
+from utils.dual import Dual
 from utils.exceptions import ParameterOutOfBounds
 
 EPSILON = 1e-09
 
+LOG_2 = log(2.0)
+
 
 def get_q(p: float) -> float:
     """
     :param p: Hoelder p
     :return: q
     """
+    if is_array(p):
+        with np.errstate(all="ignore"):
+            return np.where(p > 1.0, p / (p - 1.0), np.nan)
+
     if p <= 1.0:
         raise ParameterOutOfBounds(f"p={p} must be >1")
 
@@ -56,6 +63,118 @@ def is_equal(float1: float, float2: float, epsilon=EPSILON) -> bool:
     return abs(float1 - float2) < epsilon
 
 
+def is_array(theta) -> bool:
+    """
+    :param theta: mgf parameter(s)
+    :return: True if theta has to be evaluated element-wise (NumPy array
+             or dual number)
+    """
+    return isinstance(theta, (np.ndarray, Dual))
+
+
+def broadcast_like(theta, value):
+    """
+    Used by sigma / rho functions that do not depend on theta.
+
+    :param theta: mgf parameter(s)
+    :param value: theta-independent value
+    :return: value, in the shape of theta if theta is an array
+    """
+    if is_array(theta):
+        # 0 * theta keeps the shape and propagates nan (e.g. from get_q)
+        with np.errstate(all="ignore"):
+            return value + 0.0 * theta
+
+    return value
+
+
+def mask_infeasible(values: np.ndarray, feasible=True, fill=inf) -> np.ndarray:
+    """
+    Element-wise counterpart of raising ParameterOutOfBounds.
+    Infeasible entries are set to the least favorable value, i.e., inf for
+    sigma and the arrivals' rho, and -inf for the service's rho.
+
+    :param values: element-wise evaluated sigma or rho
+    :param feasible: boolean mask of the feasible entries
+    :param fill: value of infeasible (and nan) entries
+    :return: masked values
+    """
+    return np.where(np.logical_and(feasible, ~np.isnan(values)), values, fill)
+
+
+def scale_domain(domain: Tuple[float, float], factor: float) -> Tuple[float, float]:
+    """
+    :param domain: theta_domain() of a process
+    :param factor: the process is evaluated at factor * theta (e.g. Hoelder p)
+    :return: theta_domain() in terms of theta
+    """
+    return domain[0] / factor, domain[1] / factor
+
+
+def intersect_domains(domains: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """
+    :param domains: theta_domain() of several processes
+    :return: interval in which theta is feasible for all of them
+    """
+    return max(domain[0] for domain in domains), min(domain[1] for domain in domains)
+
+
+def central_difference(function, theta: float, step=1e-6) -> float:
+    """
+    Numerical derivative, used if no analytic derivative is implemented.
+
+    :param function: sigma or rho of a process
+    :param theta: mgf parameter(s)
+    :param step: relative step length
+    :return: derivative of function at theta
+    """
+    delta = step * np.maximum(1.0, np.abs(theta))
+
+    return (function(theta + delta) - function(theta - delta)) / (2 * delta)
+
+
+def log_one_minus_exp(x: float) -> float:
+    """
+    log(1 - e^x) without cancellation, i.e., -log_one_minus_exp(-theta * r)
+    is the log of the geometric factor 1 / (1 - e^(-theta * r)).
+
+    :param x: exponent, has to be < 0
+    :return: log(1 - e^x)
+    """
+    if is_array(x):
+        with np.errstate(all="ignore"):
+            return np.where(x > -LOG_2, np.log(-np.expm1(x)), np.log1p(-np.exp(x)))
+
+    if x >= 0.0:
+        raise ParameterOutOfBounds(f"exponent {x} must be < 0")
+
+    if x > -LOG_2:
+        return log(-expm1(x))
+
+    return log1p(-exp(x))
+
+
+def log_binom(n: float, k: float) -> float:
+    """
+    :param n: n, may be real
+    :param k: k, 0 <= k <= n
+    :return: log of the binomial coefficient n over k
+    """
+    return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+
+def log_zeta(t_over_n: float) -> float:
+    """
+    :param t_over_n: delay divided by the number of servers
+    :return: log of zeta = (1 + t)^(1 + t) / t^t
+    """
+    if t_over_n == 0.0:
+        # 0^0 = 1
+        return 0.0
+
+    return (1 + t_over_n) * log1p(t_over_n) - t_over_n * log(t_over_n)
+
+
 def expand_grid(list_input: list) -> pd.DataFrame:
     """
     implement R-expand.grid() function
@@ -1,7 +1,12 @@
 """This superclass represents our get_value abstract class"""
 
 from abc import abstractmethod
-from typing import List
+from math import inf, nan
+from typing import List, Tuple
+
+import numpy as np
+
+from utils.dual import Dual
 
 
 class Setting(object):
@@ -17,9 +22,53 @@ class Setting(object):
         """
         pass
 
+    def d_log_standard_bound(self, param_list: List[float]) -> float:
+        """
+        Derivative of the logarithm of the standard bound with respect to
+        theta, used by gradient-based optimizers. For the LOG_ metrics, the
+        standard bound is already the logarithm.
+
+        By default, standard_bound is differentiated with dual numbers (see
+        utils.dual) or, if it does not support them, by central differences.
+
+        :param param_list: theta and Hoelder parameters
+        :return:           derivative, nan if the bound is infeasible
+        """
+        theta = param_list[0]
+        rest = list(param_list[1:])
+
+        try:
+            with np.errstate(all="ignore"):
+                res = self.standard_bound(param_list=[Dual(value=theta, grad=[1.0])] + rest)
+        except TypeError:
+            # e.g., math functions applied to dual numbers
+            step = 1e-6 * max(1.0, abs(theta))
+            value = self.standard_bound(param_list=[theta] + rest)
+            derivative = (self.standard_bound(param_list=[theta + step] + rest) -
+                          self.standard_bound(param_list=[theta - step] + rest)) / (2 * step)
+        else:
+            if isinstance(res, Dual):
+                value, derivative = float(res.value), float(res.grad[0])
+            else:
+                value, derivative = float(res), 0.0
+
+        perform_param = getattr(self, "perform_param", None)
+        if perform_param is not None and perform_param.perform_metric.name.startswith("LOG_"):
+            return derivative if abs(value) < inf else nan
+
+        return derivative / value if 0.0 < value < inf else nan
+
     @abstractmethod
     def approximate_utilization(self) -> float:
         pass
 
+    def theta_domain(self) -> Tuple[float, float]:
+        """
+        Used by the optimizers to clip the search bounds of theta.
+
+        :return: open interval outside of which every bound is infeasible
+        """
+        return 0.0, inf
+
     def to_name(self) -> str:
         return self.__class__.__name__
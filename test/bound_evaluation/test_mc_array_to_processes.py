@@ -0,0 +1,106 @@
+"""Test of the batched arrivals and servers."""
+
+import numpy as np
+import pytest
+
+from bound_evaluation.mc_array_to_processes import (arrivals_from_array,
+                                                    servers_from_array)
+from bound_evaluation.condition_util import rescale_server_rates
+from bound_evaluation.manipulate_data import utilization_mask
+from h_mitigator.fat_cross_perform import FatCrossPerform
+from msob_and_fp.csv_msob_fp_param import msob_fp_setting
+from nc_arrivals.arrival_enum import ArrivalEnum
+from nc_operations.perform_enum import PerformEnum
+from utils.exceptions import ParameterOutOfBounds
+from utils.perform_parameter import PerformParameter
+
+
+@pytest.mark.parametrize("arrival_enum", [ArrivalEnum.DM1, ArrivalEnum.DGamma1, ArrivalEnum.MMOODisc])
+def test_batch_equals_rows(arrival_enum):
+    number_flows = 3
+    number_servers = 3
+    param_array = np.random.default_rng(1).uniform(
+        low=0.05,
+        high=0.95,
+        size=[40, arrival_enum.number_parameters() * number_flows + number_servers])
+    # last arrival parameter (e.g. peak rate) and service rates
+    param_array[:, (arrival_enum.number_parameters() - 1) * number_flows:] *= 5.0
+
+    arr_batches = arrivals_from_array(arrival_enum=arrival_enum,
+                                      param_array=param_array,
+                                      number_flows=number_flows)
+    ser_batches = servers_from_array(arrival_enum=arrival_enum,
+                                     param_array=param_array,
+                                     number_flows=number_flows,
+                                     number_servers=number_servers)
+
+    for arr_batch in arr_batches:
+        assert len(arr_batch) == 40
+        assert np.allclose(arr_batch.rho(0.5), [arr_batch[i].rho(np.array(0.5)) for i in range(40)])
+        assert arr_batch.sigma(np.array([[0.5], [1.0]])).shape == (2, 40)
+
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+    bounds = FatCrossPerform(arr_list=arr_batches, ser_list=ser_batches,
+                             perform_param=perform_param).standard_bound([np.full(40, 0.5)])
+
+    for i in range(40):
+        row_setting = FatCrossPerform(
+            arr_list=arrivals_from_array(arrival_enum=arrival_enum,
+                                         param_array=param_array[i],
+                                         number_flows=number_flows),
+            ser_list=servers_from_array(arrival_enum=arrival_enum,
+                                        param_array=param_array[i],
+                                        number_flows=number_flows,
+                                        number_servers=number_servers),
+            perform_param=perform_param)
+        try:
+            assert bounds[i] == pytest.approx(row_setting.standard_bound([0.5]))
+        except ParameterOutOfBounds:
+            assert np.isinf(bounds[i])
+
+
+@pytest.mark.parametrize("name", ["overlapping_tandem", "square"])
+def test_batch_utilization(name):
+    param_array = np.random.default_rng(2).uniform(low=0.1, high=8.0, size=[100, 8])
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+
+    util = msob_fp_setting(param_array=param_array,
+                           name=name,
+                           number_flows=4,
+                           number_servers=4,
+                           arrival_enum=ArrivalEnum.DM1,
+                           perform_param=perform_param).approximate_utilization()
+    row_util = [
+        msob_fp_setting(param_array=param_array[i],
+                        name=name,
+                        number_flows=4,
+                        number_servers=4,
+                        arrival_enum=ArrivalEnum.DM1,
+                        perform_param=perform_param).approximate_utilization() for i in range(100)
+    ]
+
+    assert np.allclose(util, row_util)
+    assert np.array_equal(utilization_mask(util=util, target_util=0.5),
+                          [0.5 <= row_util[i] <= 1.0 for i in range(100)])
+
+
+def test_rescale_server_rates():
+    param_array = np.random.default_rng(3).exponential(size=[1000, 6])
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+
+    def util(array: np.ndarray) -> np.ndarray:
+        return msob_fp_setting(param_array=array,
+                               name="overlapping_tandem",
+                               number_flows=3,
+                               number_servers=3,
+                               arrival_enum=ArrivalEnum.DM1,
+                               perform_param=perform_param).approximate_utilization()
+
+    res_array = rescale_server_rates(param_array=param_array,
+                                     util=util(param_array),
+                                     target_util=0.7,
+                                     number_servers=3)
+
+    # the arrivals are not changed
+    assert np.array_equal(res_array[:, :3], param_array[:, :3])
+    assert utilization_mask(util=util(res_array), target_util=0.7).all()
@@ -0,0 +1,83 @@
+"""Test of the Monte Carlo parameter draws."""
+
+import numpy as np
+import pytest
+
+from bound_evaluation.mc_enum import MCEnum
+from bound_evaluation.mc_enum_to_dist import (mc_enum_to_dist,
+                                               mc_enum_to_dist_chunks)
+from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from nc_arrivals.arrival_enum import ArrivalEnum
+
+
+@pytest.mark.parametrize("mc_enum, param_list, mean", [(MCEnum.UNIFORM, [10.0], 5.0),
+                                                       (MCEnum.EXPONENTIAL, [2.0], 0.5),
+                                                       (MCEnum.PARETO, [3.0], 0.5),
+                                                       (MCEnum.LOG_NORMAL, [0.5, 0.7], np.exp(0.5 + 0.7**2 / 2)),
+                                                       (MCEnum.CHI_SQUARED, [3.0], 3.0)])
+def test_qmc(mc_enum, param_list, mean):
+    mc_dist = MonteCarloDist(mc_enum=mc_enum, param_list=param_list, qmc=True, seed=1)
+
+    param_array = mc_enum_to_dist(arrival_enum=ArrivalEnum.DM1,
+                                  mc_dist=mc_dist,
+                                  number_flows=2,
+                                  number_servers=2,
+                                  total_iterations=2**12)
+
+    assert param_array.shape == (2**12, 4)
+    assert param_array.mean(axis=0) == pytest.approx([mean] * 4, rel=1e-2)
+    assert np.array_equal(
+        param_array,
+        mc_enum_to_dist(arrival_enum=ArrivalEnum.DM1,
+                        mc_dist=mc_dist,
+                        number_flows=2,
+                        number_servers=2,
+                        total_iterations=2**12))
+
+
+@pytest.mark.parametrize("qmc", [False, True])
+def test_chunks(qmc):
+    mc_dist = MonteCarloDist(mc_enum=MCEnum.EXPONENTIAL, param_list=[1.0], qmc=qmc, seed=3)
+
+    def draw(chunk_indices=None) -> np.ndarray:
+        return mc_enum_to_dist_chunks(arrival_enum=ArrivalEnum.MMOODisc,
+                                      mc_dist=mc_dist,
+                                      number_flows=2,
+                                      number_servers=2,
+                                      total_iterations=1024,
+                                      seed_sequence=np.random.SeedSequence(7),
+                                      chunk_size=128,
+                                      chunk_indices=chunk_indices)
+
+    param_array = draw()
+
+    assert param_array.shape == (1024, 8)
+    # two shards give the same rows as one draw
+    assert np.array_equal(param_array, np.concatenate([draw(range(0, 3)), draw(range(3, 8))]))
+    # independent of the global state
+    np.random.seed(0)
+    assert np.array_equal(param_array, draw())
+
+
+def test_qmc_chunks_without_seed():
+    mc_dist = MonteCarloDist(mc_enum=MCEnum.EXPONENTIAL, param_list=[1.0], qmc=True)
+
+    def draw(entropy=7, chunk_size=128, chunk_indices=None) -> np.ndarray:
+        return mc_enum_to_dist_chunks(arrival_enum=ArrivalEnum.DM1,
+                                      mc_dist=mc_dist,
+                                      number_flows=2,
+                                      number_servers=2,
+                                      total_iterations=1024,
+                                      seed_sequence=np.random.SeedSequence(entropy),
+                                      chunk_size=chunk_size,
+                                      chunk_indices=chunk_indices)
+
+    param_array = draw()
+
+    # repeated runs and shards with the same seed sequence agree
+    assert np.array_equal(param_array, draw())
+    assert np.array_equal(param_array, np.concatenate([draw(chunk_indices=range(0, 5)),
+                                                       draw(chunk_indices=range(5, 8))]))
+    # all chunks are parts of one scrambled Sobol sequence
+    assert np.array_equal(param_array, draw(chunk_size=256))
+    assert not np.array_equal(param_array, draw(entropy=8))
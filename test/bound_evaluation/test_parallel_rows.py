@@ -0,0 +1,120 @@
+"""Test of the chunked evaluation of Monte Carlo rows."""
+
+import numpy as np
+import pytest
+
+from bound_evaluation.checkpoint import Checkpoint, run_directory
+from bound_evaluation.mc_enum import MCEnum
+from bound_evaluation.monte_carlo_dist import MonteCarloDist
+from bound_evaluation.parallel_rows import evaluate_rows
+from msob_and_fp.compare_avoid_dep import compare_avoid_dep_211, compare_avoid_dep_212
+from utils.exceptions import IllegalArgumentError
+
+
+def test_checkpoint_resume(tmp_path):
+    param_array = np.arange(20.0).reshape(10, 2)
+    calls = []
+
+    def row_function(param_row: np.ndarray) -> np.ndarray:
+        calls.append(param_row[0])
+        return np.array([param_row.sum(), param_row.prod()])
+
+    expected = evaluate_rows(row_function=row_function,
+                             param_array=param_array,
+                             number_columns=2)
+
+    checkpoint = Checkpoint(directory=str(tmp_path))
+    assert np.array_equal(
+        checkpoint.param_array(draw=lambda: param_array), param_array)
+    # the stored array is returned instead of a new draw
+    assert np.array_equal(
+        checkpoint.param_array(draw=lambda: param_array + 1.0), param_array)
+
+    # simulate a crash after the first chunk
+    checkpoint.save_chunk(0, expected[:4])
+    calls.clear()
+
+    res_array = evaluate_rows(row_function=row_function,
+                              param_array=param_array,
+                              number_columns=2,
+                              chunk_size=4,
+                              checkpoint=checkpoint)
+
+    assert np.array_equal(res_array, expected)
+    assert calls == list(param_array[4:, 0])
+
+    calls.clear()
+    assert np.array_equal(
+        evaluate_rows(row_function=row_function,
+                      param_array=param_array,
+                      number_columns=2,
+                      chunk_size=4,
+                      checkpoint=checkpoint), expected)
+    assert calls == []
+
+
+def test_checkpoint_key(tmp_path):
+    mc_dist = MonteCarloDist(mc_enum=MCEnum.EXPONENTIAL, param_list=[1.0], qmc=True, seed=1)
+
+    def directory(mc_dist=mc_dist, servers=2, comparator=compare_avoid_dep_211) -> str:
+        return run_directory(checkpoint_dir=str(tmp_path), filename="run", mc_dist=mc_dist,
+                             flows=2, servers=servers, iter=10, comparator=comparator.__name__)
+
+    assert directory() == directory()
+    assert directory() != directory(servers=3)
+    # the comparator changes the result rows
+    assert directory() != directory(comparator=compare_avoid_dep_212)
+    assert directory() != directory(mc_dist=MonteCarloDist(
+        mc_enum=MCEnum.EXPONENTIAL, param_list=[1.0], qmc=True, seed=2))
+    assert directory() != directory(mc_dist=MonteCarloDist(
+        mc_enum=MCEnum.EXPONENTIAL, param_list=[2.0], qmc=True, seed=1))
+
+    checkpoint = Checkpoint(directory=directory())
+    checkpoint.param_array(draw=lambda: np.zeros((10, 4)), shape=(10, 4))
+    # a stored array of another run is never reused
+    with pytest.raises(IllegalArgumentError):
+        checkpoint.param_array(draw=lambda: np.zeros((10, 5)), shape=(10, 5))
+
+
+def test_row_mask():
+    param_array = np.arange(20.0).reshape(10, 2)
+    row_mask = param_array[:, 0] >= 8.0
+    calls = []
+
+    def row_function(param_row: np.ndarray) -> np.ndarray:
+        calls.append(param_row[0])
+        return np.array([param_row.sum()])
+
+    res_array = evaluate_rows(row_function=row_function,
+                              param_array=param_array,
+                              number_columns=1,
+                              row_mask=row_mask)
+
+    assert calls == list(param_array[row_mask, 0])
+    assert np.array_equal(res_array[row_mask, 0], param_array[row_mask].sum(axis=1))
+    assert np.isnan(res_array[~row_mask]).all()
+
+
+def sum_and_product(param_row: np.ndarray) -> np.ndarray:
+    # module level, i.e., picklable for the worker processes
+    return np.array([param_row.sum(), param_row.prod()])
+
+
+def test_parallel_rows():
+    param_array = np.arange(40.0).reshape(20, 2)
+    row_mask = param_array[:, 0] % 3 != 0
+
+    serial = evaluate_rows(row_function=sum_and_product,
+                           param_array=param_array,
+                           number_columns=2,
+                           row_mask=row_mask)
+    parallel = evaluate_rows(row_function=sum_and_product,
+                             param_array=param_array,
+                             number_columns=2,
+                             number_processes=2,
+                             chunk_size=3,
+                             row_mask=row_mask)
+
+    assert np.array_equal(parallel, serial, equal_nan=True)
+    assert np.array_equal(parallel[row_mask, 0], param_array[row_mask].sum(axis=1))
+    assert np.isnan(parallel[~row_mask]).all()
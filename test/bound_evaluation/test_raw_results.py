@@ -0,0 +1,35 @@
+"""Test of the stored raw results."""
+
+import numpy as np
+
+from bound_evaluation.change_enum import ChangeEnum
+from bound_evaluation.raw_results import load_raw_results, save_raw_results
+from h_mitigator.array_to_results import (two_col_array_to_results,
+                                          two_col_raw_to_results)
+from nc_arrivals.arrival_enum import ArrivalEnum
+
+
+def test_raw_to_results(tmp_path):
+    rng = np.random.default_rng(4)
+    param_array = rng.uniform(size=[50, 4])
+    res_array = rng.uniform(low=1.0, high=2.0, size=[50, 2])
+    res_array[::7] = np.nan
+
+    path = save_raw_results(filename=str(tmp_path / "run"),
+                            param_array=param_array,
+                            res_array=res_array,
+                            arrival_enum=ArrivalEnum.DM1.name,
+                            number_servers=2)
+
+    stored_param_array, stored_res_array, metadata = load_raw_results(path=path)
+    assert np.array_equal(stored_param_array, param_array)
+    assert np.array_equal(stored_res_array, res_array, equal_nan=True)
+    assert metadata == {"arrival_enum": "DM1", "number_servers": 2}
+
+    for compare_metric in [ChangeEnum.RATIO_REF_NEW, ChangeEnum.DIFF_REF_NEW]:
+        assert two_col_raw_to_results(path=path, compare_metric=compare_metric) == two_col_array_to_results(
+            arrival_enum=ArrivalEnum.DM1,
+            param_array=param_array,
+            res_array=res_array,
+            number_servers=2,
+            compare_metric=compare_metric)
@@ -0,0 +1,49 @@
+"""Test of the chunk by chunk statistics."""
+
+import numpy as np
+import pytest
+
+from bound_evaluation.change_enum import ChangeEnum
+from bound_evaluation.streaming_stats import P2Median, StreamingImprovement
+from h_mitigator.array_to_results import (two_col_array_to_results,
+                                          two_col_stream_to_results)
+from nc_arrivals.arrival_enum import ArrivalEnum
+
+
+def test_p2_median():
+    values = np.random.default_rng(2).lognormal(size=10**4)
+    median_estimate = P2Median()
+
+    for value in values[:3]:
+        median_estimate.add(value)
+    assert median_estimate.median() == np.median(values[:3])
+
+    for value in values[3:]:
+        median_estimate.add(value)
+    assert median_estimate.median() == pytest.approx(np.median(values), rel=2e-2)
+
+
+@pytest.mark.parametrize("compare_metric", [ChangeEnum.RATIO_REF_NEW, ChangeEnum.DIFF_REF_NEW])
+def test_stream_to_results(compare_metric):
+    rng = np.random.default_rng(5)
+    param_array = rng.uniform(size=[1000, 4])
+    res_array = rng.uniform(low=1.0, high=2.0, size=[1000, 2])
+    res_array[::9] = np.nan
+
+    stats = StreamingImprovement(compare_metric=compare_metric)
+    for first_row in range(0, 1000, 300):
+        stats.update(param_chunk=param_array[first_row:first_row + 300],
+                     res_chunk=res_array[first_row:first_row + 300])
+
+    array_dict = two_col_array_to_results(arrival_enum=ArrivalEnum.DM1,
+                                          param_array=param_array,
+                                          res_array=res_array,
+                                          number_servers=2,
+                                          compare_metric=compare_metric)
+    stream_dict = two_col_stream_to_results(arrival_enum=ArrivalEnum.DM1,
+                                            stats=stats,
+                                            number_servers=2)
+
+    assert stream_dict.pop("median improvement") == pytest.approx(array_dict.pop("median improvement"), rel=5e-2)
+    assert stream_dict.pop("mean improvement") == pytest.approx(array_dict.pop("mean improvement"))
+    assert stream_dict == array_dict
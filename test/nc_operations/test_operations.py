@@ -1,12 +1,35 @@
 """Test of the network operations."""
 
+from math import inf
+import pickle
+
+import numpy as np
 import pytest
 
-from nc_arrivals.iid import DM1
+from h_mitigator.fat_cross_perform import FatCrossPerform
+from msob_and_fp.overlapping_tandem import OverlappingTandem
+from nc_arrivals.arrival import Arrival
+from nc_arrivals.ebb import EBB
+from nc_arrivals.iid import DM1, MM1, DWeibull1
+from nc_arrivals.markov_modulated import MMOOCont, MMOODisc
+from nc_arrivals.regulated_arrivals import LeakyBucketMassoulie
+from nc_operations.aggregate import AggregateList
 from nc_operations.arb_scheduling import LeftoverARB
 from nc_operations.deconvolve import Deconvolve
+from nc_operations.e2e_enum import E2EEnum
 from nc_operations.convolve import Convolve
+from nc_operations.evaluation_plan import EvaluationPlan, ParamRef
+from nc_operations.feed_forward_analyzer import FeedForwardAnalyzer
+from nc_operations.flow import Flow
+from nc_operations.nc_analysis import NCAnalysis
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.sigma_rho_cache import SigmaRhoCache
+from nc_operations.single_hop_bound import single_hop_bound
+from nc_operations.single_server_perform import SingleServerPerform
 from nc_server.constant_rate_server import ConstantRateServer
+from utils.dual import Dual
+from utils.exceptions import IllegalArgumentError
+from utils.perform_parameter import PerformParameter
 
 
 def test_deconvolve_sigma():
@@ -149,3 +172,348 @@ def test_convolve_leftover_rho():
                                      cross_arr=DM1(lamb=1.2)),
                     indep=False,
                     p=1.8).rho(theta=0.5) == pytest.approx(1.459672932)
+
+
+def test_vectorized_theta():
+    theta = np.array([0.1, 0.5, 1.0, 2.0])
+    deconvolve = Deconvolve(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), indep=False, p=1.5)
+    leftover = LeftoverARB(ser=ConstantRateServer(3.0), cross_arr=MMOODisc(stay_on=0.6, stay_off=0.4, peak_rate=1.5))
+
+    sigma = deconvolve.sigma(theta=theta)
+    assert sigma[0] == pytest.approx(deconvolve.sigma(theta=0.1))
+    assert sigma[1] == pytest.approx(deconvolve.sigma(theta=0.5))
+    # 1.5 * theta >= lambda
+    assert sigma[2] == inf
+    assert sigma[3] == inf
+
+    assert deconvolve.rho(theta=theta)[0] == pytest.approx(deconvolve.rho(theta=0.1))
+    assert leftover.rho(theta=theta) == pytest.approx([leftover.rho(theta=t) for t in theta])
+
+
+def test_evaluation_plan():
+    arr = DM1(lamb=1.2)
+    ser = ConstantRateServer(3.0)
+
+    plan = EvaluationPlan()
+    # structurally equal subtrees are merged
+    leftover_1 = plan.compile(LeftoverARB(ser=ser, cross_arr=Deconvolve(arr=arr, ser=ser)))
+    leftover_2 = plan.compile(LeftoverARB(ser=ser, cross_arr=Deconvolve(arr=arr, ser=ser)))
+    assert leftover_1 is leftover_2
+    assert len(plan) == 4
+
+    s_e2e = plan.compile(Convolve(ser1=leftover_1, ser2=ser, indep=False, p=ParamRef(1, 1.5)))
+    assert type(s_e2e) is Convolve
+
+    for p in [1.5, 3.0]:
+        plan.bind(param_list=[0.2, p])
+        expected = Convolve(ser1=LeftoverARB(ser=ser, cross_arr=Deconvolve(arr=arr, ser=ser)),
+                            ser2=ser,
+                            indep=False,
+                            p=p)
+        assert s_e2e.sigma(theta=0.2) == pytest.approx(expected.sigma(theta=0.2))
+        assert s_e2e.rho(theta=0.2) == pytest.approx(expected.rho(theta=0.2))
+
+    # settings compile their trees on the first evaluation
+    tandem = OverlappingTandem(arr_list=[DM1(lamb=4.0), DM1(lamb=4.5), DM1(lamb=5.0)],
+                               ser_list=[ConstantRateServer(2.0), ConstantRateServer(3.0), ConstantRateServer(2.5)],
+                               perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    assert len(tandem._standard_plan) == 0
+    bound = tandem.standard_bound(param_list=[0.5, 2.0])
+    assert len(tandem._standard_plan) > 0
+    assert pickle.loads(pickle.dumps(tandem)).standard_bound(param_list=[0.5, 2.0]) == bound
+
+
+def test_sigma_rho_cache():
+    deconvolve = Deconvolve(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), indep=True)
+    rho = DM1.rho
+
+    with SigmaRhoCache() as cache:
+        assert deconvolve.sigma(theta=1.0) == pytest.approx(1.671375549)
+        assert deconvolve.sigma(theta=1.0) == pytest.approx(1.671375549)
+        assert cache.hits > 0
+        assert 0.0 < cache.hit_rate < 1.0
+
+    assert DM1.rho is rho
+    assert "__setattr__" not in Arrival.__dict__
+
+    # setting a parameter of a cached operator invalidates the cache
+    dependent = Deconvolve(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), indep=False, p=1.5)
+    expected = Deconvolve(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), indep=False, p=3.0).sigma(theta=0.2)
+    with SigmaRhoCache() as cache:
+        dependent.sigma(theta=0.2)
+        dependent.p, dependent.q = 3.0, 1.5
+        assert len(cache) == 0
+        assert dependent.sigma(theta=0.2) == pytest.approx(expected)
+
+    # EvaluationPlan.bind() rewrites p on the same operator objects
+    tandem = OverlappingTandem(arr_list=[DM1(lamb=4.0), DM1(lamb=4.0), DM1(lamb=4.0)],
+                               ser_list=[ConstantRateServer(2.0)] * 3,
+                               perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    expected = [tandem.standard_bound(param_list=[0.2, p]) for p in (1.2, 3.5)]
+
+    with SigmaRhoCache():
+        assert [tandem.standard_bound(param_list=[0.2, p]) for p in (1.2, 3.5, 1.2)] == pytest.approx(
+            expected + expected[:1])
+
+
+def test_feed_forward_analyzer():
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB,
+                                     value=10)
+    arr_list = [DM1(lamb=3.0), DM1(lamb=4.0), DM1(lamb=5.0)]
+    ser_list = [
+        ConstantRateServer(2.0),
+        ConstantRateServer(1.0),
+        ConstantRateServer(1.5)
+    ]
+
+    # fat cross: the cross flows traverse their own server first
+    analyzer = FeedForwardAnalyzer(flows=[
+        Flow(arr=arr_list[0], server_indices=[0]),
+        Flow(arr=arr_list[1], server_indices=[1, 0]),
+        Flow(arr=arr_list[2], server_indices=[2, 0])
+    ],
+                                   ser_list=ser_list,
+                                   perform_param=perform_param,
+                                   nc_analysis=NCAnalysis.SFA)
+
+    assert analyzer.standard_bound([0.5]) == pytest.approx(
+        FatCrossPerform(arr_list=arr_list,
+                        ser_list=ser_list,
+                        perform_param=perform_param).standard_bound([0.5]))
+    assert analyzer.all_bounds([0.5])[0] == analyzer.standard_bound([0.5])
+
+    with pytest.raises(IllegalArgumentError):
+        FeedForwardAnalyzer(flows=[
+            Flow(arr=arr_list[0], server_indices=[0, 1]),
+            Flow(arr=arr_list[1], server_indices=[1, 0])
+        ],
+                            ser_list=ser_list,
+                            perform_param=perform_param)
+
+
+def test_feed_forward_analyzer_trees():
+    arr_list = [DM1(lamb=4.0), DM1(lamb=5.0), DM1(lamb=6.0), DM1(lamb=7.0)]
+    ser_list = [ConstantRateServer(2.0), ConstantRateServer(3.0), ConstantRateServer(2.5), ConstantRateServer(2.0)]
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+
+    # overlapping tandem, a_2 is prolonged to the last server as in its fp_bound
+    tandem = OverlappingTandem(arr_list=arr_list[:3], ser_list=ser_list[:3], perform_param=perform_param)
+    pmoo = FeedForwardAnalyzer(flows=[
+        Flow(arr=arr_list[0], server_indices=[0, 1, 2]),
+        Flow(arr=arr_list[1], server_indices=[0, 1, 2]),
+        Flow(arr=arr_list[2], server_indices=[1, 2])
+    ],
+                               ser_list=ser_list[:3],
+                               perform_param=perform_param,
+                               nc_analysis=NCAnalysis.PMOO)
+    for theta in [0.3, 0.8]:
+        # the trees of the other flows have Hoelder parameters, the foi's not
+        assert pmoo.standard_bound([theta] + [2.0] * (pmoo.number_param - 1)) == pytest.approx(
+            tandem.fp_bound([theta]))
+
+    # TFA of the overlapping tandem, the delay is split equally, the outputs
+    # of a_1 and a_2 at s_1 are dependent
+    a_1, a_2, a_3 = arr_list[:3]
+    s_1, s_2, s_3 = ser_list[:3]
+    a_1_2 = Deconvolve(arr=a_1, ser=LeftoverARB(ser=s_1, cross_arr=a_2))
+    a_2_2 = Deconvolve(arr=a_2, ser=LeftoverARB(ser=s_1, cross_arr=a_1))
+    a_1_3 = Deconvolve(arr=a_1_2,
+                       ser=LeftoverARB(ser=s_2,
+                                       cross_arr=AggregateList(arr_list=[a_2_2, a_3], indep=True, p_list=[])),
+                       indep=False,
+                       p=2.0)
+    a_3_3 = Deconvolve(arr=a_3,
+                       ser=LeftoverARB(ser=s_2,
+                                       cross_arr=AggregateList(arr_list=[a_1_2, a_2_2], indep=False, p_list=[2.0])))
+    total_flows = [
+        AggregateList(arr_list=[a_1, a_2], indep=True, p_list=[]),
+        AggregateList(arr_list=[AggregateList(arr_list=[a_1_2, a_2_2], indep=False, p_list=[2.0]), a_3],
+                      indep=True,
+                      p_list=[]),
+        AggregateList(arr_list=[a_1_3, a_3_3], indep=False, p_list=[2.0])
+    ]
+    delay_param = PerformParameter(perform_metric=PerformEnum.DELAY, value=1e-3)
+    tfa = FeedForwardAnalyzer(flows=[
+        Flow(arr=a_1, server_indices=[0, 1, 2]),
+        Flow(arr=a_2, server_indices=[0, 1]),
+        Flow(arr=a_3, server_indices=[1, 2])
+    ],
+                              ser_list=ser_list[:3],
+                              perform_param=delay_param,
+                              nc_analysis=NCAnalysis.TFA)
+    per_server = PerformParameter(perform_metric=PerformEnum.DELAY, value=1e-3 / 3)
+    assert tfa.number_param == 5
+    assert tfa.standard_bound([0.3] + [2.0] * 4) == pytest.approx(
+        sum(single_hop_bound(foi=total_flow, s_e2e=ser, theta=0.3, perform_param=per_server)
+            for total_flow, ser in zip(total_flows, ser_list[:3])))
+
+    # square, the cross flows are multiplexed arbitrarily (Square itself uses
+    # priorities), both leftover services depend on a_2 and a_3
+    a_1, a_2, a_3, a_4 = arr_list
+    s_1, s_2, s_3, s_4 = ser_list
+    d_3_3 = Deconvolve(arr=a_3, ser=LeftoverARB(ser=s_3, cross_arr=a_2))
+    d_4_4 = Deconvolve(arr=a_4,
+                       ser=LeftoverARB(ser=s_4,
+                                       cross_arr=Deconvolve(arr=a_2, ser=LeftoverARB(ser=s_3, cross_arr=a_3))))
+    s_e2e = Convolve(ser1=LeftoverARB(ser=s_1, cross_arr=d_3_3),
+                     ser2=LeftoverARB(ser=s_2, cross_arr=d_4_4),
+                     indep=False,
+                     p=2.0)
+    square = FeedForwardAnalyzer(flows=[
+        Flow(arr=a_1, server_indices=[0, 1]),
+        Flow(arr=a_2, server_indices=[2, 3]),
+        Flow(arr=a_3, server_indices=[2, 0]),
+        Flow(arr=a_4, server_indices=[3, 1])
+    ],
+                                 ser_list=ser_list,
+                                 perform_param=perform_param,
+                                 nc_analysis=NCAnalysis.PMOO)
+    assert square.standard_bound([0.3] + [2.0] * (square.number_param - 1)) == pytest.approx(
+        single_hop_bound(foi=a_1, s_e2e=s_e2e, theta=0.3, perform_param=perform_param))
+
+    # the closed-form tandem bounds assume independent leftover services
+    sfa_rate_diff = FeedForwardAnalyzer(flows=[
+        Flow(arr=a_1, server_indices=[0, 1]),
+        Flow(arr=a_2, server_indices=[0, 1])
+    ],
+                                        ser_list=ser_list[:2],
+                                        perform_param=perform_param,
+                                        e2e_enum=E2EEnum.RATE_DIFF)
+    with pytest.raises(NotImplementedError):
+        sfa_rate_diff.standard_bound([0.3] + [2.0] * (sfa_rate_diff.number_param - 1))
+
+
+def test_feed_forward_analyzer_shared_subtrees():
+    calls = []
+
+    class CountingDM1(DM1):
+        def rho(self, theta=0.0):
+            calls.append((id(self), theta))
+            return super().rho(theta=theta)
+
+    ser_list = [ConstantRateServer(6.0) for _ in range(3)]
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4)
+
+    def analyzer() -> FeedForwardAnalyzer:
+        # the output of the middle flow at server 1 is a cross flow of both others
+        return FeedForwardAnalyzer(flows=[
+            Flow(arr=CountingDM1(lamb=5.0), server_indices=[0, 1, 2]),
+            Flow(arr=CountingDM1(lamb=6.0), server_indices=[0, 1]),
+            Flow(arr=CountingDM1(lamb=7.0), server_indices=[1, 2])
+        ],
+                                   ser_list=ser_list,
+                                   perform_param=perform_param)
+
+    shared = analyzer()
+    param_list = [0.5] + [2.0] * (shared.number_param - 1)
+    bounds = shared.all_bounds(param_list)
+    shared_calls = calls.copy()
+    # every leaf is evaluated once per theta, although it is part of several trees
+    assert len(shared_calls) == len(set(shared_calls))
+
+    calls.clear()
+    for flow_index in range(3):
+        separate = analyzer()
+        assert separate.all_bounds(param_list, foi_indices=[flow_index])[0] == bounds[flow_index]
+
+    assert len(shared_calls) < len(calls)
+
+
+def test_grid_search_all():
+    perform_param = PerformParameter(perform_metric=PerformEnum.DELAY_PROB,
+                                     value=4)
+    ser_list = [ConstantRateServer(6.0) for _ in range(3)]
+    flows = [
+        Flow(arr=DM1(lamb=5.0), server_indices=[0, 1, 2]),
+        Flow(arr=DM1(lamb=6.0), server_indices=[0, 1]),
+        Flow(arr=DM1(lamb=7.0), server_indices=[1, 2])
+    ]
+    theta_grid = np.arange(0.1, 3.0, 0.1)
+
+    analyzer = FeedForwardAnalyzer(flows=flows,
+                                   ser_list=ser_list,
+                                   perform_param=perform_param)
+    results = analyzer.grid_search_all(theta_bounds=(0.1, 3.0),
+                                       delta=0.1,
+                                       foi_indices=[2, 0])
+
+    for flow_index, result in zip([2, 0], results):
+        separate = FeedForwardAnalyzer(flows=flows,
+                                       ser_list=ser_list,
+                                       perform_param=perform_param,
+                                       foi_index=flow_index)
+        assert result.obj_value == min(
+            separate.all_bounds([float(theta)] + [2.0] * (separate.number_param - 1), foi_indices=[flow_index])[0]
+            for theta in theta_grid)
+        assert result.obj_value < inf
+
+
+def test_theta_domain():
+    assert DM1(lamb=1.2).theta_domain() == (0.0, 1.2)
+    assert ConstantRateServer(2.0).theta_domain() == (0.0, inf)
+
+    # the arrival is evaluated at p * theta
+    assert Deconvolve(arr=DM1(lamb=1.2),
+                      ser=ConstantRateServer(2.0),
+                      indep=False,
+                      p=3.0).theta_domain() == pytest.approx((0.0, 0.4))
+
+    assert LeftoverARB(ser=Convolve(ser1=ConstantRateServer(2.0),
+                                    ser2=ConstantRateServer(3.0)),
+                       cross_arr=AggregateList(
+                           arr_list=[DM1(lamb=1.2), DM1(lamb=0.8)],
+                           indep=False,
+                           p_list=[2.0])).theta_domain() == pytest.approx(
+                               (0.0, 0.4))
+
+
+def test_derivatives():
+    processes = [
+        DM1(lamb=2.0),
+        MM1(lamb=1.0, mu=2.0),
+        DWeibull1(lamb=1.2),
+        MMOODisc(stay_on=0.6, stay_off=0.3, peak_rate=2.0),
+        MMOOCont(mu=1.0, lamb=2.2, peak_rate=3.4),
+        EBB(factor_m=1.5, decay=2.0, rho_single=0.5),
+        LeakyBucketMassoulie(sigma_single=1.0, rho_single=0.5, m=3),
+        Deconvolve(arr=MMOOCont(mu=1.0, lamb=2.2, peak_rate=3.4), ser=ConstantRateServer(4.0), indep=False, p=1.5),
+        Convolve(ser1=LeftoverARB(ser=ConstantRateServer(5.0), cross_arr=DM1(lamb=2.0)),
+                 ser2=LeftoverARB(ser=ConstantRateServer(6.0), cross_arr=MMOODisc(0.6, 0.3, 2.0)),
+                 indep=False,
+                 p=2.0),
+        AggregateList(arr_list=[DM1(lamb=2.0), EBB(1.5, 2.0, 0.5)], indep=False, p_list=[2.0])
+    ]
+    theta = 0.4
+    step = 1e-6
+
+    for process in processes:
+        for function, derivative in [(process.sigma, process.d_sigma), (process.rho, process.d_rho)]:
+            assert derivative(theta) == pytest.approx(
+                (function(theta + step) - function(theta - step)) / (2 * step), rel=1e-5, abs=1e-8)
+
+        theta_array = np.array([0.2, theta])
+        assert process.d_rho(theta_array)[1] == pytest.approx(process.d_rho(theta))
+
+
+def test_dual_numbers():
+    theta, p = Dual.variables([0.4, 2.0])
+
+    with pytest.raises(TypeError):
+        hash(theta)
+
+    for process in [DWeibull1(lamb=1.2), MMOODisc(stay_on=0.6, stay_off=0.3, peak_rate=2.0), EBB(1.5, 2.0, 0.5)]:
+        assert process.sigma(theta).grad[0] == pytest.approx(process.d_sigma(0.4))
+        assert process.rho(theta).grad[0] == pytest.approx(process.d_rho(0.4))
+
+    setting = SingleServerPerform(foi=MMOODisc(stay_on=0.6, stay_off=0.3, peak_rate=2.0),
+                                  server=ConstantRateServer(4.0),
+                                  perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4),
+                                  indep=False)
+    res = setting.standard_bound(param_list=[theta, p])
+    step = 1e-6
+
+    assert float(res.value) == pytest.approx(setting.standard_bound(param_list=[0.4, 2.0]))
+    assert res.grad[0] == pytest.approx((setting.standard_bound(param_list=[0.4 + step, 2.0]) -
+                                         setting.standard_bound(param_list=[0.4 - step, 2.0])) / (2 * step), rel=1e-5)
+    assert res.grad[1] == pytest.approx((setting.standard_bound(param_list=[0.4, 2.0 + step]) -
+                                         setting.standard_bound(param_list=[0.4, 2.0 - step])) / (2 * step), rel=1e-5)
@@ -1,12 +1,21 @@
 """Test of the performance bounds."""
 
+from math import inf, log
+
+import numpy as np
 import pytest
 from nc_arrivals.iid import DM1
 from nc_server.constant_rate_server import ConstantRateServer
+from utils.perform_parameter import PerformParameter
 
-from nc_operations.performance_bounds import output
+from nc_operations.e2e_enum import E2EEnum
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.performance_bounds import (delay, delay_prob, log_delay_prob,
+                                              log_output, output)
 from nc_operations.performance_bounds_geom import (backlog_prob_geom,
-                                                   delay_prob_geom)
+                                                   delay_prob_geom,
+                                                   log_delay_prob_geom)
+from nc_operations.sfa_tandem_bound import sfa_tandem_bound
 
 
 def test_backlog_prob():
@@ -136,3 +145,74 @@ def test_output():
                   delta_time=10,
                   indep=True,
                   p=1.0) == pytest.approx(354.9779033)
+
+
+def test_vectorized_bounds():
+    theta = np.array([0.2, 0.5, 1.1, 1.3])
+    p = np.array([2.0, 1.5, 2.0, 2.0])
+
+    res = delay_prob(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), theta=theta, delay_value=4, indep=False, p=p)
+    for i in range(2):
+        assert res[i] == pytest.approx(
+            delay_prob(arr=DM1(lamb=1.2),
+                       ser=ConstantRateServer(2.0),
+                       theta=theta[i],
+                       delay_value=4,
+                       indep=False,
+                       p=p[i]))
+    # p * theta >= lambda
+    assert res[2] == inf
+    assert res[3] == inf
+
+    res = delay(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), theta=theta, prob_d=0.001)
+    assert res[1] == pytest.approx(
+        delay(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), theta=0.5, prob_d=0.001))
+    assert res[3] == inf
+
+
+def test_log_bounds():
+    assert log_delay_prob_geom(arr=DM1(lamb=1.2),
+                               ser=ConstantRateServer(3.0),
+                               theta=0.5,
+                               delay_value=3,
+                               indep=False,
+                               p=2.0) == pytest.approx(log(0.0244991068))
+
+    assert log_output(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), theta=1.0, delta_time=3,
+                      indep=True) == pytest.approx(log(1149.007674))
+
+    assert log_delay_prob(arr=DM1(lamb=1.2), ser=ConstantRateServer(2.0), theta=0.5, delay_value=4,
+                          indep=False, p=2.0) == pytest.approx(
+                              log(
+                                  delay_prob(arr=DM1(lamb=1.2),
+                                             ser=ConstantRateServer(2.0),
+                                             theta=0.5,
+                                             delay_value=4,
+                                             indep=False,
+                                             p=2.0)))
+
+    ser_list = [ConstantRateServer(3.0), ConstantRateServer(2.5), ConstantRateServer(3.0)]
+
+    assert sfa_tandem_bound(foi=DM1(lamb=2.0),
+                            leftover_service_list=ser_list,
+                            theta=0.5,
+                            perform_param=PerformParameter(perform_metric=PerformEnum.LOG_DELAY_PROB, value=10),
+                            p_list=[],
+                            e2e_enum=E2EEnum.ARR_RATE) == pytest.approx(
+                                log(
+                                    sfa_tandem_bound(foi=DM1(lamb=2.0),
+                                                     leftover_service_list=ser_list,
+                                                     theta=0.5,
+                                                     perform_param=PerformParameter(
+                                                         perform_metric=PerformEnum.DELAY_PROB, value=10),
+                                                     p_list=[],
+                                                     e2e_enum=E2EEnum.ARR_RATE)))
+
+    # the product of the 200 geometric factors alone would overflow
+    long_tandem = [ConstantRateServer(3.0)] * 200
+    assert sfa_tandem_bound(foi=DM1(lamb=2.0),
+                            leftover_service_list=long_tandem,
+                            theta=0.01,
+                            perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=10**5),
+                            p_list=[],
+                            e2e_enum=E2EEnum.ARR_RATE) < inf
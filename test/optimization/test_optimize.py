@@ -0,0 +1,354 @@
+"""Test of the optimization methods."""
+
+from math import cos, inf
+from typing import List
+
+import numpy as np
+import pytest
+import scipy.optimize
+
+from h_mitigator.fat_cross_perform import FatCrossPerform
+from h_mitigator.optimize_mitigator import (BatchOptimizeMitigator,
+                                           OptimizeMitigator)
+from msob_and_fp.overlapping_tandem import OverlappingTandem
+from nc_arrivals.batch_arrivals import DM1Batch
+from nc_arrivals.iid import DM1
+from nc_operations.perform_enum import PerformEnum
+from nc_operations.single_server_perform import SingleServerPerform
+from nc_server.constant_rate_server import (ConstantRateServer,
+                                            ConstantRateServerBatch)
+from optimization.batch_optimize import BatchOptimize
+from optimization.initial_simplex import InitialSimplex
+from optimization.opt_method import OptMethod
+from optimization.optimize import Optimize
+from optimization.result_cache import ResultCache, fingerprint
+from optimization.warm_start_sweep import WarmStartSweep
+from utils.batch import take_rows
+from utils.exceptions import IllegalArgumentError
+from utils.perform_parameter import PerformParameter
+from utils.setting import Setting
+
+
+class TwoMinima(Setting):
+    def standard_bound(self, param_list: List[float]) -> float:
+        return 2.0 + cos(3.0 * param_list[0]) + 0.1 * param_list[0]
+
+    def approximate_utilization(self) -> float:
+        return 0.0
+
+
+def test_brent():
+    setting = SingleServerPerform(foi=DM1(lamb=1.0),
+                                  server=ConstantRateServer(rate=10.0),
+                                  perform_param=PerformParameter(
+                                      perform_metric=PerformEnum.DELAY_PROB,
+                                      value=8))
+
+    grid_res = Optimize(setting=setting,
+                        number_param=1).grid_search(grid_bounds=[(0.1, 10.0)],
+                                                    delta=0.05)
+    # the optimum is close to the boundary theta < lamb
+    brent_res = Optimize(setting=setting, number_param=1).brent()
+
+    assert brent_res.heuristic == "brent"
+    assert brent_res.opt_x[0] < 1.0
+    assert brent_res.obj_value == pytest.approx(grid_res.obj_value, rel=1e-3)
+
+    assert Optimize(setting=TwoMinima(),
+                    number_param=1).brent().heuristic == "grid_search"
+
+
+def test_warm_start_sweep():
+    sweep = WarmStartSweep(grid_bounds=[(0.1, 10.0)], delta=0.05)
+
+    for delay in range(4, 21):
+        setting = SingleServerPerform(foi=DM1(lamb=5.0),
+                                      server=ConstantRateServer(rate=3.0),
+                                      perform_param=PerformParameter(
+                                          perform_metric=PerformEnum.DELAY_PROB,
+                                          value=delay))
+
+        grid_res = Optimize(setting=setting, number_param=1).grid_search(
+            grid_bounds=[(0.1, 10.0)], delta=0.05)
+        sweep_res = sweep.optimize(
+            optimize=Optimize(setting=setting, number_param=1))
+
+        assert sweep_res.obj_value == pytest.approx(grid_res.obj_value,
+                                                    rel=1e-6)
+
+    assert sweep.number_global == 1
+
+    # the polished optimum of the first step lies beyond the grid_bounds
+    sweep = WarmStartSweep(grid_bounds=[(0.1, 1.0)], delta=0.05)
+    for delay in range(10, 13):
+        setting = SingleServerPerform(foi=DM1(lamb=4.0),
+                                      server=ConstantRateServer(rate=1.0),
+                                      perform_param=PerformParameter(
+                                          perform_metric=PerformEnum.DELAY_PROB,
+                                          value=delay))
+
+        grid_res = Optimize(setting=setting, number_param=1).grid_search(
+            grid_bounds=[(0.1, 1.0)], delta=0.05)
+        sweep_res = sweep.optimize(
+            optimize=Optimize(setting=setting, number_param=1))
+
+        assert sweep_res.obj_value < inf
+        assert sweep_res.obj_value == pytest.approx(grid_res.obj_value,
+                                                    rel=1e-6)
+
+
+def test_result_cache(tmp_path):
+    def make_setting() -> SingleServerPerform:
+        return SingleServerPerform(foi=DM1(lamb=1.0),
+                                   server=ConstantRateServer(rate=10.0),
+                                   perform_param=PerformParameter(
+                                       perform_metric=PerformEnum.DELAY_PROB,
+                                       value=8))
+
+    # equal content, different objects
+    assert fingerprint(make_setting()) == fingerprint(make_setting())
+    assert fingerprint(make_setting()) != fingerprint(
+        SingleServerPerform(foi=DM1(lamb=1.0),
+                            server=ConstantRateServer(rate=10.0),
+                            perform_param=PerformParameter(
+                                perform_metric=PerformEnum.DELAY_PROB,
+                                value=9)))
+
+    cache = ResultCache(path=str(tmp_path / "results.db"))
+    res = Optimize(setting=make_setting(),
+                   number_param=1).cached(cache,
+                                          "grid_search",
+                                          grid_bounds=[(0.1, 10.0)],
+                                          delta=0.05)
+    assert len(cache) == 1
+
+    # a new cache on the same file returns the stored result
+    cached_res = Optimize(setting=make_setting(), number_param=1).cached(
+        ResultCache(path=str(tmp_path / "results.db")),
+        "grid_search",
+        grid_bounds=[(0.1, 10.0)],
+        delta=0.05)
+    assert cached_res.obj_value == res.obj_value
+    assert list(cached_res.opt_x) == pytest.approx(list(res.opt_x))
+    assert len(cache) == 1
+
+    small_cache = ResultCache(path=str(tmp_path / "small.db"), max_entries=2)
+    for key in ["a", "b", "c"]:
+        small_cache.put(key, res)
+    small_cache.get("b")
+    small_cache.put("d", res)
+
+    assert len(small_cache) == 2
+    assert small_cache.get("a") is None
+    assert small_cache.get("b") is not None
+
+
+def make_batch_setting(number_rows: int) -> FatCrossPerform:
+    param_array = np.random.default_rng(0).uniform(low=0.1, high=10.0, size=[number_rows, 4])
+
+    return FatCrossPerform(arr_list=[DM1Batch(lamb=param_array[:, 0]),
+                                     DM1Batch(lamb=param_array[:, 1])],
+                           ser_list=[ConstantRateServerBatch(rate=param_array[:, 2]),
+                                     ConstantRateServerBatch(rate=param_array[:, 3])],
+                           perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=10))
+
+
+def test_batch_pattern_search():
+    setting = make_batch_setting(number_rows=100)
+
+    standard_res = BatchOptimize(setting=setting, number_param=1).pattern_search(start_list=[0.5])
+    h_mit_res = BatchOptimizeMitigator(setting_h_mit=setting, number_param=2).pattern_search(start_list=[0.5, 1.0])
+
+    assert np.isfinite(standard_res.obj_value).sum() > 50
+
+    for i in range(100):
+        row_setting = FatCrossPerform(arr_list=[arr[i] for arr in setting.arr_list],
+                                      ser_list=[ser[i] for ser in setting.ser_list],
+                                      perform_param=setting.perform_param)
+
+        assert standard_res.obj_value[i] == pytest.approx(
+            Optimize(setting=row_setting, number_param=1).pattern_search(start_list=[0.5]).obj_value, rel=1e-9)
+        assert h_mit_res.obj_value[i] == pytest.approx(
+            OptimizeMitigator(setting_h_mit=row_setting, number_param=2).pattern_search(start_list=[0.5,
+                                                                                                    1.0]).obj_value,
+            rel=1e-9)
+
+
+def test_batch_nelder_mead():
+    setting = make_batch_setting(number_rows=50)
+    simplex = InitialSimplex(parameters_to_optimize=1).gao_han(start_list=[0.5])
+
+    optimize = BatchOptimize(setting=setting, number_param=1)
+    batch_res = optimize.nelder_mead(simplex=simplex)
+
+    for i in range(50):
+        row_setting = take_rows(setting=setting, rows=np.array([i]))
+
+        with np.errstate(all="ignore"):
+            scipy_res = scipy.optimize.minimize(
+                lambda x: float(optimize.eval_batch(setting=row_setting, param_array=x[np.newaxis, :])[0]),
+                x0=simplex[0],
+                method="Nelder-Mead",
+                options={
+                    "initial_simplex": simplex,
+                    "fatol": 10**(-2)
+                })
+
+        assert batch_res.obj_value[i] == pytest.approx(optimize.to_bound(scipy_res.fun), rel=1e-9)
+        assert batch_res.opt_x[i] == pytest.approx(scipy_res.x)
+
+
+def test_grid_search_narrow_domain():
+    # theta_domain() is (0, 0.15), i.e., the clipped interval is narrower than delta
+    setting = FatCrossPerform(arr_list=[DM1(lamb=0.15), DM1(lamb=3.0)],
+                              ser_list=[ConstantRateServer(rate=20.0), ConstantRateServer(rate=20.0)],
+                              perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=10))
+
+    for vectorized in [False, True]:
+        grid_res = Optimize(setting=setting, number_param=1).grid_search(grid_bounds=[(0.1, 4.0)],
+                                                                         delta=0.1,
+                                                                         vectorized=vectorized)
+        assert 0.1 <= grid_res.opt_x[0] < 0.15
+        assert grid_res.obj_value == pytest.approx(8.6425e-12, rel=1e-4)
+
+
+def test_multi_grid_search():
+    setting = FatCrossPerform(arr_list=[DM1(lamb=1.0), DM1(lamb=2.0), DM1(lamb=3.0)],
+                              ser_list=[ConstantRateServer(rate=8.0),
+                                        ConstantRateServer(rate=5.0),
+                                        ConstantRateServer(rate=6.0)],
+                              perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=10))
+    grid_bounds = [(0.1, 4.0), (1.1, 4.0), (1.1, 4.0)]
+
+    grid_res = OptimizeMitigator(setting_h_mit=setting, number_param=3).grid_search(grid_bounds=grid_bounds, delta=0.1)
+    multi_grid_res = OptimizeMitigator(setting_h_mit=setting, number_param=3).multi_grid_search(grid_bounds=grid_bounds,
+                                                                                                delta=0.1)
+
+    assert multi_grid_res.heuristic == "multi_grid_search"
+    assert multi_grid_res.obj_value == pytest.approx(grid_res.obj_value, rel=1e-6)
+
+
+def test_barrier_gradient():
+    for perform_metric in [PerformEnum.DELAY_PROB, PerformEnum.BACKLOG_PROB, PerformEnum.OUTPUT]:
+        setting = FatCrossPerform(arr_list=[DM1(lamb=3.0), DM1(lamb=4.0), DM1(lamb=2.0)],
+                                  ser_list=[ConstantRateServer(rate=3.0),
+                                            ConstantRateServer(rate=2.0),
+                                            ConstantRateServer(rate=4.0)],
+                                  perform_param=PerformParameter(perform_metric=perform_metric, value=4))
+
+        calls = []
+        d_log_standard_bound = setting.d_log_standard_bound
+        setting.d_log_standard_bound = lambda param_list: calls.append(param_list) or d_log_standard_bound(param_list)
+
+        barrier_res = Optimize(setting=setting, number_param=1).barrier_gradient()
+        brent_res = Optimize(setting=setting, number_param=1).brent(x_tol=1e-6)
+
+        assert barrier_res.heuristic == "barrier_gradient"
+        assert barrier_res.obj_value <= brent_res.obj_value * (1 + 1e-6)
+        assert len(calls) <= 15
+
+    log_setting = SingleServerPerform(foi=DM1(lamb=1.0),
+                                      server=ConstantRateServer(rate=2.0),
+                                      perform_param=PerformParameter(perform_metric=PerformEnum.LOG_DELAY_PROB,
+                                                                     value=10))
+    assert Optimize(setting=log_setting, number_param=1).barrier_gradient(
+        log_domain=True).obj_value == pytest.approx(log_setting.standard_bound(param_list=[0.7548]), abs=1e-6)
+
+
+def test_log_objective():
+    setting = FatCrossPerform(arr_list=[DM1(lamb=3.0), DM1(lamb=4.0), DM1(lamb=2.0)],
+                              ser_list=[ConstantRateServer(rate=3.0),
+                                        ConstantRateServer(rate=2.0),
+                                        ConstantRateServer(rate=4.0)],
+                              perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    log_optimize = Optimize(setting=setting, number_param=1)
+    optimize = Optimize(setting=setting, number_param=1, log_objective=False)
+
+    assert log_optimize.uses_log_objective()
+    assert not optimize.uses_log_objective()
+    assert not Optimize(setting=TwoMinima(), number_param=1).uses_log_objective()
+
+    log_res = log_optimize.pattern_search(start_list=[0.5], delta=1.0, delta_min=1e-4)
+    res = optimize.pattern_search(start_list=[0.5], delta=1.0, delta_min=1e-4)
+
+    # same argmin, obj_value is mapped back to the bound
+    assert log_res.opt_x == pytest.approx(res.opt_x, abs=1e-3)
+    assert log_res.obj_value == pytest.approx(setting.standard_bound(param_list=log_res.opt_x))
+    assert log_res.obj_value == pytest.approx(res.obj_value, rel=1e-4)
+
+
+def test_barrier_gradient_tandem():
+    # the tandem has no analytic derivative, i.e., the dual number fallback is used
+    setting = OverlappingTandem(arr_list=[DM1(lamb=4.0), DM1(lamb=4.0), DM1(lamb=4.0)],
+                                ser_list=[ConstantRateServer(rate=2.0)] * 3,
+                                perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    p = 1.5
+
+    with np.errstate(all="ignore"):
+        derivative = setting.d_log_standard_bound(param_list=[0.5, p])
+        assert derivative == pytest.approx(scipy.optimize.approx_fprime(
+            np.array([0.5]), lambda x: np.log(setting.standard_bound(param_list=[x[0], p])), 1e-7)[0], rel=1e-4)
+
+        barrier_res = Optimize(setting=setting, number_param=2).barrier_gradient(fixed_params=[p])
+        # the bound has a second local minimum at the boundary of its domain
+        grid = np.linspace(0.1, 1.2, 2000)
+        grid_min = np.min(setting.standard_bound(param_list=[grid, p]))
+
+    assert barrier_res.opt_x[1] == p
+    assert barrier_res.obj_value <= grid_min * (1 + 1e-6)
+
+    with pytest.raises(IllegalArgumentError):
+        Optimize(setting=setting, number_param=2).barrier_gradient()
+
+
+def test_value_and_gradient():
+    setting = FatCrossPerform(arr_list=[DM1(lamb=3.0), DM1(lamb=4.0), DM1(lamb=2.0)],
+                              ser_list=[ConstantRateServer(rate=3.0),
+                                        ConstantRateServer(rate=2.0),
+                                        ConstantRateServer(rate=4.0)],
+                              perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    optimize = OptimizeMitigator(setting_h_mit=setting, number_param=3)
+
+    value, gradient = optimize.value_and_gradient(param_list=[1.0, 1.2, 1.5])
+    assert value == pytest.approx(setting.h_mit_bound(param_l_list=[1.0, 1.2, 1.5]))
+    with np.errstate(all="ignore"):
+        assert gradient == pytest.approx(scipy.optimize.approx_fprime(
+            np.array([1.0, 1.2, 1.5]), lambda x: setting.h_mit_bound(param_l_list=x.tolist()), 1e-7), rel=1e-4)
+
+    # theta > lamb of the foi
+    value, gradient = optimize.value_and_gradient(param_list=[3.5, 1.2, 1.5])
+    assert value == inf
+    assert np.all(np.isnan(gradient))
+
+    single_setting = SingleServerPerform(foi=DM1(lamb=1.0),
+                                         server=ConstantRateServer(rate=2.0),
+                                         perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB,
+                                                                        value=10),
+                                         indep=False)
+    assert Optimize(setting=single_setting, number_param=2).bfgs(start_list=[0.3, 2.0],
+                                                                 dual_gradient=True).obj_value < 1e-4
+
+
+def test_portfolio():
+    setting = FatCrossPerform(arr_list=[DM1(lamb=3.0), DM1(lamb=4.0), DM1(lamb=2.0)],
+                              ser_list=[ConstantRateServer(rate=3.0),
+                                        ConstantRateServer(rate=2.0),
+                                        ConstantRateServer(rate=4.0)],
+                              perform_param=PerformParameter(perform_metric=PerformEnum.DELAY_PROB, value=4))
+    bound_list = [(0.1, 4.0), (0.9, 4.0), (0.9, 4.0)]
+
+    grid_res = OptimizeMitigator(setting_h_mit=setting, number_param=3).grid_search(grid_bounds=bound_list, delta=0.1)
+    portfolio_res = OptimizeMitigator(setting_h_mit=setting, number_param=3).portfolio(budget_seconds=60.0,
+                                                                                       bound_list=bound_list)
+
+    assert portfolio_res.heuristic.startswith("portfolio_")
+    assert portfolio_res.obj_value <= grid_res.obj_value * (1 + 1e-6)
+    assert set(portfolio_res.evaluations) == {"GRID_SEARCH", "PATTERN_SEARCH", "NELDER_MEAD", "DUAL_ANNEALING", "BFGS"}
+    # the full grid has about 40^3 points, i.e., the grid search was stopped
+    assert portfolio_res.evaluations["GRID_SEARCH"] <= 200
+
+    assert OptimizeMitigator(setting_h_mit=setting, number_param=3).portfolio(budget_seconds=0.0).obj_value == inf
+
+    with pytest.raises(IllegalArgumentError):
+        OptimizeMitigator(setting_h_mit=setting, number_param=3).portfolio(budget_seconds=1.0,
+                                                                          methods=[OptMethod.SIMULATED_ANNEALING])